@@ -5,9 +5,14 @@ from multiprocessing import Process
 from events.editor import EditorEvents
 from events.run import RunEvents
 from events.error_handler import ErrorHandler
+from events.status import StatusUpdater
+from events.diagnostics import DiagnosticsUpdater
 from utils.utils import *
-from utils.common import Path, Dict, Color
-from utils.serial_interface import Tasks
+from utils.common import Path, Dict, Color, Text
+from utils.api import ControlServer
+from utils.metrics import METRICS
+from utils.devices import DeviceRegistry
+from utils.models import TextTableModel, TextSearchModel, WrapTextDelegate
 
 
 # App init
@@ -26,11 +31,13 @@ class MainWindow(QMainWindow):
 
     def __init__(self):
         super().__init__()
-        self.TEXT_GAP = "                    "            # 20 spaces
+        self.TEXT_GAP = Text.gap
 
         self.editor = EditorEvents(self)
         self.run = RunEvents(self)
-        self.tasks = Tasks(self)
+        self.diagnostics = DiagnosticsUpdater(self)
+        self.devices = DeviceRegistry.load(Path.json_Devices)
+        self.deviceName = self.devices.names()[0]          # None means all devices
 
         self.setWindowTitle("Leuchtturm")
         self.setFixedSize(700, 500)
@@ -48,7 +55,13 @@ class MainWindow(QMainWindow):
         self.editorDescWidget.setWordWrap(True)
         self.editorDescWidget.setFixedSize(590, 50)
 
-        self.tableWidget = createTable(20, 2, [(0, 200), (1, 375)], False, True, False, True, True)
+        self.textModel = TextTableModel(TEXTS)
+        self.tableWidget = createTableView(
+            self.textModel,
+            [(0, 200), (1, 375)],
+            WrapTextDelegate(),
+            WrapTextDelegate.rowHeight(QFont(STD_FONT, STD_FONTSIZE))
+        )
 
         self.buttonNew = createPushButton(
             text="New",
@@ -217,23 +230,45 @@ class MainWindow(QMainWindow):
             parent=self.runWidget
         )
 
-        with open(Path.json_Texts, "r") as fdataTexts:
-            dataTexts = json.load(fdataTexts)
-
-        if len(list(dataTexts.keys())) == 0:
-            placeholder = "No texts available"
-
-        else:
-            placeholder = "Select text"
-
+        self.textSearchModel = TextSearchModel(TEXTS)
 
         self.precreatedTexts_Dropdown = createComboBox(
-            items=list(dataTexts.keys()),
-            placeholder=placeholder,
+            items=[],
             isPlaceholderBold=True,
             rect=(40, 365, 170, 23),
             parent=self.runWidget
         )
+        self.precreatedTexts_Dropdown.setModel(self.textSearchModel)
+        updateRunDropdown(self.precreatedTexts_Dropdown)
+
+        self.precreatedTexts_Search = createLineEdit(
+            100,
+            placeholder="Search texts",
+            rect=(220, 365, 150, 23),
+            parent=self.runWidget
+        )
+        self.precreatedTexts_Search.textEdited.connect(self.run.on_searchText_changed)
+
+        self.upload_ProgressBar = createProgressBar(
+            rect=(40, 393, 170, 12),
+            parent=self.runWidget
+        )
+
+        if len(self.devices) > 1:
+            self.deviceTitle = createLabelText(
+                "Device",
+                fontSize=13,
+                bold=True,
+                rect=(540, 10, 140, 21),
+                parent=self.runWidget
+            )
+
+            self.device_Dropdown = createComboBox(
+                items=self.devices.names() + ["All devices"],
+                rect=(540, 40, 140, 23),
+                parent=self.runWidget
+            )
+            self.device_Dropdown.currentIndexChanged.connect(self.run.on_dropdownDevice_changed)
 
         self.warning_Label = createLabelText(
             "Don't unplug the power cable from the device while the display is on!",
@@ -253,20 +288,72 @@ class MainWindow(QMainWindow):
             parent=self.runWidget
         )
 
+        self.diagnosticsTitle = createLabelText("Diagnostics", fontSize=18, bold=True, underline=True)
+
+        self.diagnosticsDescWidget = createLabelText(
+            "The counters and timers of the serial connection, e.g. the latency of the commands and the reconnects."
+        )
+        self.diagnosticsDescWidget.setWordWrap(True)
+
+        self.diagnosticsTable = createTable(0, 3, [(0, 200), (1, 170), (2, 265)], False, True, False, True, True)
+        self.diagnosticsTable.setHorizontalHeaderLabels(["Metric", "Labels", "Value"])
+
+        self.buttonDiagnosticsReset = createPushButton(
+            text="Reset",
+            buttonSize=(50, 25),
+            func=self.diagnostics.on_btnReset_pressed
+        )
+
+        self.buttonDiagnosticsCopy = createPushButton(
+            text="Copy",
+            buttonSize=(50, 25),
+            func=self.diagnostics.on_btnCopy_pressed
+        )
+        self.buttonDiagnosticsCopy.setToolTip("Copies the metrics in the Prometheus text format")
+
+        self.diagnosticsLayout = createGridLayout(
+            (self.diagnosticsTitle, (0, 0)),
+            (self.diagnosticsDescWidget, (0, 1)),
+            (self.diagnosticsTable, (0, 2)),
+            (createGridLayout((self.buttonDiagnosticsReset, (0, 0)), (self.buttonDiagnosticsCopy, (1, 0))), (0, 3))
+        )
+
+        self.diagnosticsWidget = QWidget()
+        self.diagnosticsWidget.setLayout(self.diagnosticsLayout)
+
         self.tabs = createTab(
             [
                 (self.runWidget, QIcon(Path.png_ExecutiveDark), "Run"),
-                (self.editorWidget, QIcon(Path.png_Notebook), "Editor")
+                (self.editorWidget, QIcon(Path.png_Notebook), "Editor"),
+                (self.diagnosticsWidget, None, "Diagnostics")
             ],
             self.on_tab_changed
         )
         self.setCentralWidget(self.tabs)
 
+        self.statusUpdater = StatusUpdater(self)
+
+    @property
+    def tasks(self):
+        """
+        The engine of the selected device or the broadcast to all devices.
+        """
+
+        if self.deviceName is None:
+            return self.devices.broadcast
+
+        return self.devices[self.deviceName]
+
     def on_tab_changed(self):
         tabName = self.tabs.tabText(self.tabs.currentIndex())
 
+        if tabName == "Diagnostics":
+            self.diagnostics.start()
+        else:
+            self.diagnostics.stop()
+
         if tabName == "Editor":
-            updateEditorTable(self.tableWidget)
+            self.textModel.refresh()
 
         elif tabName == "Run":
             updateRunDropdown(self.precreatedTexts_Dropdown)
@@ -294,14 +381,36 @@ createMessageBox(
     textFormat=Qt.TextFormat.MarkdownText,
 )
 
+METRICS.enabled = True         # shown in the diagnostics tab and served by the control API
+
 threadpool = QThreadPool()
-thread_task = Thread(window.tasks.loop, window)
-thread_task.signals.progress.connect(error_handler.on_response_error)
-thread_task.signals.error.connect(error_handler.on_error)
-threadpool.start(thread_task)
+threadpool.setMaxThreadCount(max(threadpool.maxThreadCount(), len(window.devices)))
+
+for deviceName, deviceTasks in window.devices:
+    thread_task = Thread(deviceTasks.loop, window)
+    thread_task.signals.error.connect(error_handler.on_error)
+    window.statusUpdater.watch(deviceName, thread_task.signals)
+    thread_task.signals.upload.connect(window.run.on_upload_progress)
+
+    if len(window.devices) == 1:
+        # with several devices, an unresponsive board shows "Loading..." instead of blocking the window
+        thread_task.signals.progress.connect(error_handler.on_response_error)
+
+    threadpool.start(thread_task)
+
+try:
+    controlServer = ControlServer(window.devices)
+    controlServer.start()
+except OSError as e:
+    # e.g. the port is already used by another instance, the GUI works without the API
+    print(f"Control API not started: {e}")
+    controlServer = None
 
 app.exec_()
-window.tasks.running = False
+if controlServer is not None:
+    controlServer.stop()
+window.devices.stop()
+threadpool.waitForDone(2000)        # let the loop close the serial port
 sys.exit(1)
 
 
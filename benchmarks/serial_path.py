@@ -0,0 +1,277 @@
+"""
+Benchmarks of the serial path, run against the simulated board (``utils.simulator``) or any port.
+
+Usage::
+
+    python -m benchmarks.serial_path --latency 0.002 --sim-baudrate 115200 --output before.json
+    python -m benchmarks.serial_path --latency 0.002 --sim-baudrate 115200 --compare before.json
+    python -m benchmarks.serial_path --port /dev/ttyACM0
+    python -m benchmarks.serial_path --sim-baudrate 115200 --binary --compare text.json
+    python -m benchmarks.serial_path --latency 0.002 --sim-baudrate 115200 --pipelined --compare binary.json
+    python -m benchmarks.serial_path --drop 0.01 --garbage 0.01 --seed 1 --silent --binary
+
+Measured are the latency of every single query (``_Comms.get_*``), the latency of a status sweep
+(batched ``get_all`` and the six single queries of an old firmware), the commands per second through
+``exec_task_ser`` and the CPU time per sweep. Latencies are reported as p50/p95/p99 in milliseconds.
+With lost (``--drop``) or garbled (``--garbage``) replies a call can time out, it is measured anyway
+and counted in ``timeouts``. ``--silent`` lets the old firmware ignore unknown commands instead of refusing them.
+The results are written as json, so runs of different commits can be compared with ``--compare``.
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+from typing import Callable, List
+
+import serial
+
+import utils.simulator     # registers the 'fake://' ports
+from utils.metrics import METRICS
+from utils.serial_interface import _Comms, _FIELD_QUERIES, _STD_BAUDRATE, _STD_TIMEOUT
+
+
+_STD_ITERATIONS = 200
+_STD_WARMUP = 10
+_QUERIES = {field: f"get_{field}" if field != "board_state" else "get_board_state_ser" for field in _FIELD_QUERIES}
+
+
+def _summarize(samples: List[float], timeouts: int = 0):
+    """
+    :param samples: The durations in seconds: List[float]
+    :param timeouts: The calls which timed out, default to 0: int
+
+    :return: The statistics in milliseconds: dict
+    """
+
+    samples = sorted(samples)
+    quantiles = statistics.quantiles(samples, n=100, method="inclusive") if len(samples) > 1 else samples * 99
+
+    return {
+        "n": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "min_ms": samples[0] * 1000,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+        "max_ms": samples[-1] * 1000,
+        "timeouts": timeouts,
+    }
+
+
+def _measure(func: Callable, iterations: int, warmup: int):
+    """
+    Calls the function repeatedly and measures every call, a call which times out is measured as well.
+
+    :return: The durations in seconds, the CPU time of this thread and of the whole process in seconds
+             and the number of timeouts: tuple
+    """
+
+    def call():
+        try:
+            func()
+        except serial.SerialTimeoutException:
+            return 1
+        return 0
+
+    for _ in range(warmup):
+        call()
+
+    samples = []
+    timeouts = 0
+    threadStart, processStart = time.thread_time(), time.process_time()
+
+    for _ in range(iterations):
+        start = time.perf_counter()
+        timeouts += call()
+        samples.append(time.perf_counter() - start)
+
+    return samples, time.thread_time() - threadStart, time.process_time() - processStart, timeouts
+
+
+def _bench_queries(comms: _Comms, args):
+    results = {}
+
+    for field, query in _QUERIES.items():
+        samples, _, _, timeouts = _measure(getattr(comms, query), args.iterations, args.warmup)
+        results[f"query.{field}"] = _summarize(samples, timeouts)
+
+    return results
+
+
+def _bench_sweep(comms: _Comms, name: str, args):
+    samples, threadCpu, processCpu, timeouts = _measure(comms.get_status, args.iterations, args.warmup)
+
+    result = _summarize(samples, timeouts)
+    result["cpu_thread_ms_per_sweep"] = threadCpu / args.iterations * 1000
+    result["cpu_process_ms_per_sweep"] = processCpu / args.iterations * 1000
+
+    return {f"sweep.{name}": result}
+
+
+def _bench_commands(comms: _Comms, args):
+    commands = ["display_off\n", "display_on\n"]
+    state = {"i": 0}
+
+    def toggle():
+        comms.exec_task_ser(commands[state["i"] % 2], None)
+        state["i"] += 1
+
+    samples, _, _, timeouts = _measure(toggle, args.iterations, args.warmup)
+
+    result = _summarize(samples, timeouts)
+    result["commands_per_s"] = len(samples) / sum(samples)
+
+    return {"commands.exec_task_ser": result}
+
+
+def _fake_url(name: str, args, batch: bool = True):
+    url = (f"fake://{name}?latency={args.latency}&baudrate={args.sim_baudrate or 0}&batch={batch}"
+           f"&drop={args.drop}&garbage={args.garbage}")
+
+    if args.seed is not None:
+        url += f"&seed={args.seed}"
+
+    if not batch:
+        # an old firmware knows none of the newer commands
+        url += f"&subscribe=false&chunked=false&patch=false&binary=false&silent={args.silent}"
+
+    return url
+
+
+def run(args):
+    """
+    Runs all benchmarks.
+
+    :return: The results: dict
+    """
+
+    results = {}
+
+    if args.port is None:
+        ports = {"batch": _fake_url(f"bench-{os.getpid()}", args), "single": _fake_url(f"bench-old-{os.getpid()}", args, False)}
+    else:
+        ports = {"batch": args.port}
+
+    METRICS.enabled = args.metrics
+
+    for name, port in ports.items():
+        comms = _Comms(args.baudrate, port, args.timeout, binary=args.binary, pipelined=args.pipelined)
+
+        try:
+            if name == "batch":
+                results.update(_bench_queries(comms, args))
+                results.update(_bench_commands(comms, args))
+
+            results.update(_bench_sweep(comms, name, args))
+        finally:
+            comms.close()
+
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_table(results: dict, baseline: dict = None):
+    print(f"{'benchmark':32} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  extra", file=sys.stderr)
+
+    for name, result in results.items():
+        extra = ""
+        if "commands_per_s" in result:
+            extra = f"{result['commands_per_s']:.0f} cmd/s"
+        elif "cpu_thread_ms_per_sweep" in result:
+            extra = f"{result['cpu_thread_ms_per_sweep']:.3f} ms CPU/sweep"
+
+        if result.get("timeouts"):
+            extra += f"  {result['timeouts']} timeouts"
+
+        if baseline is not None and name in baseline:
+            change = (result["p50_ms"] / baseline[name]["p50_ms"] - 1) * 100 if baseline[name]["p50_ms"] else 0.0
+            extra += f"  (p50 {change:+.1f}%)"
+
+        print(f"{name:32} {result['p50_ms']:9.3f} {result['p95_ms']:9.3f} {result['p99_ms']:9.3f}  {extra}",
+              file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.serial_path", description="Benchmarks the serial path.")
+    parser.add_argument("--port", default=None, help="the port to benchmark (default a simulated board)")
+    parser.add_argument("--baudrate", type=int, default=_STD_BAUDRATE)
+    parser.add_argument("--timeout", type=float, default=_STD_TIMEOUT)
+    parser.add_argument("--latency", type=float, default=0.0, help="the latency of the simulated board in seconds")
+    parser.add_argument("--sim-baudrate", type=int, default=None,
+                        help="the baud rate which throttles the simulated board (default unthrottled)")
+    parser.add_argument("--drop", type=float, default=0.0, help="the probability that the simulated board drops a reply")
+    parser.add_argument("--garbage", type=float, default=0.0,
+                        help="the probability of garbage in front of a reply of the simulated board")
+    parser.add_argument("--seed", type=int, default=None, help="the seed of the faults of the simulated board")
+    parser.add_argument("--silent", action="store_true",
+                        help="the simulated old firmware ignores unknown commands instead of answering 'ERROR'")
+    parser.add_argument("--iterations", type=int, default=_STD_ITERATIONS)
+    parser.add_argument("--warmup", type=int, default=_STD_WARMUP)
+    parser.add_argument("--metrics", action="store_true", help="enable the metrics (to measure their overhead)")
+    parser.add_argument("--binary", action="store_true", help="negotiate the binary protocol")
+    parser.add_argument("--pipelined", action="store_true", help="pipeline the queries (negotiates the binary protocol)")
+    parser.add_argument("--output", default=None, help="write the json results to this file (default stdout)")
+    parser.add_argument("--compare", default=None, help="the json results of an earlier run to compare with")
+    args = parser.parse_args(argv)
+
+    report = {
+        "commit": _git_commit(),
+        "time": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "port": args.port or "simulator",
+            "baudrate": args.baudrate,
+            "timeout": args.timeout,
+            "latency": args.latency,
+            "sim_baudrate": args.sim_baudrate,
+            "drop": args.drop,
+            "garbage": args.garbage,
+            "seed": args.seed,
+            "silent": args.silent,
+            "iterations": args.iterations,
+            "metrics": args.metrics,
+            "binary": args.binary,
+            "pipelined": args.pipelined,
+        },
+        "results": run(args),
+    }
+
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare, "r") as fdata:
+            baselineReport = json.load(fdata)
+
+        if baselineReport["config"] != report["config"]:
+            print(f"warning: {args.compare} was measured with another configuration: {baselineReport['config']}",
+                  file=sys.stderr)
+
+        baseline = baselineReport["results"]
+
+    _print_table(report["results"], baseline)
+
+    if args.output is None:
+        print(json.dumps(report, indent=2))
+    else:
+        with open(args.output, "w") as fdata:
+            json.dump(report, fdata, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from app import MainWindow
+
+from PyQt5.Qt import *
+
+from utils.metrics import METRICS
+
+
+_REFRESH_INTERVAL = 1000        # ms
+
+
+class DiagnosticsUpdater(QObject):
+    """
+    Shows the metrics of the serial path (``utils.metrics.METRICS``) in the diagnostics tab.
+    Inherits from ``Qt.QObject``, the table is refreshed by a timer only while the tab is visible.
+    """
+
+    def __init__(self, mainWindow: MainWindow):
+        super().__init__()
+        self.mainWindow = mainWindow
+
+        self.__timer = QTimer(self)
+        self.__timer.setInterval(_REFRESH_INTERVAL)
+        self.__timer.timeout.connect(self.on_refresh)
+
+    def start(self):
+        """
+        Called when the diagnostics tab gets visible.
+        """
+
+        self.on_refresh()
+        self.__timer.start()
+
+    def stop(self):
+        """
+        Called when another tab gets visible.
+        """
+
+        self.__timer.stop()
+
+    @pyqtSlot()
+    def on_refresh(self):
+        """
+        Fills the table with the current metrics.
+        """
+
+        table = self.mainWindow.diagnosticsTable
+        rows = METRICS.snapshot()
+
+        table.setRowCount(len(rows))
+
+        for row, (name, labels, value) in enumerate(rows):
+            if isinstance(value, dict):
+                text = (f"{value['count']}x, mean {value['mean'] * 1000:.2f} ms, "
+                        f"max {value['max'] * 1000:.2f} ms, last {value['last'] * 1000:.2f} ms")
+            else:
+                text = f"{value:g}"
+
+            labelsText = ", ".join(f"{key}={labelValue}" for key, labelValue in labels.items())
+
+            for col, cellText in enumerate([name, labelsText, text]):
+                item = table.item(row, col)
+                if item is None:
+                    table.setItem(row, col, QTableWidgetItem(cellText))
+                elif item.text() != cellText:
+                    item.setText(cellText)
+
+    def on_btnReset_pressed(self):
+        """
+        Called when the "Reset"-button is pressed.
+        """
+
+        METRICS.reset()
+        self.on_refresh()
+
+    def on_btnCopy_pressed(self):
+        """
+        Called when the "Copy"-button is pressed, copies the metrics in the Prometheus text format.
+        """
+
+        QApplication.clipboard().setText(METRICS.to_prometheus())
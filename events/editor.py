@@ -1,6 +1,5 @@
-import json
 from utils.utils import *
-from utils.common import Path
+from utils.common import Text
 
 
 class EditorEvents:
@@ -19,108 +18,110 @@ class EditorEvents:
         (which are then selectable in the run dropdown).
         """
 
-        with open(Path.json_Texts, "r") as fdata:
-            data = json.load(fdata)
+        titleWidget = createLabelText("New Text", fontSize=18, bold=True, underline=True)
+        descWidget = createLabelText("Please type your text and a specific label into the text-fields"
+                                     "\nbelow, the tags (separated by commas) are optional."
+                                     f"\nNOTE: The maximum length of the text is {Text.maxLength} and the maximum"
+                                     "\nlength of the label is 20 characters.",
+                                     )
+
+        inputTextLabel = createLabelText(
+            "Text:",
+        )
+
+        self.inputText = createLineEdit(
+            Text.maxLength,
+            placeholder="Enter your text",
+        )
+
+        inputTagsLabel = createLabelText(
+            "Tags: ",
+        )
+
+        self.inputTags = createLineEdit(
+            100,
+            placeholder="e.g. info, opening hours",
+        )
+
+        inputLabelLabel = createLabelText(
+            "Label: ",
+        )
+
+        self.inputLabel = createLineEdit(
+            20,
+            placeholder="Enter your label",
+        )
+
+        dlgNewTextBtnBox = createDialogButtonBox(
+            [
+                ("Create && Save", QDialogButtonBox.AcceptRole),
+                ("Cancel", QDialogButtonBox.RejectRole)
+            ],
+            (self.on_btnsNewText_pressed, {'btn': QDialogButtonBox.Save}),
+            (self.on_btnsNewText_pressed, {'btn': QDialogButtonBox.Cancel})
+        )
+
+        emptyTextLabel = createLabelText("")
+
+        layout = createGridLayout(
+            (titleWidget, (1, 0)),
+            (descWidget, (1, 1)),
+            (emptyTextLabel, (0, 2)),
+            (inputLabelLabel, (0, 3)),
+            (self.inputLabel, (1, 3)),
+            (inputTextLabel, (0, 4)),
+            (self.inputText, (1, 4)),
+            (inputTagsLabel, (0, 5)),
+            (self.inputTags, (1, 5)),
+            (emptyTextLabel, (1, 6)),
+            (dlgNewTextBtnBox, (1, 7)),
+        )
+
+        self.dlgNewText = createDialog(self.mainWindow, (500, 310), "New Text",
+                                       [Qt.WindowSystemMenuHint, Qt.WindowTitleHint, Qt.WindowCloseButtonHint],
+                                       layout)
+        self.dlgNewText.exec()
 
-        if len(data.keys()) >= 19:
+    def on_btnDel_pressed(self):
+        """
+        Called when the del-button is pressed.
 
-            createMessageBox(self.mainWindow, "New Text", "Maximum reached!", [QMessageBox.Ok], QMessageBox.Critical)
+        Opens a new window in which the user can select a text which should be deleted from the editor table.
+        """
 
-        else:
-            titleWidget = createLabelText("New Text", fontSize=18, bold=True, underline=True)
-            descWidget = createLabelText("Please type your text and a specific label into the text-fields"
-                                         "\nbelow."
-                                         "\nNOTE: The maximum length of the text is 489 and the maximum"
-                                         "\nlength of the label is 20 characters.",
-                                         )
-
-            inputTextLabel = createLabelText(
-                "Text:",
-            )
+        labels = TEXTS.labels()
 
-            self.inputText = createLineEdit(
-                489,
-                placeholder="Enter your text",
-            )
+        if len(labels) == 0:
+            createMessageBox(self.mainWindow, "Delete Text", "No texts existing!", [QMessageBox.Ok], QMessageBox.Critical)
 
-            inputLabelLabel = createLabelText(
-                "Label: ",
+        else:
+            titleWidget = createLabelText("Delete Text", fontSize=18, bold=True, underline=True)
+            descWidget = createLabelText(
+                "Please choose the text you want to delete below.",
             )
 
-            self.inputLabel = createLineEdit(
-                20,
-                placeholder="Enter your label",
-            )
+            self.delDropdownWidget = createComboBox(labels)
 
-            dlgNewTextBtnBox = createDialogButtonBox(
+            self.dlgDelTextBtnBox = createDialogButtonBox(
                 [
-                    ("Create && Save", QDialogButtonBox.AcceptRole),
+                    ("Delete && Save", QDialogButtonBox.AcceptRole),
                     ("Cancel", QDialogButtonBox.RejectRole)
                 ],
-                (self.on_btnsNewText_pressed, {'btn': QDialogButtonBox.Save}),
-                (self.on_btnsNewText_pressed, {'btn': QDialogButtonBox.Cancel})
+                (self.on_btnsDelText_pressed, {'btn': QDialogButtonBox.Save}),
+                (self.on_btnsDelText_pressed, {'btn': QDialogButtonBox.Cancel})
             )
 
-            emptyTextLabel = createLabelText("")
-
             layout = createGridLayout(
-                (titleWidget, (1, 0)),
-                (descWidget, (1, 1)),
-                (emptyTextLabel, (0, 2)),
-                (inputLabelLabel, (0, 3)),
-                (self.inputLabel, (1, 3)),
-                (inputTextLabel, (0, 4)),
-                (self.inputText, (1, 4)),
-                (emptyTextLabel, (1, 5)),
-                (dlgNewTextBtnBox, (1, 6)),
+                (titleWidget, (0, 0)),
+                (descWidget, (0, 1)),
+                (self.delDropdownWidget, (0, 2)),
+                (self.dlgDelTextBtnBox, (1, 3))
             )
 
-            self.dlgNewText = createDialog(self.mainWindow, (500, 280), "New Text",
+            self.dlgDelText = createDialog(self.mainWindow, (500, 180), "Delete Text",
                                            [Qt.WindowSystemMenuHint, Qt.WindowTitleHint, Qt.WindowCloseButtonHint],
                                            layout)
-            self.dlgNewText.exec()
-
-    def on_btnDel_pressed(self):
-        """
-        Called when the del-button is pressed.
-
-        Opens a new window in which the user can select a text which should be deleted from the editor table.
-        """
-
-        with open(Path.json_Texts, "r") as fdata:
-            data = json.load(fdata)
-
-            if len(data.keys()) == 0:
-                createMessageBox(self.mainWindow, "Delete Text", "No texts existing!", [QMessageBox.Ok], QMessageBox.Critical)
-
-            else:
-                titleWidget = createLabelText("Delete Text", fontSize=18, bold=True, underline=True)
-                descWidget = createLabelText(
-                    "Please choose the text you want to delete below.",
-                )
-
-                self.delDropdownWidget = createComboBox(data.keys())
-
-                self.dlgDelTextBtnBox = createDialogButtonBox(
-                    [
-                        ("Delete && Save", QDialogButtonBox.AcceptRole),
-                        ("Cancel", QDialogButtonBox.RejectRole)
-                    ],
-                    (self.on_btnsDelText_pressed, {'btn': QDialogButtonBox.Save}),
-                    (self.on_btnsDelText_pressed, {'btn': QDialogButtonBox.Cancel})
-                )
-
-                layout = createGridLayout(
-                    (titleWidget, (0, 0)),
-                    (descWidget, (0, 1)),
-                    (self.delDropdownWidget, (0, 2)),
-                    (self.dlgDelTextBtnBox, (1, 3))
-                )
-
-                self.dlgDelText = createDialog(self.mainWindow, (500, 180), "Delete Text",
-                                               [Qt.WindowSystemMenuHint, Qt.WindowTitleHint, Qt.WindowCloseButtonHint],
-                                               layout)
-                self.dlgDelText.exec()
+            self.dlgDelText.exec()
 
     def on_btnClear_pressed(self):
         """
@@ -129,15 +130,12 @@ class EditorEvents:
         Opens a confirmation window in which the user has to confirm that he want to delete all textes.
         """
 
-        with open(Path.json_Texts, "r") as fdata:
-            data = json.load(fdata)
-
-            if len(data.keys()) == 0:
-                createMessageBox(self.mainWindow, "Clear Texts", "No texts existing!", [QMessageBox.Ok], QMessageBox.Critical)
-            else:
-                createMessageBox(self.mainWindow, "Clear Texts", "Are you sure you want to delete every text?",
-                                 [QMessageBox.Yes, QMessageBox.No],
-                                 QMessageBox.Warning, func=self.on_btnsClearText_pressed)
+        if len(TEXTS) == 0:
+            createMessageBox(self.mainWindow, "Clear Texts", "No texts existing!", [QMessageBox.Ok], QMessageBox.Critical)
+        else:
+            createMessageBox(self.mainWindow, "Clear Texts", "Are you sure you want to delete every text?",
+                             [QMessageBox.Yes, QMessageBox.No],
+                             QMessageBox.Warning, func=self.on_btnsClearText_pressed)
 
     def on_btnsNewText_pressed(self, btn):
         """
@@ -169,28 +167,16 @@ class EditorEvents:
                 createMessageBox(self.mainWindow, "Error!", f"Text has invalid symbols ({', '.join(invalidChars)}), please try again.",
                                  [QMessageBox.Ok], QMessageBox.Critical)
 
-            else:
-
-                with open(Path.json_Texts, "r") as fdata:
-                    data = json.load(fdata)
-
-                    if label not in data.keys():
-                        data[label] = text
-
-                        with open(Path.json_Texts, "w+") as fdata:
-                            json.dump(data, fdata, sort_keys=True, indent=4)
-
-                        updateEditorTable(self.mainWindow.tableWidget)
-                        self.dlgNewText.close()
-                        createMessageBox(self.mainWindow, "New Text", "Your text has been created!", [QMessageBox.Ok],
-                                         QMessageBox.Information)
+            elif label in TEXTS:
+                createMessageBox(self.mainWindow, "Error!", "This label already exists, please try again..",
+                                 [QMessageBox.Ok], QMessageBox.Critical)
 
+            else:
+                self.mainWindow.textModel.addText(label, text, self.inputTags.text().split(","))
 
-                    else:
-                        createMessageBox(self.mainWindow, "Error!", "This label already exists, please try again..",
-                                         [QMessageBox.Ok], QMessageBox.Critical)
-                        with open(Path.json_Texts, "w+") as fdata:
-                            json.dump(data, fdata, sort_keys=True, indent=4)
+                self.dlgNewText.close()
+                createMessageBox(self.mainWindow, "New Text", "Your text has been created!", [QMessageBox.Ok],
+                                 QMessageBox.Information)
 
 
         elif btn == QDialogButtonBox.Cancel:
@@ -209,16 +195,11 @@ class EditorEvents:
         if btn == QDialogButtonBox.Save:
             selectedLabel = self.delDropdownWidget.currentText()
 
-            with open(Path.json_Texts, "r") as fdata:
-                data = json.load(fdata)
-                del data[selectedLabel]
-                with open(Path.json_Texts, "w+") as fdata:
-                    json.dump(data, fdata, sort_keys=True, indent=4)
+            self.mainWindow.textModel.removeText(selectedLabel)
 
-                updateEditorTable(self.mainWindow.tableWidget)
-                self.dlgDelText.close()
-                createMessageBox(self.mainWindow, "Delete Text", "Your text has been deleted!", [QMessageBox.Ok],
-                                 QMessageBox.Information)
+            self.dlgDelText.close()
+            createMessageBox(self.mainWindow, "Delete Text", "Your text has been deleted!", [QMessageBox.Ok],
+                             QMessageBox.Information)
 
         elif btn == QDialogButtonBox.Cancel:
             self.dlgDelText.close()
@@ -233,14 +214,7 @@ class EditorEvents:
         btnName = btnName.strip("&")
 
         if btnName == "Yes":
-            with open(Path.json_Texts, "r") as fdataTexts:
-                dataTexts = json.load(fdataTexts)
-
-                dataTexts = {}
-
-                with open(Path.json_Texts, "w+") as fdataTexts:
-                    json.dump(dataTexts, fdataTexts, sort_keys=True, indent=4)
+            self.mainWindow.textModel.clearTexts()
 
-                updateEditorTable(self.mainWindow.tableWidget)
-                createMessageBox(self.mainWindow, "Clear Texts", "All texts have been deleted!", [QMessageBox.Ok],
-                                 QMessageBox.Information)
\ No newline at end of file
+            createMessageBox(self.mainWindow, "Clear Texts", "All texts have been deleted!", [QMessageBox.Ok],
+                             QMessageBox.Information)
\ No newline at end of file
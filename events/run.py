@@ -3,10 +3,13 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from app import MainWindow
 
-import json
-
 from utils.utils import *
-from utils.common import Path, Dict, Color
+from utils.common import Dict, Color
+from utils.threads import FutureWatcher
+
+
+_SEARCH_DELAY = 150         # ms after the last keystroke until the text picker is filtered
+
 
 class RunEvents:
     """
@@ -15,6 +18,65 @@ class RunEvents:
 
     def __init__(self, mainWindow: MainWindow):
         self.mainWindow = mainWindow
+        self.__futureWatcher = FutureWatcher()
+
+        self.__searchTimer = QTimer()
+        self.__searchTimer.setSingleShot(True)
+        self.__searchTimer.setInterval(_SEARCH_DELAY)
+        self.__searchTimer.timeout.connect(self.on_searchText_timeout)
+
+    def __on_task_done(self, future, func: Callable, *args):
+        """
+        Calls ``func(feedback, global_error, *args)`` in the GUI thread once the task of the future is done.
+
+        :param future: The future returned by ``Tasks.set_*``: concurrent.futures.Future
+        :param func: The follow-up function: Callable
+        """
+
+        def on_done(future_):
+            if future_.cancelled() or future_.exception() is not None:
+                func(None, True, *args)
+                return
+
+            feedback = future_.result()
+
+            if isinstance(feedback, dict):
+                # broadcast to all devices
+                failedNames = [name for name, result in feedback.items() if isinstance(result, BaseException)]
+
+                if failedNames:
+                    createMessageBox(
+                        self.mainWindow,
+                        "All Devices",
+                        f"The command failed on: {', '.join(failedNames)}.",
+                        [QMessageBox.Ok],
+                        QMessageBox.Critical
+                    )
+                    func(None, True, *args)
+                    return
+
+                feedback = next(iter(feedback.values()))
+
+            func(feedback, False, *args)
+
+        self.__futureWatcher.watch(future, on_done)
+
+    def on_dropdownDevice_changed(self):
+        """
+        Called when another device is selected in the device-dropdown.
+
+        Shows the status of the selected device, the commands are sent to it from now on.
+        With "All devices", the commands are sent to every device.
+        """
+
+        deviceName = self.mainWindow.device_Dropdown.currentText()
+
+        if deviceName in self.mainWindow.devices.names():
+            self.mainWindow.deviceName = deviceName
+        else:
+            self.mainWindow.deviceName = None
+
+        self.mainWindow.statusUpdater.on_status(self.mainWindow.tasks.status)
 
     def on_btnDisplayONOFF_pressed(self):
         """
@@ -24,7 +86,13 @@ class RunEvents:
         """
 
         displayBtn_ONOFF_text = self.mainWindow.displayBtn_ONOFF.text()
-        feedback, global_error = self.mainWindow.tasks.set_display_state(displayBtn_ONOFF_text)
+        future = self.mainWindow.tasks.set_display_state(displayBtn_ONOFF_text)
+        self.__on_task_done(future, self.on_displayONOFF_done, displayBtn_ONOFF_text)
+
+    def on_displayONOFF_done(self, feedback, global_error: bool, displayBtn_ONOFF_text: str):
+        """
+        Called when the board has turned on/off the display.
+        """
 
         if global_error:
             return
@@ -37,6 +105,22 @@ class RunEvents:
             QMessageBox.Information
         )
 
+    def on_searchText_changed(self, text: str):
+        """
+        Called when the search text of the pre-created texts is edited, the texts are filtered once the user
+        stopped typing.
+        """
+
+        self.__searchTimer.start()
+
+    def on_searchText_timeout(self):
+        """
+        Filters the "Pre-created Texts"-dropdown by the search text.
+        """
+
+        self.mainWindow.textSearchModel.setQuery(self.mainWindow.precreatedTexts_Search.text())
+        updateRunDropdown(self.mainWindow.precreatedTexts_Dropdown)
+
     def on_btnUpdateText_pressed(self):
         """
         Called when the "Update text"-button is pressed.
@@ -56,37 +140,61 @@ class RunEvents:
             )
 
         else:
-            with open(Path.json_Texts, "r") as fdata:
-                data = json.load(fdata)
-                selectedText = data[selectedTextLabel]
+            selectedText = TEXTS.get(selectedTextLabel)
 
             currentText = self.mainWindow.currentText_ScrollLabel.label.text()
-            if selectedText == currentText:
+            if selectedText is None:
                 createMessageBox(
                     self.mainWindow,
                     "Update Text",
-                    "Text already on display, please choose another.",
+                    "The selected text doesn't exist anymore, please choose another.",
                     [QMessageBox.Ok],
                     QMessageBox.Critical
                 )
-            else:
-                updateRunDropdown(self.mainWindow.precreatedTexts_Dropdown)
-
-                selectedText += self.mainWindow.TEXT_GAP        # to create a "gap" at the end of string
-                feedback, global_error = self.mainWindow.tasks.set_text(selectedText)
-
-                if global_error:
-                    return
-
                 updateRunDropdown(self.mainWindow.precreatedTexts_Dropdown)
 
+            elif selectedText == currentText:
                 createMessageBox(
                     self.mainWindow,
                     "Update Text",
-                    f'Successfully updated the current text with the label "{selectedTextLabel}".',
+                    "Text already on display, please choose another.",
                     [QMessageBox.Ok],
-                    QMessageBox.Information
+                    QMessageBox.Critical
                 )
+            else:
+                selectedText += self.mainWindow.TEXT_GAP        # to create a "gap" at the end of string
+                future = self.mainWindow.tasks.set_text(selectedText)
+                self.__on_task_done(future, self.on_updateText_done, selectedTextLabel)
+
+    def on_upload_progress(self, uploaded: int, total: int):
+        """
+        Called while a text is uploaded in chunks, shows the progress below the "Pre-created Texts"-dropdown.
+        """
+
+        progressBar = self.mainWindow.upload_ProgressBar
+        progressBar.setMaximum(total)
+        progressBar.setValue(uploaded)
+        progressBar.setVisible(uploaded < total)
+
+    def on_updateText_done(self, feedback, global_error: bool, selectedTextLabel: str):
+        """
+        Called when the board has updated the text.
+        """
+
+        self.mainWindow.upload_ProgressBar.hide()
+
+        if global_error:
+            return
+
+        updateRunDropdown(self.mainWindow.precreatedTexts_Dropdown)
+
+        createMessageBox(
+            self.mainWindow,
+            "Update Text",
+            f'Successfully updated the current text with the label "{selectedTextLabel}".',
+            [QMessageBox.Ok],
+            QMessageBox.Information
+        )
 
     def on_btnRunninglightONOFF_pressed(self):
         """
@@ -96,7 +204,13 @@ class RunEvents:
         """
 
         runninglightBtn_ONOFF_text = self.mainWindow.runningLightBtn_ONOFF.text()
-        feedback, global_error = self.mainWindow.tasks.set_runninglight_state(runninglightBtn_ONOFF_text)
+        future = self.mainWindow.tasks.set_runninglight_state(runninglightBtn_ONOFF_text)
+        self.__on_task_done(future, self.on_runninglightONOFF_done, runninglightBtn_ONOFF_text)
+
+    def on_runninglightONOFF_done(self, feedback, global_error: bool, runninglightBtn_ONOFF_text: str):
+        """
+        Called when the board has turned on/off the running light.
+        """
 
         if global_error:
             return
@@ -117,7 +231,13 @@ class RunEvents:
         """
 
         runninglight_speed = self.mainWindow.runningLightSpeed_Slider.value()
-        feedback, global_error = self.mainWindow.tasks.set_runninglight_speed(str(runninglight_speed))
+        future = self.mainWindow.tasks.set_runninglight_speed(str(runninglight_speed))
+        self.__on_task_done(future, self.on_runninglightSpeed_done)
+
+    def on_runninglightSpeed_done(self, feedback, global_error: bool):
+        """
+        Called when the board has changed the speed of the running light.
+        """
 
         if global_error:
             return
@@ -153,14 +273,20 @@ class RunEvents:
         if duty_cycle == 0:
             duty_cycle = 1
 
-        feedback, global_error = self.mainWindow.tasks.set_brightness(str(duty_cycle))
-        feedback = feedback.decode("cp1252")
+        future = self.mainWindow.tasks.set_brightness(str(duty_cycle))
+        self.__on_task_done(future, self.on_brightness_done, duty_cycle_percent)
 
-        feedback = round((100 / 16) * int(feedback))
+    def on_brightness_done(self, feedback, global_error: bool, duty_cycle_percent: int):
+        """
+        Called when the board has changed the brightness of the display.
+        """
 
         if global_error:
             return
 
+        feedback = feedback.decode("cp1252")
+        feedback = round((100 / 16) * int(feedback))
+
         createMessageBox(
             self.mainWindow,
             "Dot Matrix Brightness",
@@ -0,0 +1,129 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+if TYPE_CHECKING:
+    from app import MainWindow
+    from utils.serial_interface import BoardStatus
+    from utils.threads import ThreadSignals
+
+from PyQt5.Qt import *
+
+from utils.common import Color
+
+
+class StatusUpdater(QObject):
+    """
+    Applies the status snapshots of the worker thread to the run tab.
+    Inherits from ``Qt.QObject``, so the snapshots are delivered in the GUI thread.
+
+    Every snapshot is compared with the last applied one and only the widgets whose values changed are touched.
+    """
+
+    def __init__(self, mainWindow: MainWindow):
+        super().__init__()
+        self.mainWindow = mainWindow
+        self.__status = None            # the widgets show the "no response" state at startup
+        self.__deviceNames = {}
+
+    def watch(self, deviceName: str, signals: ThreadSignals):
+        """
+        Shows the snapshots of a device's worker thread while the device is selected.
+
+        :param deviceName: The name of the device: str
+        :param signals: The signals of the worker thread: ThreadSignals
+        """
+
+        self.__deviceNames[signals] = deviceName
+        signals.status.connect(self.on_device_status)
+
+    @pyqtSlot(object)
+    def on_device_status(self, status: Optional[BoardStatus]):
+        """
+        Called when the worker thread of a device emits a status snapshot.
+        """
+
+        deviceName = self.__deviceNames.get(self.sender())
+        selectedName = self.mainWindow.deviceName
+
+        if selectedName is None:
+            # all devices selected, show the first one
+            selectedName = self.mainWindow.devices.names()[0]
+
+        if deviceName == selectedName:
+            self.on_status(status)
+
+    @pyqtSlot(object)
+    def on_status(self, status: Optional[BoardStatus]):
+        """
+        Called when the worker thread emits a status snapshot.
+
+        :param status: The snapshot or None if the board doesn't respond: Optional[BoardStatus]
+        """
+
+        last = self.__status
+        if status == last:
+            return
+
+        self.__status = status
+
+        if status is None:
+            self.__set_no_response()
+            return
+
+        if last is None:
+            self.mainWindow.displayBtn_ONOFF.setEnabled(True)
+            self.mainWindow.displayBtn_UpdateText.setEnabled(True)
+            self.mainWindow.runningLightBtn_ONOFF.setEnabled(True)
+            self.mainWindow.runningLightSpeed_Slider.setEnabled(True)
+            self.mainWindow.brightness_Slider.setEnabled(True)
+
+        if last is None or status.display_state != last.display_state:
+            self.__set_onoff_button(self.mainWindow.displayBtn_ONOFF, status.display_state)
+
+        if last is None or status.text != last.text:
+            self.mainWindow.currentText_ScrollLabel.setText(status.text)
+
+        if last is None or status.runninglight_state != last.runninglight_state:
+            self.__set_onoff_button(self.mainWindow.runningLightBtn_ONOFF, status.runninglight_state)
+
+        if last is None or status.runninglight_speed != last.runninglight_speed:
+            self.mainWindow.runningLightCurrentSpeed_Label.setText(f"Current Speed: {status.runninglight_speed}%")
+            self.mainWindow.runningLightSpeed_Slider.setValue(status.runninglight_speed)
+
+        if last is None or status.dutycycle != last.dutycycle:
+            duty_cycle_percent = round((100 / 16) * status.dutycycle)
+
+            self.mainWindow.currentBrightness_Label.setText(f"Current Brightness: {duty_cycle_percent}%")
+            self.mainWindow.brightness_Slider.setValue(duty_cycle_percent)
+
+    def __set_onoff_button(self, button: QPushButton, state: str):
+        """
+        Sets an ON/OFF-button to the action which inverts the current state.
+
+        :param button: The button: QPushButton
+        :param state: The current state of the board ("ON" or "OFF"): str
+        """
+
+        if state == "ON":
+            button.setStyleSheet("color: #{}".format(Color.red))
+            button.setText("OFF")
+        else:
+            button.setStyleSheet("color: #{}".format(Color.green))
+            button.setText("ON")
+
+    def __set_no_response(self):
+        """
+        Disables the controls while the board doesn't respond.
+        """
+
+        self.mainWindow.displayBtn_ONOFF.setDisabled(True)
+        self.mainWindow.displayBtn_ONOFF.setStyleSheet("color: #{}".format(Color.black))
+        self.mainWindow.displayBtn_ONOFF.setText("...")
+        self.mainWindow.displayBtn_UpdateText.setDisabled(True)
+        self.mainWindow.currentText_ScrollLabel.setText("Loading...")
+        self.mainWindow.runningLightBtn_ONOFF.setDisabled(True)
+        self.mainWindow.runningLightBtn_ONOFF.setStyleSheet("color: #{}".format(Color.black))
+        self.mainWindow.runningLightBtn_ONOFF.setText("...")
+        self.mainWindow.runningLightCurrentSpeed_Label.setText(f"Current Speed: ...")
+        self.mainWindow.runningLightSpeed_Slider.setDisabled(True)
+        self.mainWindow.currentBrightness_Label.setText(f"Current Brightness: ...")
+        self.mainWindow.brightness_Slider.setDisabled(True)
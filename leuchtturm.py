@@ -0,0 +1,212 @@
+"""
+Headless entry point, drives the dot-matrix display without the GUI (and without PyQt5).
+
+Usage::
+
+    python -m leuchtturm status [--json]
+    python -m leuchtturm display on|off
+    python -m leuchtturm set-text "Hello World"
+    python -m leuchtturm running-light on|off
+    python -m leuchtturm speed 50
+    python -m leuchtturm brightness 60
+    python -m leuchtturm daemon [--api]
+
+``--port`` selects the board (default COM6). The daemon runs the boards of ``--devices``
+(default ./common/json/devices.json) until it is interrupted and prints every status change as json line,
+with ``--api`` it also serves the HTTP/JSON control API (see ``utils.api``).
+``--trace <file>`` records the serial traffic for a later replay (see ``utils.trace``).
+``--legacy`` skips the probes of the newer commands, which cost a timeout each on an old firmware.
+"""
+
+import sys
+import json
+import time
+import signal
+import argparse
+
+import serial
+
+from utils.common import Path, Text, checkValidStr, percentToDutyCycle, dutyCycleToPercent
+from utils.serial_interface import Tasks, _Comms, _TaskCommands, _STD_PORT, _STD_BAUDRATE, _STD_TIMEOUT, _UPLOAD_WINDOW
+from utils.devices import DeviceRegistry
+from utils.api import ControlServer, STD_API_HOST, STD_API_PORT
+from utils.metrics import METRICS
+from utils.trace import TRACE
+
+
+class _DirectCommands(_TaskCommands):
+    """
+    Represents the commands which are executed immediately on the calling thread (no task loop).
+    """
+
+    def __init__(self, comms: _Comms):
+        self.__comms = comms
+
+    def _set_task(self, cmd: str, arg: str = None):
+        return self.__comms.exec_task_ser(cmd, arg)
+
+
+def _percent(value: str):
+    """
+    Parses a percentage between 1 and 100 (e.g. the brightness) for ``argparse``.
+    """
+
+    if not value.isdigit() or int(value) not in range(1, 100 + 1):
+        raise argparse.ArgumentTypeError(f"{value!r} is not a number between 1 and 100")
+
+    return int(value)
+
+
+def _print_status(status, asJson: bool):
+    if asJson:
+        print(json.dumps(status.to_dict()))
+        return
+
+    print(f"Display:        {status.display_state}")
+    print(f"Text:           {status.text.rstrip()}")
+    print(f"Running Light:  {status.runninglight_state}")
+    print(f"Speed:          {status.runninglight_speed}%")
+    print(f"Brightness:     {dutyCycleToPercent(status.dutycycle)}%")
+    print(f"Board:          {status.board_state}")
+
+
+def _run_command(args):
+    comms = _Comms(args.baudrate, args.port or _STD_PORT, args.timeout, uploadWindow=args.upload_window,
+                   binary=args.binary, pipelined=args.pipelined, legacy=args.legacy)
+    commands = _DirectCommands(comms)
+
+    try:
+        if args.command == "status":
+            _print_status(comms.get_status(), args.json)
+
+        elif args.command == "display":
+            commands.set_display_state(args.state.upper())
+
+        elif args.command == "running-light":
+            commands.set_runninglight_state(args.state.upper())
+
+        elif args.command == "speed":
+            commands.set_runninglight_speed(str(args.percent))
+
+        elif args.command == "brightness":
+            feedback = commands.set_brightness(str(percentToDutyCycle(args.percent)))
+            print(f"Brightness: {dutyCycleToPercent(feedback.decode('cp1252'))}%")
+
+        elif args.command == "set-text":
+            valid, invalidChars = checkValidStr(args.text)
+
+            if not valid:
+                raise ValueError(f"Text has invalid symbols ({', '.join(invalidChars)}).")
+
+            if len(args.text) > Text.maxLength:
+                raise ValueError(f"Text is longer than {Text.maxLength} characters.")
+
+            commands.set_text(args.text + Text.gap)
+
+    finally:
+        comms.close()
+
+
+def _run_daemon(args):
+    if args.port is not None:
+        registry = DeviceRegistry()
+        registry.add(args.port, Tasks(args.port, args.baudrate, args.timeout, uploadWindow=args.upload_window,
+                                      binary=args.binary, pipelined=args.pipelined, legacy=args.legacy))
+    else:
+        registry = DeviceRegistry.load(args.devices, baudrate=args.baudrate, timeout=args.timeout,
+                                       uploadWindow=args.upload_window, binary=args.binary,
+                                       pipelined=args.pipelined, legacy=args.legacy)
+
+    def on_status(name: str, status):
+        print(json.dumps({"device": name, "time": time.time(), "status": status.to_dict() if status is not None else None}), flush=True)
+
+    stop = []
+    signal.signal(signal.SIGINT, lambda *_: stop.append(True))
+    signal.signal(signal.SIGTERM, lambda *_: stop.append(True))
+
+    threads = registry.start(on_status)
+
+    controlServer = None
+    if args.api:
+        METRICS.enabled = True      # served as GET /metrics
+        controlServer = ControlServer(registry, args.api_host, args.api_port)
+        controlServer.start()
+        print(f"Control API on http://{args.api_host}:{args.api_port}", file=sys.stderr)
+
+    while not stop and any(thread.is_alive() for thread in threads):
+        time.sleep(0.2)
+
+    if controlServer is not None:
+        controlServer.stop()
+
+    registry.stop()
+    for thread in threads:
+        thread.join(2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="leuchtturm", description="Drives the dot-matrix display without the GUI.")
+    parser.add_argument("--port", default=None, help=f"the port of the board (default {_STD_PORT})")
+    parser.add_argument("--baudrate", type=int, default=_STD_BAUDRATE)
+    parser.add_argument("--timeout", type=float, default=_STD_TIMEOUT, help="the reply timeout in seconds")
+    parser.add_argument("--trace", default=None, help="record the serial traffic to this file (see utils.trace)")
+    parser.add_argument("--upload-window", type=int, default=_UPLOAD_WINDOW,
+                        help="the chunks of a text upload which may be unacknowledged at once")
+    parser.add_argument("--binary", action="store_true",
+                        help="use the binary protocol if the firmware supports it (falls back to the text protocol)")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="write the queries without waiting for the previous reply (needs the binary protocol)")
+    parser.add_argument("--legacy", action="store_true",
+                        help="the board has an old firmware, only use the single queries and commands "
+                             "(no probes of get_all, chunked or patched texts, the binary protocol and subscriptions)")
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    statusParser = subparsers.add_parser("status", help="print the state of the board")
+    statusParser.add_argument("--json", action="store_true", help="print the state as json")
+
+    displayParser = subparsers.add_parser("display", help="turn on/off the display")
+    displayParser.add_argument("state", choices=["on", "off"])
+
+    textParser = subparsers.add_parser("set-text", help="update the text of the display")
+    textParser.add_argument("text")
+
+    runninglightParser = subparsers.add_parser("running-light", help="turn on/off the running light")
+    runninglightParser.add_argument("state", choices=["on", "off"])
+
+    speedParser = subparsers.add_parser("speed", help="change the speed of the running light")
+    speedParser.add_argument("percent", type=_percent)
+
+    brightnessParser = subparsers.add_parser("brightness", help="change the brightness of the display")
+    brightnessParser.add_argument("percent", type=_percent)
+
+    daemonParser = subparsers.add_parser("daemon", help="run the boards and print every status change")
+    daemonParser.add_argument("--devices", default=Path.json_Devices,
+                              help="the json file which maps the device names to their ports (ignored with --port)")
+    daemonParser.add_argument("--api", action="store_true", help="serve the HTTP/JSON control API")
+    daemonParser.add_argument("--api-host", default=STD_API_HOST)
+    daemonParser.add_argument("--api-port", type=int, default=STD_API_PORT)
+
+    args = parser.parse_args(argv)
+
+    if args.trace is not None:
+        TRACE.start(args.trace)
+
+    try:
+        if args.command == "daemon":
+            _run_daemon(args)
+        else:
+            _run_command(args)
+
+    except (serial.SerialException, OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    finally:
+        TRACE.stop()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import time
+import threading
+import itertools
+
+import pytest
+
+from utils.simulator import FakeBoard
+from utils.serial_interface import Signal
+
+_names = itertools.count()
+
+
+def _wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture(scope="session")
+def fake_board():
+    """
+    Creates simulated boards with unique names, reachable as ``board.url``.
+    The keywords are passed to ``FakeBoard``.
+    """
+
+    def create(**kwargs):
+        return FakeBoard(f"test-board-{next(_names)}", **kwargs)
+
+    return create
+
+
+@pytest.fixture(scope="session")
+def wait_for():
+    """
+    Waits until the condition is true, returns False after the timeout.
+    """
+
+    return _wait_for
+
+
+@pytest.fixture
+def run_tasks():
+    """
+    Runs ``Tasks.loop`` in its own thread and stops it after the test.
+    Returns the thread and the list of the emitted statuses.
+    """
+
+    started = []
+
+    def run(tasks):
+        statuses = []
+        status_callback = Signal()
+        status_callback.connect(statuses.append)
+
+        thread = threading.Thread(
+            target=tasks.loop, kwargs={"progress_callback": Signal(), "status_callback": status_callback}, daemon=True
+        )
+        thread.start()
+        started.append((tasks, thread))
+
+        return thread, statuses
+
+    yield run
+
+    for tasks, thread in started:
+        tasks.running = False
+        thread.join()
@@ -0,0 +1,57 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from utils.api import ControlServer
+from utils.devices import DeviceRegistry
+from utils.serial_interface import Tasks
+
+
+@pytest.fixture(scope="module")
+def api(fake_board):
+    board = fake_board()
+    devices = DeviceRegistry()
+    devices.add("board", Tasks(board.url, timeout=0.2))
+    threads = devices.start()
+
+    server = ControlServer(devices, port=0)
+    server.start()
+
+    def post(path, body):
+        host, port = server.address[:2]
+        request = urllib.request.Request(f"http://{host}:{port}{path}", data=json.dumps(body).encode("utf-8"))
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    yield board, post
+
+    server.stop()
+    devices.stop()
+    for thread in threads:
+        thread.join()
+
+
+@pytest.mark.parametrize("path,key", [("/brightness", "brightness"), ("/speed", "speed")])
+@pytest.mark.parametrize("value", [0, 101, 500, -5, 50.5, True, None, [50], "fast"])
+def test_invalid_percent_is_refused(api, path, key, value):
+    board, post = api
+    state = dict(board.state)
+
+    status, body = post(path, {key: value})
+
+    assert status == 400 and "error" in body
+    assert board.state == state
+
+
+def test_brightness(api):
+    board, post = api
+
+    assert post("/brightness", {"brightness": 60}) == (200, {"feedback": 62})
+    assert board.state["dutycycle"] == "10"
+    assert post("/speed", {"speed": "100"})[0] == 200
+    assert board.state["runninglight_speed"] == "100"
@@ -0,0 +1,79 @@
+import sys
+import asyncio
+
+import pytest
+import serial
+
+from utils.simulator import PtyBoard
+from utils.serial_async import AsyncTasks
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs a pseudo terminal")
+@pytest.mark.parametrize("batch", [True, False])
+def test_poll_and_execute(fake_board, batch):
+    board = fake_board(batch=batch, subscribe=False)
+    pty = PtyBoard(board)
+    pty.start()
+
+    async def session():
+        statuses = []
+        tasks = AsyncTasks(pty.port, timeout=0.5, on_status=statuses.append)
+        run = asyncio.create_task(tasks.run())
+
+        try:
+            while tasks.status is None:
+                await asyncio.sleep(0.01)
+
+            assert await tasks.execute("display_off\n") == b"OK"
+
+            # the command resets the polls, so the change shows up at once
+            while tasks.status.display_state != "OFF":
+                await asyncio.sleep(0.01)
+
+            board.set("dutycycle", "12")
+            while tasks.status.dutycycle != 12:
+                await asyncio.sleep(0.01)
+        finally:
+            tasks.stop()
+            await run
+
+        return statuses
+
+    try:
+        statuses = asyncio.run(asyncio.wait_for(session(), 5))
+    finally:
+        pty.stop()
+
+    assert statuses[0].display_state == "ON"
+    assert statuses[-1].dutycycle == 12
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs a pseudo terminal")
+def test_failed_command_doesnt_stop_the_engine(fake_board):
+    board = fake_board(subscribe=False)
+    pty = PtyBoard(board)
+    pty.start()
+
+    async def session():
+        tasks = AsyncTasks(pty.port, timeout=0.3)
+        run = asyncio.create_task(tasks.run())
+
+        try:
+            while tasks.status is None:
+                await asyncio.sleep(0.01)
+
+            board.dropRate = 1.0
+            with pytest.raises(serial.SerialTimeoutException):
+                await tasks.execute("display_off\n")
+
+            board.dropRate = 0.0
+            assert await tasks.execute("display_off\n") == b"OK"
+            assert tasks.running and not tasks.global_error
+        finally:
+            tasks.stop()
+            await run
+
+    try:
+        asyncio.run(asyncio.wait_for(session(), 5))
+    finally:
+        pty.stop()
@@ -0,0 +1,133 @@
+import sys
+
+import pytest
+
+from utils.simulator import PtyBoard
+from utils.serial_interface import _Comms, BinaryFrame, _crc16, _encode_binary, _line_to_binary, _binary_to_line, \
+    _pop_binary_frame, _OP_ARGUMENT, _OP_REPLY, _OPCODES
+
+
+def test_crc16():
+    # CRC-16/CCITT-FALSE check value
+    assert _crc16(b"123456789") == 0x29B1
+
+
+@pytest.mark.parametrize("payload", [b"", b"OK", bytes(range(256)), b"\xa5" * 10])
+def test_frame_round_trip(payload):
+    buffer = bytearray(_encode_binary(200, _OP_REPLY, payload))
+
+    assert _pop_binary_frame(buffer) == BinaryFrame(200, _OP_REPLY, payload)
+    assert not buffer
+
+
+def test_split_frame_waits_for_the_rest():
+    encoded = _encode_binary(1, _OP_REPLY, b"ON")
+    buffer = bytearray(encoded[:4])
+
+    assert _pop_binary_frame(buffer) is None
+
+    buffer += encoded[4:]
+    assert _pop_binary_frame(buffer) == BinaryFrame(1, _OP_REPLY, b"ON")
+
+
+def test_corrupt_frame_is_skipped():
+    corrupt = bytearray(_encode_binary(1, _OP_REPLY, b"ON"))
+    corrupt[-3] ^= 0xFF
+    buffer = bytearray(b"\x00garbage" + corrupt + _encode_binary(2, _OP_REPLY, b"OFF"))
+
+    assert _pop_binary_frame(buffer) == BinaryFrame(2, _OP_REPLY, b"OFF")
+    assert not buffer
+
+
+def test_false_start_of_frame_is_skipped_after_timeout():
+    # a start byte in garbage announces a frame which never completes
+    buffer = bytearray(b"\xa5\x01\x80\xff\x00" + _encode_binary(3, _OP_REPLY, b"OK"))
+
+    assert _pop_binary_frame(buffer) is None
+    assert _pop_binary_frame(buffer, complete=True) == BinaryFrame(3, _OP_REPLY, b"OK")
+
+
+def test_argument_line_is_never_a_command():
+    frame = _pop_binary_frame(bytearray(_line_to_binary(1, b"display_off now", argument=True)))
+
+    assert frame.opcode == _OP_ARGUMENT
+    assert _binary_to_line(frame) == b"display_off now"
+
+
+def test_command_line_uses_its_opcode():
+    frame = _pop_binary_frame(bytearray(_line_to_binary(1, b"begin_text 509")))
+
+    assert frame.opcode == _OPCODES["begin_text"]
+    assert frame.payload == b"509"
+    assert _binary_to_line(frame) == b"begin_text 509"
+
+
+def test_unknown_command_is_refused():
+    with pytest.raises(ValueError):
+        _line_to_binary(1, b"hello world")
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_text_starting_with_a_command(fake_board, pipelined):
+    board = fake_board()
+    comms = _Comms(port=board.url, timeout=0.5, binary=True, pipelined=pipelined)
+
+    try:
+        comms.get_status()
+        assert comms.binary
+
+        # short enough for the legacy two-line command
+        comms.exec_task_ser("update_text\n", "display_off")
+        assert board.state["text"] == "display_off"
+        assert board.state["display_state"] == "ON"
+    finally:
+        comms.close()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs a pseudo terminal")
+def test_text_host_after_a_binary_session(fake_board):
+    # behind a pty the board isn't reset when the host closes the port, like a real board
+    pty = PtyBoard(fake_board())
+    pty.start()
+
+    try:
+        comms = _Comms(port=pty.port, timeout=0.5, binary=True)
+        comms.get_status()
+        assert comms.binary
+        comms.close()
+
+        comms = _Comms(port=pty.port, timeout=0.5)
+        try:
+            assert comms.get_status().display_state == "ON"
+            assert not comms.binary
+        finally:
+            comms.close()
+    finally:
+        pty.stop()
+
+
+@pytest.mark.parametrize("persistent", [True, False])
+def test_text_host_doesnt_negotiate(fake_board, persistent):
+    board = fake_board()
+    comms = _Comms(port=board.url, timeout=0.5, persistent=persistent)
+
+    try:
+        comms.get_status()
+        comms.get_status()
+        assert board.commands == 2          # only 'get_all'
+    finally:
+        comms.close()
+
+
+def test_refused_negotiation_isnt_repeated(fake_board):
+    board = fake_board(binary=False)
+    comms = _Comms(port=board.url, timeout=0.5, binary=True)
+
+    try:
+        comms.get_status()
+        comms.close()
+        comms.get_status()
+        assert not comms.binary
+        assert board.commands == 3          # 'binary 1' once and 'get_all' twice
+    finally:
+        comms.close()
@@ -0,0 +1,40 @@
+import pytest
+
+import leuchtturm
+
+
+@pytest.mark.parametrize("command", ["brightness", "speed"])
+@pytest.mark.parametrize("percent", ["0", "101", "500", "-5", "50.5", "fast"])
+def test_invalid_percent_is_refused(capsys, fake_board, command, percent):
+    board = fake_board()
+    state = dict(board.state)
+
+    with pytest.raises(SystemExit) as e:
+        leuchtturm.main(["--port", board.url, command, "--", percent])
+
+    assert e.value.code == 2
+    assert "between 1 and 100" in capsys.readouterr().err
+    assert board.state == state
+
+
+def test_brightness(fake_board):
+    board = fake_board()
+
+    assert leuchtturm.main(["--port", board.url, "brightness", "60"]) == 0
+    assert board.state["dutycycle"] == "10"
+    assert leuchtturm.main(["--port", board.url, "speed", "100"]) == 0
+    assert board.state["runninglight_speed"] == "100"
+
+
+@pytest.mark.parametrize("legacy", [False, True])
+def test_legacy_firmware(capsys, fake_board, legacy):
+    board = fake_board(batch=False, subscribe=False, chunked=False, patch=False, binary=False, silent=True)
+    options = ["--port", board.url, "--timeout", "0.2", "--binary"] + (["--legacy"] if legacy else [])
+
+    assert leuchtturm.main([*options, "status", "--json"]) == 0
+    assert '"dutycycle": 8' in capsys.readouterr().out
+    assert leuchtturm.main([*options, "set-text", "Leuchtturm " * 5]) == 0
+    assert board.state["text"].startswith("Leuchtturm Leuchtturm")
+
+    # without --legacy every run pays the timeouts of the unanswered probes
+    assert (board.ignored == 0) == legacy
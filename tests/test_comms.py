@@ -0,0 +1,100 @@
+import pytest
+import serial
+
+from utils.metrics import METRICS
+from utils.serial_interface import _Comms, _text_delta
+
+
+def _counter(name: str, port: str):
+    return sum(value for name_, labels, value in METRICS.snapshot() if name_ == name and labels == {"port": port})
+
+
+def _apply(old: str, delta):
+    start, end, replacement = delta
+    return old[:start] + replacement + old[end:]
+
+
+@pytest.mark.parametrize("old, new, delta", [
+    ("Leuchtturm", "Leuchtturm", (10, 10, "")),              # identical
+    ("Leuchtturm", "Leuchtfeuer", (6, 10, "feuer")),         # the end changed
+    ("Leuchtturm", "Wachtturm", (0, 3, "Wa")),               # the start changed
+    ("Hallo Welt", "Hallo schöne Welt", (6, 6, "schöne ")),  # inserted
+    ("Hallo schöne Welt", "Hallo Welt", (6, 13, "")),        # removed
+    ("abc", "xyz", (0, 3, "xyz")),                           # completely different
+    ("", "Leuchtturm", (0, 0, "Leuchtturm")),
+    ("Leuchtturm", "", (0, 10, "")),
+    ("", "", (0, 0, "")),
+])
+def test_text_delta(old, new, delta):
+    assert _text_delta(old, new) == delta
+    assert _apply(old, delta) == new
+
+
+@pytest.mark.parametrize("old, new", [
+    ("aaaa", "aaaaaa"),                                      # the prefix and the suffix overlap
+    ("abab", "ab"),
+    ("Leuchtturm ", "Leuchtturm  "),
+])
+def test_text_delta_of_repeated_characters(old, new):
+    start, end, replacement = _text_delta(old, new)
+
+    # only the inserted or the removed characters are sent
+    assert start <= end <= len(old)
+    assert min(end - start, len(replacement)) == 0
+    assert _apply(old, (start, end, replacement)) == new
+
+
+def test_garbled_replies_are_queried_again(fake_board):
+    # the frames of the binary protocol are protected by their CRC, the text replies aren't
+    board = fake_board(garbageRate=0.3, seed=3)
+    comms = _Comms(port=board.url, timeout=0.5)
+
+    try:
+        for _ in range(20):
+            status = comms.get_status()
+            assert (status.display_state, status.dutycycle) == ("ON", 8)
+            assert comms.get_field("runninglight_speed") == 50
+
+        assert board.garbage > 0
+        assert comms.batch_supported
+    finally:
+        comms.close()
+
+
+def test_garbled_field_times_out(fake_board):
+    board = fake_board(garbageRate=1.0)
+    comms = _Comms(port=board.url, timeout=0.5)
+
+    try:
+        with pytest.raises(serial.SerialTimeoutException):
+            comms.get_status()
+
+        # the status frame was garbled, not refused
+        assert comms.batch_supported
+    finally:
+        comms.close()
+
+
+def test_unplugged_port_is_opened_once_per_query(monkeypatch, fake_board):
+    monkeypatch.setattr(METRICS, "enabled", True)
+
+    board = fake_board()
+    comms = _Comms(port=board.url, timeout=0.5)
+
+    try:
+        assert comms.get_field("dutycycle") == 8
+
+        board.unplug()
+        with pytest.raises(serial.SerialException):
+            comms.get_field("dutycycle")
+
+        # the broken connection is reopened once, the next query opens the port once again
+        assert _counter("serial_open_errors_total", board.url) == 1
+        with pytest.raises(serial.SerialException):
+            comms.get_field("dutycycle")
+        assert _counter("serial_open_errors_total", board.url) == 2
+
+        board.plug()
+        assert comms.get_field("dutycycle") == 8
+    finally:
+        comms.close()
@@ -0,0 +1,99 @@
+import json
+import time
+
+import pytest
+import serial
+
+from utils.devices import DeviceRegistry, STD_DEVICE_NAME
+from utils.serial_interface import _STD_PORT
+
+
+@pytest.fixture
+def registry(tmp_path, fake_board, wait_for):
+    """
+    Loads a registry of three simulated boards and runs it.
+    Returns the registry, the boards by name and the statuses which were reported by name.
+    """
+
+    boards = {name: fake_board(latency=0.3) for name in ("Entrance", "Hall", "Stage")}
+    path = tmp_path / "devices.json"
+    path.write_text(json.dumps({name: board.url for name, board in boards.items()}))
+
+    registry = DeviceRegistry.load(str(path), timeout=1.0)
+    statuses = {name: [] for name in boards}
+    threads = registry.start(lambda name, status: statuses[name].append(status))
+
+    assert wait_for(lambda: all(status is not None for status in registry.statuses().values()))
+
+    yield registry, boards, statuses
+
+    registry.stop()
+    for thread in threads:
+        thread.join()
+
+
+def test_load_the_registry(tmp_path):
+    path = tmp_path / "devices.json"
+    path.write_text(json.dumps({"Entrance": "COM6", "Hall": "COM7"}))
+
+    registry = DeviceRegistry.load(str(path))
+    assert registry.names() == ["Entrance", "Hall"]
+    assert registry["Hall"].port == "COM7"
+
+
+def test_load_without_a_file(tmp_path):
+    registry = DeviceRegistry.load(str(tmp_path / "missing.json"))
+    assert registry.names() == [STD_DEVICE_NAME]
+    assert registry[STD_DEVICE_NAME].port == _STD_PORT
+
+
+def test_load_an_empty_file(tmp_path):
+    path = tmp_path / "devices.json"
+    path.write_text("{}")
+
+    with pytest.raises(ValueError):
+        DeviceRegistry.load(str(path))
+
+
+def test_commands_are_routed_to_their_board(registry, wait_for):
+    registry, boards, statuses = registry
+
+    assert registry["Hall"].set_display_state("OFF").result(5) == b"OK"
+
+    assert boards["Hall"].state["display_state"] == "OFF"
+    assert boards["Entrance"].state["display_state"] == "ON"
+    assert boards["Stage"].state["display_state"] == "ON"
+
+    assert wait_for(lambda: statuses["Hall"][-1].display_state == "OFF")
+    assert registry.statuses()["Entrance"].display_state == "ON"
+
+
+def test_broadcast_reaches_all_boards_in_parallel(registry):
+    registry, boards, statuses = registry
+
+    start = time.perf_counter()
+    results = registry.broadcast.set_display_state("OFF").result(5)
+    duration = time.perf_counter() - start
+
+    assert results == {name: b"OK" for name in boards}
+    assert all(board.state["display_state"] == "OFF" for board in boards.values())
+
+    # one round trip of 0.3 s, one after the other would take 0.9 s
+    assert duration < 0.6
+
+
+def test_a_failing_board_doesnt_stop_the_others(registry, wait_for):
+    registry, boards, statuses = registry
+
+    # the hall doesn't answer any more
+    boards["Hall"].dropRate = 1.0
+
+    results = registry.broadcast.set_display_state("OFF").result(5)
+    assert isinstance(results["Hall"], serial.SerialTimeoutException)
+    assert results["Entrance"] == results["Stage"] == b"OK"
+    assert boards["Entrance"].state["display_state"] == boards["Stage"].state["display_state"] == "OFF"
+
+    # the other boards are still driven
+    assert registry["Stage"].set_display_state("ON").result(5) == b"OK"
+    assert wait_for(lambda: statuses["Stage"][-1].display_state == "ON")
+    assert statuses["Entrance"][-1].display_state == "OFF"
@@ -0,0 +1,71 @@
+import pytest
+
+from utils.serial_interface import _pop_frame
+
+
+def _pop_all(buffer: bytearray):
+    frames = []
+    frame = _pop_frame(buffer)
+    while frame is not None:
+        frames.append(frame)
+        frame = _pop_frame(buffer)
+    return frames
+
+
+@pytest.mark.parametrize("terminator", [b"\x00", b"\n"])
+def test_one_frame(terminator):
+    buffer = bytearray(b"OK" + terminator)
+
+    assert _pop_frame(buffer) == b"OK"
+    assert buffer == b""
+    assert _pop_frame(buffer) is None
+
+
+def test_frame_split_across_reads():
+    buffer = bytearray()
+    frames = []
+
+    for chunk in [b"O", b"N          ", b"\x00", b"5", b"0          \x00\x00"]:
+        buffer += chunk
+        frames += _pop_all(buffer)
+
+    assert frames == [b"ON          ", b"50          "]
+    assert buffer == b""
+
+
+def test_incomplete_frame_stays_buffered():
+    buffer = bytearray(b"OK\x00REA")
+
+    assert _pop_all(buffer) == [b"OK"]
+    assert buffer == b"REA"
+
+    buffer += b"DY\x00"
+    assert _pop_all(buffer) == [b"READY"]
+
+
+def test_several_frames_in_one_read():
+    buffer = bytearray(b"ON\x00OFF\x0050\x00")
+
+    assert _pop_all(buffer) == [b"ON", b"OFF", b"50"]
+    assert buffer == b""
+
+
+def test_mixed_terminators():
+    # the firmware terminates its frames with NUL, a newline is accepted as well
+    buffer = bytearray(b"OK\x00\x1edutycycle|12\nON\x00")
+
+    assert _pop_all(buffer) == [b"OK", b"\x1edutycycle|12", b"ON"]
+
+
+def test_empty_frames_are_skipped():
+    buffer = bytearray(b"\x00\x00\n\x00OK\x00\x00\n")
+
+    assert _pop_all(buffer) == [b"OK"]
+    assert buffer == b""
+
+
+def test_only_terminators():
+    buffer = bytearray(b"\x00\n\x00")
+
+    assert _pop_frame(buffer) is None
+    assert buffer == b""
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+import serial
+
+from utils.serial_interface import _Serial, _STD_BAUDRATE
+
+
+@pytest.fixture
+def connect(fake_board):
+    """
+    Opens a pipelined ``_Serial`` to a simulated board, the keywords are passed to ``FakeBoard``.
+    Returns the board and the port.
+    """
+
+    ports = []
+
+    def connect_(timeout: float = 0.5, **kwargs):
+        board = fake_board(**kwargs)
+        ser = _Serial(_STD_BAUDRATE, board.url, timeout, binary=True, pipelined=True)
+        ser.open()
+        ports.append(ser)
+
+        assert ser.pipelining
+        return board, ser
+
+    yield connect_
+
+    for ser in ports:
+        ser.stopReader()
+        ser.close()
+
+
+def test_replies_out_of_order(connect):
+    board, ser = connect(latency=0.05, reorderRate=1.0)
+    board.set("dutycycle", "12")
+    board.set("runninglight_speed", "70")
+
+    queries = {"get_dutycycle\n": b"12", "get_display_state\n": b"ON", "get_runninglight_state\n": b"OFF",
+               "get_runninglight_speed\n": b"70"}
+    requests = {query: ser.request(query) for query in queries}
+
+    assert {query: request.result() for query, request in requests.items()} == queries
+    # every second reply overtook the one before
+    assert board.reordered == 2
+
+
+def test_late_reply_is_dropped(connect):
+    board, ser = connect(timeout=0.3, reorderRate=1.0)
+
+    # the reply is held back until the board answers the next frame
+    with pytest.raises(serial.SerialTimeoutException):
+        ser.request("get_dutycycle\n").result()
+
+    board.reorderRate = 0.0
+    assert ser.request("get_display_state\n").result() == b"ON"
+
+    # the duty cycle arrived after the reply above, it doesn't resolve the next request
+    assert ser.request("get_runninglight_state\n").result() == b"OFF"
+
+
+def test_one_request_times_out_while_the_others_resolve(connect):
+    board, ser = connect(timeout=0.3, latency=0.05, seed=4)
+    board.dropRate = 0.3
+
+    requests = [ser.request("get_display_state\n") for _ in range(10)]
+
+    start = time.perf_counter()
+    results = []
+    for request in requests:
+        try:
+            results.append(request.result())
+        except serial.SerialTimeoutException:
+            results.append(None)
+
+    assert 0 < board.dropped < len(requests)
+    assert results.count(None) == board.dropped
+    assert set(results) == {b"ON", None}
+
+    # the lost replies didn't hold up the others longer than their own timeout
+    assert time.perf_counter() - start < 0.6
+
+
+def test_reconnect_with_requests_in_flight(connect):
+    board, ser = connect(timeout=0.3)
+    board.latency = 0.5
+
+    requests = [ser.request(query) for query in ["get_dutycycle\n", "get_display_state\n", "get_board_state\n"]]
+    time.sleep(0.05)
+    board.latency = 0.0
+    ser.reconnect()
+
+    # the requests fail instead of waiting for their replies
+    for request in requests:
+        assert request.done()
+        with pytest.raises(serial.SerialException):
+            request.result()
+
+    # the replies to the old connection don't resolve the new requests
+    assert ser.pipelining
+    assert ser.request("get_runninglight_state\n").result() == b"OFF"
+    assert ser.request("get_runninglight_speed\n").result() == b"50"
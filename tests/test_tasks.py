@@ -0,0 +1,175 @@
+import time
+
+import pytest
+import serial
+
+import utils.serial_interface
+from utils.serial_interface import Tasks
+
+
+def test_reconnect_after_a_long_unplug(monkeypatch, fake_board, wait_for, run_tasks):
+    monkeypatch.setattr(utils.serial_interface, "_RECONNECT_BACKOFF", (0.01, 0.05))
+
+    board = fake_board()
+    tasks = Tasks(board.url, timeout=0.2, subscribe=False)
+    thread, statuses = run_tasks(tasks)
+
+    assert wait_for(lambda: tasks.status is not None)
+
+    board.unplug()
+    assert wait_for(lambda: statuses[-1] is None)
+
+    # several attempts to reopen the port fail
+    time.sleep(0.5)
+    assert thread.is_alive()
+
+    board.plug()
+    assert wait_for(lambda: statuses[-1] is not None)
+    assert not tasks.global_error
+
+
+def test_poll_again_when_the_subscription_is_lost(monkeypatch, fake_board, wait_for, run_tasks):
+    # a fast heartbeat, so the unplug is noticed quickly
+    intervals = {**utils.serial_interface._SUBSCRIBED_POLL_INTERVALS, "board_state": (0.2, 0.2)}
+    monkeypatch.setattr(utils.serial_interface, "_SUBSCRIBED_POLL_INTERVALS", intervals)
+    monkeypatch.setattr(utils.serial_interface, "_RECONNECT_BACKOFF", (0.01, 0.05))
+
+    board = fake_board()
+    tasks = Tasks(board.url, timeout=0.2)
+    thread, statuses = run_tasks(tasks)
+
+    assert wait_for(lambda: tasks.status is not None and board.subscribed)
+
+    # the board comes back with a firmware which doesn't push its changes
+    board.subscribe = False
+    board.unplug()
+    assert wait_for(lambda: statuses[-1] is None)
+    board.plug()
+    assert wait_for(lambda: statuses[-1] is not None)
+
+    board.set("dutycycle", "50")
+    assert wait_for(lambda: tasks.status.dutycycle == 50, timeout=2.0)
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_pushed_change_during_a_poll(fake_board, wait_for, run_tasks, binary):
+    board = fake_board(latency=0.3)
+    tasks = Tasks(board.url, timeout=1.0, binary=binary)
+    thread, statuses = run_tasks(tasks)
+
+    assert wait_for(lambda: tasks.status is not None and board.subscribed)
+
+    # the command is followed by a 'get_all' of all fields, its reply still carries the old duty cycle
+    tasks.set_display_state("OFF").result(5)
+    time.sleep(0.1)
+    board.set("dutycycle", "12")
+    assert wait_for(lambda: tasks.status.dutycycle == 12)
+
+    assert wait_for(lambda: tasks.status.display_state == "OFF")
+    time.sleep(0.5)
+    assert tasks.status.dutycycle == 12
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_poll_through_a_faulty_transport(fake_board, wait_for, run_tasks, binary):
+    board = fake_board(dropRate=0.1, garbageRate=0.1, subscribe=False, seed=5)
+    tasks = Tasks(board.url, timeout=0.1, subscribe=False, binary=binary)
+    thread, statuses = run_tasks(tasks)
+
+    assert wait_for(lambda: tasks.status is not None)
+
+    board.set("dutycycle", "42")
+    assert wait_for(lambda: tasks.status is not None and tasks.status.dutycycle == 42)
+    assert wait_for(lambda: board.dropped and board.garbage)
+
+    assert thread.is_alive()
+    assert not tasks.global_error
+
+
+def test_poll_a_silent_legacy_board(fake_board, wait_for, run_tasks):
+    board = fake_board(batch=False, subscribe=False, binary=False, chunked=False, patch=False, silent=True)
+    tasks = Tasks(board.url, timeout=0.2, binary=True)
+    thread, statuses = run_tasks(tasks)
+
+    assert wait_for(lambda: tasks.status is not None)
+
+    board.set("dutycycle", "42")
+    assert wait_for(lambda: tasks.status.dutycycle == 42)
+
+    # the unanswered probes aren't repeated, every poll is a plain query of one field
+    ignored, commands = board.ignored, board.commands
+    board.set("dutycycle", "43")
+    assert wait_for(lambda: tasks.status.dutycycle == 43)
+    time.sleep(1.0)
+    assert board.commands > commands
+    assert board.ignored == ignored
+
+    assert thread.is_alive()
+    assert not tasks.global_error
+
+
+def test_failed_commands_dont_stop_the_loop(monkeypatch, fake_board, wait_for, run_tasks):
+    monkeypatch.setattr(utils.serial_interface, "_RECONNECT_BACKOFF", (0.01, 0.05))
+
+    board = fake_board(subscribe=False)
+    tasks = Tasks(board.url, timeout=0.2, subscribe=False)
+    thread, statuses = run_tasks(tasks)
+
+    assert wait_for(lambda: tasks.status is not None)
+
+    # a lost reply
+    board.dropRate = 1.0
+    with pytest.raises(serial.SerialTimeoutException):
+        tasks.set_display_state("OFF").result(5)
+    board.dropRate = 0.0
+    assert tasks.set_runninglight_state("ON").result(5) == b"OK"
+
+    # a refused argument
+    with pytest.raises(ValueError):
+        tasks.set_runninglight_speed("fast").result(5)
+    assert tasks.set_runninglight_speed("70").result(5) == b"70"
+
+    # the cable is unplugged, the command fails or waits for the reconnect
+    board.unplug()
+    unplugged = tasks.set_display_state("ON")
+    time.sleep(0.5)
+    board.plug()
+    try:
+        assert unplugged.result(5) == b"OK"
+    except serial.SerialException:
+        pass
+    assert tasks.set_brightness("10").result(5) == b"10"
+
+    assert wait_for(lambda: statuses[-1] is not None and statuses[-1].dutycycle == 10)
+    assert thread.is_alive()
+    assert not tasks.global_error
+
+
+@pytest.mark.parametrize("batch", [True, False])
+def test_command_preempts_a_poll_sweep(fake_board, wait_for, run_tasks, batch):
+    latency = 0.2
+    board = fake_board(latency=latency, batch=batch, subscribe=False)
+    tasks = Tasks(board.url, timeout=1.0, subscribe=False)
+    thread, statuses = run_tasks(tasks)
+
+    assert wait_for(lambda: tasks.status is not None)
+
+    # changed behind the back of the host (not pushed), the sweep after the next command finds them
+    board.state["runninglight_speed"] = "70"
+    board.state["text"] = "Hello World"
+
+    # every command is followed by a sweep of all fields, 'get_all' or six single queries
+    assert tasks.set_display_state("OFF").result(5) == b"OK"
+    time.sleep(latency / 2)
+
+    start = time.perf_counter()
+    assert tasks.set_runninglight_state("ON").result(5) == b"OK"
+    elapsed = time.perf_counter() - start
+
+    # the command waits at most for the reply in flight, not for the rest of the sweep
+    assert elapsed < 2.5 * latency
+
+    # the interrupted sweep is polled afterwards
+    expected = {"display_state": "OFF", "runninglight_state": "ON", "runninglight_speed": 70, "text": "Hello World"}
+    assert wait_for(lambda: {field: getattr(statuses[-1], field) for field in expected} == expected)
+    assert not tasks.global_error
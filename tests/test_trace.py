@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from utils.serial_interface import _Comms
+from utils.trace import TRACE, load_trace, recorded_binary, replay_comms, _decode_tx
+
+
+@pytest.fixture
+def record(tmp_path, fake_board):
+    """
+    Records the session of a ``_Comms`` with a simulated board and returns the path of the trace.
+    """
+
+    def record_(session, **kwargs):
+        board = fake_board()
+        path = str(tmp_path / "trace.jsonl")
+
+        TRACE.start(path)
+        comms = _Comms(port=board.url, timeout=0.5, **kwargs)
+        try:
+            session(comms)
+        finally:
+            comms.close()
+            TRACE.stop()
+
+        return path
+
+    return record_
+
+
+def _replay(path):
+    return replay_comms(f"replay://{path}?speed=0", 0, 0.5, recorded_binary(load_trace(path)))
+
+
+def _session(comms):
+    comms.get_status()
+    comms.get_field("dutycycle")
+    comms.exec_task_ser("display_off\n", None)
+    comms.exec_task_ser("update_text\n", "display_on")
+
+
+def test_replay_text_trace(record):
+    path = record(_session)
+    commands, errors, timeouts, unsupported, replay = _replay(path)
+
+    assert not recorded_binary(load_trace(path))
+    assert (commands, errors, timeouts, unsupported, replay.mismatches) == (4, 0, 0, 0, 0)
+
+
+def test_replay_binary_trace(record):
+    path = record(_session, binary=True)
+    commands, errors, timeouts, unsupported, replay = _replay(path)
+
+    assert recorded_binary(load_trace(path))
+    assert (commands, errors, timeouts, unsupported, replay.mismatches) == (4, 0, 0, 0, 0)
+
+
+def test_replay_renumbers_binary_replies(record):
+    def session(comms):
+        for _ in range(5):
+            comms.get_field("text")
+        _session(comms)
+
+    path = record(session, binary=True)
+
+    # cut the five queries after the negotiation, so the recorded sequence numbers start at 6
+    with open(path) as fdata:
+        lines = fdata.readlines()
+    writes = [i for i, line in enumerate(lines) if json.loads(line)["d"] == "tx"]
+    with open(path, "w") as fdata:
+        fdata.writelines(lines[:writes[1]] + lines[writes[6]:])
+
+    commands, errors, timeouts, unsupported, replay = _replay(path)
+    assert (commands, errors, timeouts, unsupported, replay.mismatches) == (4, 0, 0, 0, 0)
+
+
+def _upload_session(comms):
+    comms.chunkSize, comms.uploadWindow = 8, 3
+    comms.get_status()
+    comms.exec_task_ser("update_text\n", "a long text which is uploaded in chunks")
+    comms.exec_task_ser("update_text\n", "a long text which is patched in chunks", current=comms.get_status().text)
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_replay_upload_and_patch(record, binary):
+    path = record(_upload_session, binary=binary)
+    commands_ = [_decode_tx(data)[0].split(" ")[0] for _, direction, data in load_trace(path) if direction == "tx"]
+
+    assert commands_.count("begin_text") == 1 and commands_.count("patch_text") == 1
+    assert commands_.count("chunk") == 5
+
+    commands, errors, timeouts, unsupported, replay = _replay(path)
+    assert (commands, errors, timeouts, unsupported, replay.mismatches) == (4, 0, 0, 0, 0)
+    assert replay.skipped == 0
+
+
+def test_replay_reports_unsupported_commands(record):
+    path = record(_session)
+
+    with open(path) as fdata:
+        lines = fdata.readlines()
+    record = json.loads(lines[-1])
+    lines.append(json.dumps({**record, "d": "tx", "b": "reboot\n"}) + "\n")
+    with open(path, "w") as fdata:
+        fdata.writelines(lines)
+
+    commands, errors, timeouts, unsupported, replay = _replay(path)
+    assert (commands, errors, timeouts, unsupported, replay.mismatches) == (4, 0, 0, 1, 0)
@@ -1 +1,5 @@
-from utils.utils import *
+def __getattr__(name):
+    # the widget helpers of utils.utils are loaded lazily, so the headless modules (e.g. utils.serial_interface)
+    # can be imported without PyQt5
+    from utils import utils as _utils
+    return getattr(_utils, name)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import json
+import threading
+import concurrent.futures
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import serial
+
+from utils.common import Text, checkValidStr, percentToDutyCycle, dutyCycleToPercent
+from utils.devices import DeviceRegistry
+from utils.metrics import METRICS
+
+
+STD_API_HOST = "127.0.0.1"
+STD_API_PORT = 8765
+_COMMAND_TIMEOUT = 10       # seconds, a text update can take a while
+
+
+def _percent(body: dict, key: str):
+    """
+    Validates a percentage of the request body (e.g. the brightness).
+
+    :param body: The json body: dict
+    :param key: The key of the percentage: str
+
+    :return: The percentage between 1 and 100: int
+    """
+
+    value = body.get(key)
+
+    if isinstance(value, bool) or not isinstance(value, (int, str)) or not str(value).strip().isdigit():
+        raise ValueError(f"'{key}' is not a valid number")
+
+    if int(value) not in range(1, 100 + 1):
+        raise ValueError(f"'{key}' is not between 1 and 100")
+
+    return int(value)
+
+
+class _ApiError(Exception):
+    """
+    Represents an error which is answered with a specific HTTP status.
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles the requests of the control API.
+
+    GET  /status                           the status of every device
+    GET  /devices                          the names of the devices
+    GET  /metrics                          the metrics of the serial path (Prometheus text format)
+    POST /display       {"state": "ON"}
+    POST /text          {"text": "..."}
+    POST /runninglight  {"state": "OFF"}
+    POST /speed         {"speed": 50}
+    POST /brightness    {"brightness": 60}
+
+    The commands are sent to the first device, to another one with ``?device=<name>``
+    or to all devices with ``?device=*``.
+    """
+
+    server: _ApiHTTPServer
+
+    def log_message(self, format, *args):
+        # no console output for every request
+        pass
+
+    def do_GET(self):
+        self.__handle(self.__get)
+
+    def do_POST(self):
+        self.__handle(self.__post)
+
+    def __handle(self, func):
+        try:
+            status, body = func()
+        except _ApiError as e:
+            status, body = e.status, {"error": str(e)}
+        except ValueError as e:
+            status, body = 400, {"error": str(e)}
+
+        if isinstance(body, str):
+            data = body.encode("utf-8")
+            contentType = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            data = json.dumps(body).encode("utf-8")
+            contentType = "application/json"
+
+        self.send_response(status)
+        self.send_header("Content-Type", contentType)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def __get(self):
+        url = urlparse(self.path)
+        devices = self.server.devices
+
+        if url.path == "/status":
+            return 200, {
+                name: status.to_dict() if status is not None else None
+                for name, status in devices.statuses().items()
+            }
+
+        elif url.path == "/devices":
+            return 200, devices.names()
+
+        elif url.path == "/metrics":
+            return 200, METRICS.to_prometheus()
+
+        raise _ApiError(404, f"'{url.path}' doesn't exist")
+
+    def __post(self):
+        url = urlparse(self.path)
+        body = self.__read_json()
+        tasks = self.__select_tasks(parse_qs(url.query).get("device", [None])[0])
+
+        if url.path == "/display":
+            future = tasks.set_display_state(str(body.get("state", "")).upper())
+
+        elif url.path == "/runninglight":
+            future = tasks.set_runninglight_state(str(body.get("state", "")).upper())
+
+        elif url.path == "/speed":
+            future = tasks.set_runninglight_speed(str(_percent(body, "speed")))
+
+        elif url.path == "/brightness":
+            future = tasks.set_brightness(str(percentToDutyCycle(_percent(body, "brightness"))))
+
+        elif url.path == "/text":
+            text = str(body.get("text", ""))
+            valid, invalidChars = checkValidStr(text)
+
+            if text == "":
+                raise ValueError("Text is empty")
+            if not valid:
+                raise ValueError(f"Text has invalid symbols ({', '.join(invalidChars)})")
+            if len(text) > Text.maxLength:
+                raise ValueError(f"Text is longer than {Text.maxLength} characters")
+
+            future = tasks.set_text(text + Text.gap)
+
+        else:
+            raise _ApiError(404, f"'{url.path}' doesn't exist")
+
+        return 200, {"feedback": self.__wait(future, url.path == "/brightness")}
+
+    def __read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid json: {e}")
+
+        if not isinstance(body, dict):
+            raise ValueError("The body has to be a json object")
+
+        return body
+
+    def __select_tasks(self, deviceName: str):
+        devices = self.server.devices
+
+        if deviceName is None:
+            return devices[devices.names()[0]]
+
+        if deviceName == "*":
+            return devices.broadcast
+
+        if deviceName not in devices.names():
+            raise _ApiError(404, f"The device '{deviceName}' doesn't exist")
+
+        return devices[deviceName]
+
+    def __wait(self, future: concurrent.futures.Future, isBrightness: bool):
+        """
+        Waits for the command (only this request's thread is blocked) and returns the decoded feedback.
+        """
+
+        try:
+            feedback = future.result(_COMMAND_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            raise _ApiError(504, "The board didn't execute the command in time")
+        except concurrent.futures.CancelledError:
+            raise _ApiError(503, "The device isn't running")
+        except serial.SerialException as e:
+            raise _ApiError(502, str(e))
+
+        def decode(result):
+            if isinstance(result, BaseException):
+                return {"error": str(result)}
+
+            result = result.decode("cp1252")
+            if isBrightness and result.isdigit():
+                return dutyCycleToPercent(result)
+
+            return result
+
+        if isinstance(feedback, dict):
+            # broadcast to all devices
+            return {name: decode(result) for name, result in feedback.items()}
+
+        return decode(feedback)
+
+
+class _ApiHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, devices: DeviceRegistry):
+        super().__init__(address, _RequestHandler)
+        self.devices = devices
+
+
+class ControlServer:
+    """
+    Represents the local HTTP/JSON control API.
+
+    Every request is handled in its own thread. The commands are queued at the same engines as the commands of the GUI,
+    so both are serialized by the worker thread of the board and neither the Qt event loop nor the serial worker
+    is blocked by a client.
+    """
+
+    def __init__(self, devices: DeviceRegistry, host: str = STD_API_HOST, port: int = STD_API_PORT):
+        self.__server = _ApiHTTPServer((host, port), devices)
+        self.__thread = threading.Thread(target=self.__server.serve_forever, name="control-api", daemon=True)
+
+    @property
+    def address(self):
+        return self.__server.server_address
+
+    def start(self):
+        self.__thread.start()
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
@@ -2,6 +2,8 @@
 
 class Path:
     json_Texts = "./common/json/texts.json"
+    json_Devices = "./common/json/devices.json"
+    db_Texts = "./common/texts.db"
 
     png_MainIcon = "./common/images/lighthouse.png"
     png_ExecutiveDark = "./common/images/execute_dark.png"
@@ -17,8 +19,59 @@ class Dict:
     }
 
 
+class Text:
+    gap = "                    "            # 20 spaces, to create a "gap" at the end of the scrolling text
+    maxLength = 489
+
+
 class Color:
     green = "19ba00"
     red = "ff1212"
     yellow_wait = "b56700"
     black = "000000"
+
+
+def percentToDutyCycle(percent: int):
+    """
+    Converts the brightness in percent to the duty cycle of the board (1-16).
+
+    :param percent: The brightness in percent: int
+    :return: The duty cycle: int
+    """
+
+    duty_cycle = round((16 / 100) * int(percent))
+    if duty_cycle == 0:
+        duty_cycle = 1
+
+    return duty_cycle
+
+
+def dutyCycleToPercent(duty_cycle: int):
+    """
+    Converts the duty cycle of the board (1-16) to the brightness in percent.
+
+    :param duty_cycle: The duty cycle: int
+    :return: The brightness in percent: int
+    """
+
+    return round((100 / 16) * int(duty_cycle))
+
+
+def checkValidStr(string: str):
+    """
+    Checks if a specific string has invalid chars in it and returns the valid state and a list of all (not duplicated) invalid chars in the specific string.
+
+    :param string: The string which should be checked: str
+    :return: The valid state and a list of all (not duplicated) invalid chars in the specific string: bool, list
+    """
+
+    validChars = "ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÜËÀÉÈabcdefghijklmnopqrstuvwxyzäöüëàéè0123456789.,'\"?!@_*#$%&()+-/:;<=>[\]^`{|}~© "
+
+    invalidChars = []
+    valid = True
+    for char in string:
+        if char not in validChars:
+            valid = False
+            invalidChars.append(char)
+
+    return valid, list(set(invalidChars))
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import os
+import json
+import threading
+import concurrent.futures
+from typing import Callable, Dict, List, Optional
+
+from utils.serial_interface import Tasks, Signal, _TaskCommands, _STD_PORT
+
+
+STD_DEVICE_NAME = "Leuchtturm"
+
+
+class _Broadcast(_TaskCommands):
+    """
+    Represents the commands which are sent to all boards of a registry in parallel.
+
+    Every ``set_*`` method queues the command at every running engine at once and returns a ``concurrent.futures.Future``
+    which resolves to a dict ``{device name: feedback}`` when all boards are done.
+    The value of a board which failed or isn't running is the exception.
+    """
+
+    def __init__(self, registry: DeviceRegistry):
+        self.__registry = registry
+
+    @property
+    def status(self):
+        """
+        The status of the first board (the dot-matrix displays show the same content after a broadcast).
+        """
+
+        for name, tasks in self.__registry:
+            return tasks.status
+
+        return None
+
+    def _set_task(self, cmd: str, arg: str = None):
+        futures = {name: tasks._set_task(cmd, arg) for name, tasks in self.__registry}
+        return _gather(futures)
+
+
+def _gather(futures: Dict[str, concurrent.futures.Future]):
+    """
+    Combines the futures of several boards into one future.
+
+    :param futures: The futures: Dict[name: str, future: concurrent.futures.Future]
+
+    :return: The future which resolves to ``{name: feedback or exception}``: concurrent.futures.Future
+    """
+
+    combined = concurrent.futures.Future()
+    results = {}
+    lock = threading.Lock()
+
+    if not futures:
+        combined.set_result(results)
+        return combined
+
+    def on_done(name: str, future: concurrent.futures.Future):
+        if future.cancelled():
+            result = concurrent.futures.CancelledError(f"'{name}' isn't running")
+        elif future.exception() is not None:
+            result = future.exception()
+        else:
+            result = future.result()
+
+        with lock:
+            results[name] = result
+            done = len(results) == len(futures)
+
+        if done:
+            combined.set_result({name_: results[name_] for name_ in futures})
+
+    for name, future in futures.items():
+        future.add_done_callback(lambda f, name_=name: on_done(name_, f))
+
+    return combined
+
+
+class DeviceRegistry:
+    """
+    Represents the dot-matrix boards which are driven by one application.
+
+    Every board has its own engine (``Tasks``) with independent polling, status and command queue,
+    the engines run concurrently. ``broadcast`` sends a command to all boards in parallel.
+    """
+
+    def __init__(self):
+        self.__devices: Dict[str, Tasks] = {}
+        self.broadcast = _Broadcast(self)
+
+    @classmethod
+    def load(cls, path: str, **kwargs):
+        """
+        Creates the registry from a json file which maps the device names to their ports, e.g.
+        ``{"Entrance": "COM6", "Hall": "COM7"}``. Without the file, the registry contains one board at the standard port.
+
+        :param path: The path of the json file: str
+        :param kwargs: Keywords which are passed to every ``Tasks``
+
+        :return: The registry: DeviceRegistry
+        """
+
+        devices = {STD_DEVICE_NAME: _STD_PORT}
+
+        if os.path.exists(path):
+            with open(path, "r") as fdata:
+                devices = json.load(fdata)
+
+        if len(devices) == 0:
+            raise ValueError(f"'{path}' doesn't contain any device.")
+
+        registry = cls()
+        for name, port in devices.items():
+            registry.add(name, Tasks(port, **kwargs))
+
+        return registry
+
+    def add(self, name: str, tasks: Tasks):
+        """
+        Adds a board.
+
+        :param name: The unique name of the board: str
+        :param tasks: The engine of the board: Tasks
+        """
+
+        if name in self.__devices:
+            raise ValueError(f"The device '{name}' already exists.")
+
+        self.__devices[name] = tasks
+
+    def __getitem__(self, name: str):
+        return self.__devices[name]
+
+    def __iter__(self):
+        return iter(list(self.__devices.items()))
+
+    def __len__(self):
+        return len(self.__devices)
+
+    def names(self):
+        """
+        :return: The names of the boards: List[str]
+        """
+
+        return list(self.__devices.keys())
+
+    def statuses(self):
+        """
+        :return: The last status of every board (None if it doesn't respond): Dict[name: str, status: Optional[BoardStatus]]
+        """
+
+        return {name: tasks.status for name, tasks in self}
+
+    def start(self, on_status: Callable = None):
+        """
+        Runs the engine of every board in its own thread (without Qt).
+
+        :param on_status: The function which gets called with the device name and the status
+                          (in the thread of the device), default to None: Callable
+
+        :return: The threads: List[threading.Thread]
+        """
+
+        threads = []
+        for name, tasks in self:
+            progress_callback = Signal()
+            status_callback = Signal()
+
+            if on_status is not None:
+                status_callback.connect(lambda status, name_=name: on_status(name_, status))
+
+            thread = threading.Thread(
+                target=tasks.loop,
+                kwargs={"progress_callback": progress_callback, "status_callback": status_callback},
+                name=f"tasks-{name}",
+                daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+
+        return threads
+
+    def stop(self):
+        """
+        Stops the engines of all boards.
+        """
+
+        for name, tasks in self:
+            tasks.running = False
@@ -0,0 +1,179 @@
+"""
+Counters and timers of the serial path.
+
+The metrics are disabled by default, then every ``inc``/``observe`` returns after a single attribute check.
+The GUI and the daemon enable them, they are shown in the diagnostics tab and served as Prometheus text
+(``GET /metrics`` of the control API).
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Dict, Tuple
+
+
+_TIMER_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)     # seconds
+_HELP = {
+    "serial_bytes_sent_total": ("counter", "Bytes written to the serial port."),
+    "serial_bytes_received_total": ("counter", "Bytes read from the serial port."),
+    "serial_command_seconds": ("histogram", "Time from writing a command until its reply arrived."),
+    "serial_timeouts_total": ("counter", "Commands which weren't answered in time."),
+    "serial_reconnects_total": ("counter", "Reconnects after the connection broke."),
+    "serial_open_errors_total": ("counter", "Attempts to open the port which failed."),
+    "serial_invalid_events_total": ("counter", "Pushed state changes which were unknown or invalid and dropped."),
+    "serial_chunk_retries_total": ("counter", "Chunks of a text upload which were sent again."),
+    "serial_patch_mismatches_total": ("counter", "Text patches which the board refused because its text differed."),
+    "serial_parse_errors_total": ("counter", "Replies which were garbled and dropped."),
+    "tasks_sweep_seconds": ("histogram", "Duration of a status poll of the task loop."),
+    "tasks_wait_seconds": ("histogram", "Time a queued command (or a due poll) waited until it was sent, by priority."),
+}
+
+
+class _Timer:
+    """
+    Represents the observations of a timer (a histogram with fixed buckets).
+    """
+
+    __slots__ = ("count", "sum", "max", "last", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.buckets = [0] * (len(_TIMER_BUCKETS) + 1)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.sum += seconds
+        self.last = seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(_TIMER_BUCKETS, seconds)] += 1
+
+
+class Metrics:
+    """
+    Represents a thread-safe registry of counters and timers, identified by name and labels.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.__lock = threading.Lock()
+        self.__counters: Dict[Tuple[str, Tuple], float] = {}
+        self.__timers: Dict[Tuple[str, Tuple], _Timer] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """
+        Increases a counter.
+
+        :param name: The name of the counter: str
+        :param value: The increment, default to 1: float
+        :param labels: The labels of the counter, e.g. ``port="COM6"``
+        """
+
+        if not self.enabled:
+            return
+
+        key = (name, tuple(sorted(labels.items())))
+        with self.__lock:
+            self.__counters[key] = self.__counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        """
+        Adds a duration to a timer.
+
+        :param name: The name of the timer: str
+        :param seconds: The duration in seconds: float
+        :param labels: The labels of the timer, e.g. ``port="COM6"``
+        """
+
+        if not self.enabled:
+            return
+
+        key = (name, tuple(sorted(labels.items())))
+        with self.__lock:
+            timer = self.__timers.get(key)
+            if timer is None:
+                timer = self.__timers[key] = _Timer()
+
+            timer.observe(seconds)
+
+    def reset(self):
+        """
+        Removes all values.
+        """
+
+        with self.__lock:
+            self.__counters.clear()
+            self.__timers.clear()
+
+    def snapshot(self):
+        """
+        :return: Every counter and timer as ``(name, labels, summary)``, the summary of a counter is its value and
+                 the summary of a timer a dict with count, mean, max and last in seconds: List[tuple]
+        """
+
+        with self.__lock:
+            rows = [(name, dict(labels), value) for (name, labels), value in self.__counters.items()]
+            rows += [
+                (name, dict(labels), {
+                    "count": timer.count,
+                    "mean": timer.sum / timer.count,
+                    "max": timer.max,
+                    "last": timer.last,
+                })
+                for (name, labels), timer in self.__timers.items()
+            ]
+
+        return sorted(rows, key=lambda row: (row[0], sorted(row[1].items())))
+
+    def to_prometheus(self):
+        """
+        :return: All metrics in the Prometheus text format: str
+        """
+
+        with self.__lock:
+            counters = sorted(self.__counters.items())
+            timers = sorted((key, (timer.count, timer.sum, list(timer.buckets))) for key, timer in self.__timers.items())
+
+        lines = []
+        described = set()
+
+        def describe(name: str):
+            if name not in described and name in _HELP:
+                kind, text = _HELP[name]
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+            described.add(name)
+
+        for (name, labels), value in counters:
+            describe(name)
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+        for (name, labels), (count, sum_, buckets) in timers:
+            describe(name)
+
+            cumulative = 0
+            for bound, bucketCount in zip(_TIMER_BUCKETS + (float("inf"),), buckets):
+                cumulative += bucketCount
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+
+            lines.append(f"{name}_sum{_format_labels(labels)} {sum_:g}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Tuple):
+    if not labels:
+        return ""
+
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels) + "}"
+
+
+METRICS = Metrics()
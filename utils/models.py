@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import re
+from typing import Iterable, List, Optional, Tuple
+
+from PyQt5.Qt import *
+
+from utils.texts import TEXTS, TextLibrary
+
+
+_TEXT_LINES = 3         # the lines of a text which are shown in the editor table
+_PAGE_SIZE = 100        # the results which are fetched at once by the text picker
+
+
+class TextTableModel(QAbstractTableModel):
+    """
+    Represents the pre-created texts (label and text per row) for a ``Qt.QTableView``.
+    Inherits from ``Qt.QAbstractTableModel``, so the view only renders the visible rows.
+
+    Changes are applied row by row (``beginInsertRows``/``beginRemoveRows``), a view keeps its scroll position
+    and selection and never rebuilds all rows. The rows are only compared to the library if its version changed.
+    """
+
+    HEADERS = ["Label", "Text"]
+
+    def __init__(self, library: TextLibrary = TEXTS, parent: QObject = None):
+        super().__init__(parent)
+        self.library = library
+        self.__version = library.version()
+        self.__rows: List[Tuple[str, str]] = list(library.texts().items())
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()):
+        return 0 if parent.isValid() else len(self.__rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        value = self.__rows[index.row()][index.column()]
+
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return value
+
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+
+        if orientation == Qt.Horizontal and role == Qt.FontRole:
+            font = QFont("Calibri", 12)
+            font.setBold(True)
+            return font
+
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index: QModelIndex):
+        # read-only
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def labelAt(self, row: int):
+        return self.__rows[row][0]
+
+    def __rowOf(self, label: str):
+        """
+        :return: The row of the label or the row where it has to be inserted (the rows are sorted by label): int
+        """
+
+        low, high = 0, len(self.__rows)
+        while low < high:
+            middle = (low + high) // 2
+            if self.__rows[middle][0] < label:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def addText(self, label: str, text: str, tags: Iterable[str] = ()):
+        """
+        Adds the text to the library and inserts its row.
+        """
+
+        self.library.add(label, text, tags)
+        self.__version = self.library.version()
+
+        row = self.__rowOf(label)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.__rows.insert(row, (label, text))
+        self.endInsertRows()
+
+    def removeText(self, label: str):
+        """
+        Removes the text from the library and its row.
+        """
+
+        self.library.remove(label)
+        self.__version = self.library.version()
+
+        row = self.__rowOf(label)
+        if row < len(self.__rows) and self.__rows[row][0] == label:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.__rows[row]
+            self.endRemoveRows()
+
+    def clearTexts(self):
+        """
+        Removes all texts from the library and all rows.
+        """
+
+        self.library.clear()
+        self.__version = self.library.version()
+
+        self.beginResetModel()
+        self.__rows = []
+        self.endResetModel()
+
+    def refresh(self):
+        """
+        Applies the changes of the library (e.g. by another program) row by row.
+        Does nothing if the library didn't change since the last refresh.
+        """
+
+        version = self.library.version()
+        if version == self.__version:
+            return
+
+        self.__version = version
+        new = list(self.library.texts().items())
+
+        if new == self.__rows:
+            return
+
+        # both lists are sorted by label, walk through them like a merge
+        row, i = 0, 0
+        while row < len(self.__rows) or i < len(new):
+            current = self.__rows[row] if row < len(self.__rows) else None
+            wanted = new[i] if i < len(new) else None
+
+            if current is not None and (wanted is None or current[0] < wanted[0]):
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.__rows[row]
+                self.endRemoveRows()
+
+            elif current is None or wanted[0] < current[0]:
+                self.beginInsertRows(QModelIndex(), row, row)
+                self.__rows.insert(row, wanted)
+                self.endInsertRows()
+                row += 1
+                i += 1
+
+            else:
+                if current[1] != wanted[1]:
+                    self.__rows[row] = wanted
+                    self.dataChanged.emit(self.index(row, 0), self.index(row, 1))
+                row += 1
+                i += 1
+
+
+class TextSearchModel(QAbstractListModel):
+    """
+    Represents the labels of the pre-created texts which match a query, for the text picker in the run tab.
+    Inherits from ``Qt.QAbstractListModel``.
+
+    The results are fetched page by page (``canFetchMore``/``fetchMore``) while the list is scrolled, so
+    only the visible part of a large library is loaded. Every word of the query has to match the beginning of
+    a word in the label or the text; if nothing matches, the labels which contain the characters of the query
+    in order (e.g. "opnhrs" for "opening hours") are shown instead.
+    """
+
+    def __init__(self, library: TextLibrary = TEXTS, parent: QObject = None):
+        super().__init__(parent)
+        self.library = library
+        self.__query = ""
+        self.__version = None
+        self.__rows: List[Tuple[str, str]] = []
+        self.__fuzzyLabels: Optional[List[str]] = None
+        self.__exhausted = False
+
+        self.refresh()
+
+    @property
+    def query(self):
+        return self.__query
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()):
+        return 0 if parent.isValid() else len(self.__rows)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        label, text = self.__rows[index.row()]
+
+        if role == Qt.DisplayRole:
+            return label
+
+        if role == Qt.ToolTipRole:
+            return text
+
+        return None
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()):
+        return not parent.isValid() and not self.__exhausted
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()):
+        if parent.isValid() or self.__exhausted:
+            return
+
+        page = self.__fetch(len(self.__rows))
+        self.__exhausted = len(page) < _PAGE_SIZE
+
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self.__rows), len(self.__rows) + len(page) - 1)
+            self.__rows += page
+            self.endInsertRows()
+
+    def __fetch(self, offset: int):
+        """
+        :return: The next page of results: List[Tuple[label: str, text: str]]
+        """
+
+        if self.__fuzzyLabels is None:
+            page = self.library.search(self.__query, limit=_PAGE_SIZE, offset=offset)
+
+            if page or offset > 0 or not self.__query.strip():
+                return page
+
+            self.__fuzzyLabels = _fuzzy_match(self.__query, self.library.labels())
+
+        labels = self.__fuzzyLabels[offset:offset + _PAGE_SIZE]
+        return [(label, self.library.get(label) or "") for label in labels]
+
+    def setQuery(self, query: str):
+        """
+        Shows the results of another query, starting with the first page.
+
+        :param query: The query, an empty query shows all texts: str
+        """
+
+        if query == self.__query:
+            return
+
+        self.__query = query
+        self.__reload()
+
+    def refresh(self):
+        """
+        Reloads the results if the library changed since they were fetched.
+        """
+
+        version = self.library.version()
+        if version != self.__version:
+            self.__version = version
+            self.__reload()
+
+    def __reload(self):
+        self.beginResetModel()
+        self.__rows = []
+        self.__fuzzyLabels = None
+        self.__exhausted = False
+        self.endResetModel()
+
+        self.fetchMore()
+
+
+def _fuzzy_match(query: str, labels: List[str]):
+    """
+    :return: The labels which contain the characters of the query in order, the closest matches first: List[str]
+    """
+
+    chars = [re.escape(char) for char in query.lower() if not char.isspace()]
+    pattern = re.compile(".*?".join(chars))
+
+    matches = []
+    for label in labels:
+        match = pattern.search(label.lower())
+        if match is not None:
+            matches.append((match.end() - match.start(), label))
+
+    return [label for _, label in sorted(matches)]
+
+
+class WrapTextDelegate(QStyledItemDelegate):
+    """
+    Paints the cells read-only, word-wrapped and centered, a text which is longer than ``_TEXT_LINES`` lines is cut
+    (the full text is shown as tooltip). Inherits from ``Qt.QStyledItemDelegate``.
+    """
+
+    @staticmethod
+    def rowHeight(font: QFont):
+        """
+        :param font: The font of the table: QFont
+
+        :return: The height of a row which shows ``_TEXT_LINES`` lines: int
+        """
+
+        return QFontMetrics(font).lineSpacing() * _TEXT_LINES + 8
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex):
+        self.initStyleOption(option, index)
+        text = option.text
+        option.text = ""
+
+        style = option.widget.style() if option.widget is not None else QApplication.style()
+        style.drawControl(QStyle.CE_ItemViewItem, option, painter, option.widget)
+
+        painter.save()
+        painter.setFont(option.font)
+        if option.state & QStyle.State_Selected:
+            painter.setPen(option.palette.highlightedText().color())
+        painter.drawText(option.rect.adjusted(4, 4, -4, -4), Qt.AlignCenter | Qt.TextWordWrap, text)
+        painter.restore()
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex):
+        return QSize(option.rect.width(), self.rowHeight(option.font))
@@ -0,0 +1,5 @@
+"""
+The pyserial URL handler of ``fake://`` (see ``utils.simulator``).
+"""
+
+from utils.simulator import FakeSerial as Serial
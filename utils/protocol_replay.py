@@ -0,0 +1,5 @@
+"""
+The pyserial URL handler of ``replay://`` (see ``utils.trace``).
+"""
+
+from utils.trace import ReplaySerial as Serial
@@ -0,0 +1,584 @@
+from __future__ import annotations
+
+import time
+import asyncio
+import threading
+import concurrent.futures
+from typing import Optional, Callable, Iterable
+
+import serial
+import serial_asyncio
+
+from utils.serial_interface import BoardStatus, _TaskCommands, _StatusPoller, _batch_status, _parse_reply, \
+    _parse_event, _pop_frame, _strip_padding, _STD_BAUDRATE, _STD_PORT, _STD_TIMEOUT, _EVENT_PREFIX, _FIELD_QUERIES, \
+    _TASKS_WITHOUT_ARG, _TASKS_WITH_ARG, _RECONNECT_BACKOFF, _PARSE_RETRIES, _command_label
+from utils.metrics import METRICS
+from utils.trace import TRACE
+
+
+class _AsyncSerial:
+    """
+    Represents the serial port to the Nucleo-Board as asyncio stream (``serial_asyncio``).
+
+    A read task splits the incoming bytes into frames: unsolicited state-change frames are passed to ``on_event``,
+    every other frame is the reply to the running query. Queries are serialized with a lock,
+    time out after ``timeout`` seconds and can be cancelled.
+    The port gets reopened automatically when a ``serial.SerialException`` occurs.
+    """
+
+    def __init__(self, baudrate: int, port: str, timeout: float = None):
+        self.baudrate = baudrate
+        self.port = port
+        self.timeout = timeout
+        self.reconnects = 0
+        self.on_event = None
+
+        self.__reader = None
+        self.__writer = None
+        self.__read_task = None
+        self.__read_error = None
+        self.__rx_buffer = bytearray()
+        self.__replies = None
+        self.__lock = None
+
+    async def open(self):
+        """
+        Opens the port if it isn't already open.
+        """
+
+        if self.__writer is not None:
+            return
+
+        try:
+            self.__reader, self.__writer = await serial_asyncio.open_serial_connection(
+                url=self.port,
+                baudrate=self.baudrate
+            )
+        except (serial.SerialException, OSError) as e:
+            raise serial.SerialException(f"{e}. Make sure this COM Port exists and isn't already in use.")
+
+        self.__read_error = None
+        self.__rx_buffer.clear()
+        self.__replies = asyncio.Queue()
+        self.__read_task = asyncio.create_task(self.__readLoop())
+
+    async def close(self):
+        """
+        Closes the port. Does nothing if the port is already closed.
+        """
+
+        if self.__read_task is not None:
+            self.__read_task.cancel()
+            try:
+                await self.__read_task
+            except asyncio.CancelledError:
+                pass
+            self.__read_task = None
+
+        if self.__writer is not None:
+            self.__writer.close()
+            self.__writer = None
+            self.__reader = None
+
+    async def reconnect(self):
+        """
+        Closes and reopens the port.
+        """
+
+        await self.close()
+        await self.open()
+        self.reconnects += 1
+        METRICS.inc("serial_reconnects_total", port=self.port)
+
+    async def __readLoop(self):
+        try:
+            while True:
+                chunk = await self.__reader.read(512)
+                if not chunk:
+                    raise serial.SerialException("The port was closed.")
+
+                METRICS.inc("serial_bytes_received_total", len(chunk), port=self.port)
+                TRACE.record(self.port, "rx", chunk)
+                self.__rx_buffer += chunk
+
+                frame = _pop_frame(self.__rx_buffer)
+                while frame is not None:
+                    frame = _strip_padding(frame)
+
+                    if frame.startswith(_EVENT_PREFIX):
+                        if self.on_event is not None:
+                            self.on_event(frame[len(_EVENT_PREFIX):])
+                    else:
+                        self.__replies.put_nowait(frame)
+
+                    frame = _pop_frame(self.__rx_buffer)
+
+        except (serial.SerialException, OSError) as e:
+            # the next query raises it and reconnects
+            self.__read_error = e
+
+    async def __exchange(self, encodedString: bytes):
+        if self.__read_error is not None:
+            raise serial.SerialException(f"Read operation failed! Error: {self.__read_error}")
+
+        # drop the replies nobody waited for (e.g. of a cancelled or timed out query)
+        while not self.__replies.empty():
+            self.__replies.get_nowait()
+
+        start = time.perf_counter()
+        TRACE.record(self.port, "tx", encodedString)
+        self.__writer.write(encodedString)
+
+        try:
+            await asyncio.wait_for(self.__writer.drain(), self.timeout)
+        except asyncio.TimeoutError:
+            raise serial.SerialTimeoutException("Write timeout")
+
+        METRICS.inc("serial_bytes_sent_total", len(encodedString), port=self.port)
+
+        try:
+            frame = await asyncio.wait_for(self.__replies.get(), self.timeout)
+        except asyncio.TimeoutError:
+            if not self.__rx_buffer:
+                METRICS.inc("serial_timeouts_total", port=self.port)
+                raise serial.SerialTimeoutException(f"Read operation timed out and didn't receive any feedback.")
+
+            # firmware without terminator, return what we got so far
+            frame = _strip_padding(bytes(self.__rx_buffer))
+            self.__rx_buffer.clear()
+
+        METRICS.observe("serial_command_seconds", time.perf_counter() - start,
+                        port=self.port, command=_command_label(encodedString))
+
+        return frame
+
+    async def query(self, string: str):
+        """
+        Writes the string and returns the reply of the board.
+
+        :param string: The command: str
+
+        :return: The reply: bytes
+        """
+
+        encodedString = bytes(string, "cp1252")
+
+        if self.__lock is None:
+            self.__lock = asyncio.Lock()
+
+        async with self.__lock:
+            await self.open()
+
+            try:
+                return await self.__exchange(encodedString)
+            except serial.SerialTimeoutException:
+                raise
+            except (serial.SerialException, OSError):
+                # the connection broke (e.g. cable replugged), reconnect once and retry the query
+                await self.reconnect()
+                return await self.__exchange(encodedString)
+
+
+class AsyncComms:
+    """
+    Represents the standard communication queries as coroutines.
+    Speaks the same protocol as ``utils.serial_interface._Comms``.
+    """
+
+    def __init__(self, baudrate: int = _STD_BAUDRATE, port: str = _STD_PORT, timeout: float = _STD_TIMEOUT):
+        self.__ser = _AsyncSerial(baudrate, port, timeout)
+        self.__batch_supported = None         # unknown until the first status query
+
+    @property
+    def port(self):
+        return self.__ser.port
+
+    @property
+    def batch_supported(self):
+        """
+        Whether the firmware supports the batched ``get_all`` query (None if unknown yet).
+        """
+
+        return self.__batch_supported
+
+    async def open(self):
+        await self.__ser.open()
+
+    async def close(self):
+        self.__ser.on_event = None
+        await self.__ser.close()
+
+    async def subscribe(self, on_event: Callable):
+        """
+        Subscribes to the state changes of the board (see ``_Comms.subscribe``).
+
+        :param on_event: The function which gets called with the field and the validated value: Callable
+
+        :return: Whether the firmware supports the subscription: bool
+        """
+
+        def on_frame(frame: bytes):
+            event = _parse_event(frame, self.port)
+            if event is not None:
+                on_event(*event)
+
+        self.__ser.on_event = on_frame
+
+        try:
+            reply = await self.__ser.query("subscribe\n")
+        except serial.SerialTimeoutException:
+            reply = None
+
+        if reply != b"SUBSCRIBED":
+            # old firmware, stay with polling
+            self.__ser.on_event = None
+            return False
+
+        return True
+
+    async def get_board_state(self):
+        return await self.__ser.query("get_board_state\n")
+
+    async def get_field(self, field: str):
+        """
+        Queries a single field of the board's state.
+
+        :param field: The name of the field (see ``BoardStatus``): str
+
+        :return: The validated value of the field: Union[str, int]
+        """
+
+        for _ in range(_PARSE_RETRIES + 1):
+            value = _parse_reply(field, await self.__ser.query(_FIELD_QUERIES[field]), self.port)
+            if value is not None:
+                return value
+
+        raise serial.SerialTimeoutException(f"The board didn't answer '{field}' with a valid value.")
+
+    async def get_fields(self, fields: Iterable[str]):
+        """
+        Queries several fields of the board's state, one after another.
+
+        :param fields: The names of the fields (see ``BoardStatus``): Iterable[str]
+
+        :return: The validated values: Dict[str, Union[str, int]]
+        """
+
+        values = {}
+        for field in fields:
+            values[field] = await self.get_field(field)
+
+        return values
+
+    async def get_status(self):
+        """
+        Queries the whole state of the board with ``get_all``
+        or with the six single queries if the firmware doesn't support it (see ``_Comms.get_status``).
+
+        :return: The state of the board: BoardStatus
+        """
+
+        if self.__batch_supported is not False:
+            try:
+                reply = await self.__ser.query("get_all\n")
+            except serial.SerialTimeoutException:
+                if self.__batch_supported:
+                    raise
+                reply = None
+
+            status, self.__batch_supported = _batch_status(reply, self.__batch_supported, self.port)
+            if status is not None:
+                return status
+
+        status = BoardStatus(**(await self.get_fields(BoardStatus._fields)))
+
+        if self.__batch_supported is None:
+            self.__batch_supported = False
+
+        return status
+
+    async def exec_task(self, task: str, arg: Optional[str]):
+        """
+        Executes the task (see ``_Comms.exec_task_ser``).
+        """
+
+        if task in _TASKS_WITHOUT_ARG:
+            feedback = await self.__ser.query(task)
+
+        elif task in _TASKS_WITH_ARG:
+            if arg is not None:
+                feedback = await self.__ser.query(task)
+                feedback = await self.__ser.query(f"{arg}\n")
+            else:
+                raise ValueError(f"text not provided")
+
+        else:
+            raise ValueError(f"'{task}' is not a valid task")
+
+        return feedback
+
+
+class AsyncTasks(_TaskCommands):
+    """
+    Represents the task engine of one board as coroutine, the asyncio counterpart of ``utils.serial_interface.Tasks``.
+
+    ``run()`` polls the board (adaptive intervals, batched and subscribed if the firmware supports it)
+    and executes the queued commands. ``execute()`` is awaitable and cancellable inside the event loop,
+    the ``set_*`` methods can be called from any other thread and return a ``concurrent.futures.Future``.
+    Like ``Tasks``, the queued commands have priority over the polls.
+    """
+
+    def __init__(self, port: str = _STD_PORT, baudrate: int = _STD_BAUDRATE, timeout: float = _STD_TIMEOUT,
+                 subscribe: bool = True, on_status: Callable = None):
+        """
+        :param on_status: The function which gets called (in the event loop) with every changed status snapshot
+                          or None if the board doesn't respond, default to None: Callable
+        """
+
+        self.__comms = AsyncComms(baudrate, port, timeout)
+        self.__poller = _StatusPoller(port)
+        self.__subscribe = subscribe
+        self.__subscribed = None
+        self.__commands = None
+        self.__loop = None
+        self.__task = None
+
+        self.on_status = on_status
+        self.status = None
+        self.running = False
+        self.global_error = False
+
+    @property
+    def port(self):
+        return self.__comms.port
+
+    async def run(self):
+        """
+        Runs the engine until ``stop()`` is called or the task is cancelled.
+        """
+
+        self.__loop = asyncio.get_running_loop()
+        self.__task = asyncio.current_task()
+        self.__commands = asyncio.Queue()
+        self.running = True
+
+        try:
+            await self.__run()
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            self.global_error = True
+            raise
+        finally:
+            self.running = False
+            self.__cancel_commands()
+            await self.__comms.close()
+
+    def stop(self):
+        """
+        Stops the engine. Can be called from any thread.
+        """
+
+        self.running = False
+        if self.__loop is not None and self.__task is not None:
+            self.__loop.call_soon_threadsafe(self.__task.cancel)
+
+    async def __run(self):
+        while self.running:
+            try:
+                if self.__subscribe and self.__subscribed is None:
+                    self.__subscribed = await self.__comms.subscribe(self.__on_event)
+                    self.__poller.subscribed(self.__subscribed)
+
+                await self.__poll()
+
+            except (serial.SerialException, serial.SerialTimeoutException):
+                await self.__wait_for_board()
+                continue
+
+            # wait for the next command until the next field is due
+            timeout = max(self.__poller.next_due() - time.monotonic(), 0)
+            try:
+                command = await asyncio.wait_for(self.__commands.get(), timeout)
+            except asyncio.TimeoutError:
+                continue
+
+            reachable = await self.__exec_command(*command)
+            while reachable and not self.__commands.empty():
+                reachable = await self.__exec_command(*self.__commands.get_nowait())
+
+            self.__poller.reset()
+
+    async def __wait_for_board(self):
+        """
+        Waits until the board responds again.
+        While the port can't be reopened (e.g. the cable is unplugged), the attempts back off.
+        """
+
+        self.__set_status(None)
+
+        if self.__subscribed:
+            self.__subscribed = None
+            self.__poller.subscribed(False)
+
+        backoff = _RECONNECT_BACKOFF[0]
+        while self.running:
+            try:
+                await self.__comms.get_board_state()
+            except serial.SerialTimeoutException:
+                continue
+            except serial.SerialException:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, _RECONNECT_BACKOFF[1])
+            else:
+                break
+
+        self.__poller.reset()
+
+    async def __poll(self):
+        """
+        Polls the fields which are due (see ``_StatusPoller.queries``).
+        """
+
+        start = time.perf_counter()
+        values = {}
+
+        queries = self.__poller.queries(self.status, self.__comms.batch_supported, False,
+                                        lambda: not self.__commands.empty())
+        for fields in queries:
+            if fields is None:
+                values.update((await self.__comms.get_status())._asdict())
+            else:
+                values.update(await self.__comms.get_fields(fields))
+
+        if not values:
+            return
+
+        self.__set_status(self.__poller.apply(self.status, values, start))
+
+    def __on_event(self, field: str, value):
+        if self.status is not None:
+            self.__poller.pushed(field)
+            self.__set_status(self.status._replace(**{field: value}))
+
+    def __set_status(self, status: Optional[BoardStatus]):
+        if status == self.status:
+            return
+
+        self.status = status
+        if self.on_status is not None:
+            self.on_status(status)
+
+    async def __exec_command(self, cmd: str, arg: Optional[str], future: asyncio.Future, queued: float):
+        """
+        Executes a queued command and resolves its future, a failed command doesn't stop the engine
+        (see ``Tasks.__exec_command``).
+
+        :return: Whether the board is still reachable: bool
+        """
+
+        if future.cancelled():
+            return True
+
+        METRICS.observe("tasks_wait_seconds", time.perf_counter() - queued, port=self.port, priority="command")
+
+        try:
+            feedback = await self.__comms.exec_task(cmd, arg)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+
+            # the connection broke and reconnecting failed, the queued commands wait for the board
+            return not isinstance(e, serial.SerialException) or isinstance(e, serial.SerialTimeoutException)
+        else:
+            if not future.done():
+                future.set_result(feedback)
+
+        return True
+
+    def __cancel_commands(self):
+        while self.__commands is not None and not self.__commands.empty():
+            cmd, arg, future, queued = self.__commands.get_nowait()
+            future.cancel()
+
+    async def execute(self, cmd: str, arg: str = None):
+        """
+        Queues the command and waits until it is executed.
+
+        :return: The board's feedback: bytes
+        """
+
+        if not self.running:
+            raise RuntimeError("The engine isn't running.")
+
+        future = self.__loop.create_future()
+        await self.__commands.put((cmd, arg, future, time.perf_counter()))
+        return await future
+
+    def _set_task(self, cmd: str, arg: str = None):
+        """
+        Queues the command from another thread.
+
+        :return: The future which resolves to the board's feedback: concurrent.futures.Future
+        """
+
+        if self.global_error or not self.running:
+            future = concurrent.futures.Future()
+            future.cancel()
+            return future
+
+        return asyncio.run_coroutine_threadsafe(self.execute(cmd, arg), self.__loop)
+
+
+class AsyncLoopThread:
+    """
+    Runs an asyncio event loop in a background thread, which can be shared by any number of ``AsyncTasks``.
+
+    This is the bridge between the Qt event loop and asyncio: coroutines are submitted from the GUI thread and
+    resolve ``concurrent.futures.Future``s, which can be watched with ``utils.threads.FutureWatcher``.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.__thread = threading.Thread(target=self.__run, name="asyncio-loop", daemon=True)
+
+    def __run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def start(self):
+        self.__thread.start()
+
+    def submit(self, coro):
+        """
+        Schedules the coroutine in the event loop.
+
+        :return: The future of the coroutine: concurrent.futures.Future
+        """
+
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def __cancel_all(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stop(self, timeout: float = 2):
+        """
+        Cancels all tasks (which closes their ports) and stops the event loop.
+
+        :param timeout: The maximum time to wait in seconds: float
+        """
+
+        if not self.__thread.is_alive():
+            return
+
+        try:
+            self.submit(self.__cancel_all()).result(timeout)
+        except concurrent.futures.TimeoutError:
+            pass
+
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.__thread.join(timeout)
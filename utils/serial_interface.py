@@ -1,475 +1,2030 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
-if TYPE_CHECKING:
-    from app import MainWindow
-
+import re
 import time
+import zlib
+import queue
+import struct
 import inspect
-from typing import Optional
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Optional, NamedTuple, Callable, Iterable
 
 import serial
-from PyQt5.Qt import *
 
-from utils.common import Color
-from utils.utils import createMessageBox
-from utils.threads import Thread
+from utils.common import dutyCycleToPercent
+from utils.metrics import METRICS
+from utils.trace import TRACE
+
+
+_STD_BAUDRATE = 115200
+_STD_PORT = "COM6"
+_STD_TIMEOUT = 0.5     # seconds
+_FRAME_TERMINATORS = b"\0\n"
+_FRAME_PADDING = b"          "       # 10 spaces, appended by the board to every reply
+_STATUS_SEPARATOR = "|"
+_EVENT_PREFIX = b"\x1e"        # starts an unsolicited state-change frame of a subscribed board
+_FIELD_QUERIES = {
+    "display_state": "get_display_state\n",
+    "text": "get_text\n",
+    "runninglight_state": "get_runninglight_state\n",
+    "runninglight_speed": "get_runninglight_speed\n",
+    "dutycycle": "get_dutycycle\n",
+    "board_state": "get_board_state\n",
+}
+_POLL_INTERVALS = {            # field: (fastest interval, slowest interval) in seconds
+    "board_state": (0.5, 0.5),                # heartbeat
+    "display_state": (0.2, 5.0),
+    "runninglight_state": (0.2, 5.0),
+    "dutycycle": (0.2, 5.0),
+    "runninglight_speed": (0.5, 30.0),
+    "text": (1.0, 60.0),
+}
+_SUBSCRIBED_POLL_INTERVALS = {            # the board pushes its changes, polling is only a safety net
+    "board_state": (5.0, 5.0),                # heartbeat
+    "display_state": (30.0, 300.0),
+    "runninglight_state": (30.0, 300.0),
+    "dutycycle": (30.0, 300.0),
+    "runninglight_speed": (30.0, 300.0),
+    "text": (30.0, 300.0),
+}
+_TASKS_WITHOUT_ARG = ["display_on\n", "display_off\n", "runninglight_on\n", "runninglight_off\n"]
+_TASKS_WITH_ARG = ["update_text\n", "update_runninglight_speed\n", "update_dutycycle\n"]
+_MAX_IDLE = 0.1        # seconds, the loop checks 'Tasks.running' at least this often
+_RECONNECT_BACKOFF = (0.5, 5.0)     # seconds, the first and the longest pause between two attempts to reopen the port
+_UPLOAD_CHUNK_SIZE = 32       # characters of a text per chunk
+_UPLOAD_WINDOW = 4            # chunks which may be unacknowledged at once (they have to fit into the board's buffer)
+_UPLOAD_RETRIES = 3           # retransmissions of a chunk before the upload fails
+_PARSE_RETRIES = 2            # queries of a field which are sent again when the reply is garbled
+_UPLOAD_REPLY = re.compile(rb"(ACK|NAK) (\d+)$")
+_PIPELINE_DEPTH = 8           # pipelined commands which may be unanswered at once (they have to fit into the board's buffer)
+_BINARY_VERSION = 1
+_BINARY_NEGOTIATED = re.compile(rb"BINARY (\d+)$")     # the answer to 'binary <version>', may follow stale bytes
+_BINARY_PORTS = set()           # the ports which this process switched to the binary protocol
+_BINARY_SOF = 0xA5                                # starts a binary frame
+_BINARY_HEADER = struct.Struct("<BBBH")          # start of frame, sequence number, opcode, payload length
+_BINARY_CRC = struct.Struct("<H")
+_BINARY_MAX_PAYLOAD = 1024
+_OPCODES = {             # command: opcode of the binary protocol
+    "get_display_state": 0x01,
+    "get_text": 0x02,
+    "get_runninglight_state": 0x03,
+    "get_runninglight_speed": 0x04,
+    "get_dutycycle": 0x05,
+    "get_board_state": 0x06,
+    "get_all": 0x07,
+    "subscribe": 0x08,
+    "display_on": 0x10,
+    "display_off": 0x11,
+    "runninglight_on": 0x12,
+    "runninglight_off": 0x13,
+    "update_text": 0x20,
+    "update_runninglight_speed": 0x21,
+    "update_dutycycle": 0x22,
+    "begin_text": 0x30,
+    "chunk": 0x31,
+    "end_text": 0x32,
+    "patch_text": 0x33,
+}
+_OPCODE_COMMANDS = {opcode: cmd.encode("cp1252") for cmd, opcode in _OPCODES.items()}
+_OP_ARGUMENT = 0x40      # a line which isn't a command, e.g. the argument line of 'update_text'
+_OP_REPLY = 0x80
+_OP_EVENT = 0x81
+_COMMAND_LABELS = {       # encoded command: the label of its metrics
+    cmd.encode("cp1252"): cmd.rstrip("\n")
+    for cmd in [*_FIELD_QUERIES.values(), *_TASKS_WITHOUT_ARG, *_TASKS_WITH_ARG, "get_all\n", "subscribe\n",
+                "begin_text\n", "end_text\n", "patch_text\n", "binary\n"]
+}
+
+
+class BoardStatus(NamedTuple):
+    """
+    Represents a snapshot of the board's state.
+    """
+
+    display_state: str
+    text: str
+    runninglight_state: str
+    runninglight_speed: int
+    dutycycle: int
+    board_state: str
+
+    @classmethod
+    def from_fields(cls, display_state: str, text: str, runninglight_state: str, runninglight_speed: str,
+                    dutycycle: str, board_state: str):
+        """
+        Validates the decoded replies of the board and returns the snapshot.
+
+        :return: The snapshot: BoardStatus
+        """
+
+        return cls(
+            display_state=cls.parse_field("display_state", display_state),
+            text=cls.parse_field("text", text),
+            runninglight_state=cls.parse_field("runninglight_state", runninglight_state),
+            runninglight_speed=cls.parse_field("runninglight_speed", runninglight_speed),
+            dutycycle=cls.parse_field("dutycycle", dutycycle),
+            board_state=cls.parse_field("board_state", board_state)
+        )
+
+    def to_dict(self):
+        """
+        :return: The snapshot as json-serializable dict, with the brightness in percent: dict
+        """
+
+        result = self._asdict()
+        result["brightness"] = dutyCycleToPercent(self.dutycycle)
+        return result
+
+    @classmethod
+    def from_frame(cls, reply: bytes):
+        """
+        Parses the reply of the batched ``get_all`` query
+        ``<display_state>|<runninglight_state>|<runninglight_speed>|<dutycycle>|<board_state>|<text>``.
+
+        :param reply: The reply of the board: bytes
+
+        :return: The snapshot or None if the reply isn't a status frame: Optional[BoardStatus]
+        """
+
+        fields = reply.decode("cp1252").split(_STATUS_SEPARATOR, 5)
+
+        if len(fields) != 6:
+            return None
+
+        display_state, runninglight_state, runninglight_speed, dutycycle, board_state, text = fields
+
+        return cls.from_fields(
+            display_state=display_state,
+            text=text,
+            runninglight_state=runninglight_state,
+            runninglight_speed=runninglight_speed,
+            dutycycle=dutycycle,
+            board_state=board_state
+        )
+
+    @staticmethod
+    def parse_field(field: str, value: str):
+        """
+        Validates a single decoded reply of the board and converts it to the type of the field.
+
+        :param field: The name of the field: str
+        :param value: The decoded reply: str
+
+        :return: The value of the field: Union[str, int]
+        """
+
+        if field in ["display_state", "runninglight_state"]:
+            if value not in ["ON", "OFF"]:
+                raise ValueError(f"'{field}' is neither 'ON' nor 'OFF': {value}.")
+
+            return value
+
+        elif field in ["runninglight_speed", "dutycycle"]:
+            if not value.isdigit():
+                raise ValueError(f"'{field}' is not a valid number")
+
+            return int(value)
+
+        return value
+
+
+def _parse_event(frame: bytes, port: str):
+    """
+    Parses an unsolicited state-change frame ``<field>|<value>`` (without ``_EVENT_PREFIX``).
+    An unknown or invalid event is dropped and counted.
+
+    :param frame: The frame: bytes
+    :param port: The port, for the metrics: str
+
+    :return: The field and the validated value or None if the frame is invalid: Optional[Tuple[str, Union[str, int]]]
+    """
+
+    field, _, value = frame.decode("cp1252").partition(_STATUS_SEPARATOR)
+
+    if field not in BoardStatus._fields:
+        METRICS.inc("serial_invalid_events_total", port=port)
+        return None
+
+    try:
+        return field, BoardStatus.parse_field(field, value)
+    except ValueError:
+        METRICS.inc("serial_invalid_events_total", port=port)
+        return None
+
+
+def _parse_reply(field: str, reply: bytes, port: str):
+    """
+    Parses the reply to the query of a field, shared by ``_Comms`` and ``AsyncComms``.
+    A garbled reply (e.g. line noise in front of it) is dropped like a lost one and counted.
+
+    :param field: The name of the field (see ``BoardStatus``): str
+    :param reply: The reply: bytes
+    :param port: The port, for the metrics: str
+
+    :return: The validated value of the field or None if the reply is garbled: Optional[Union[str, int]]
+    """
+
+    try:
+        return BoardStatus.parse_field(field, reply.decode("cp1252"))
+    except ValueError:
+        METRICS.inc("serial_parse_errors_total", port=port)
+        return None
+
+
+def _batch_status(reply: Optional[bytes], supported: Optional[bool], port: str):
+    """
+    Interprets the reply to ``get_all``, shared by ``_Comms`` and ``AsyncComms``.
+    A garbled status frame is dropped like a lost one, the fields are queried one by one.
+
+    :param reply: The reply, None if it timed out: Optional[bytes]
+    :param supported: Whether the firmware supports ``get_all`` so far (None if unknown yet): Optional[bool]
+    :param port: The port, for the metrics: str
+
+    :return: The state of the board (None if it has to be queried field by field)
+             and whether the firmware supports ``get_all``: Tuple[Optional[BoardStatus], Optional[bool]]
+    """
+
+    if reply is None:
+        return None, supported
+
+    try:
+        status = BoardStatus.from_frame(reply)
+    except ValueError:
+        # six fields, so the firmware knows 'get_all'
+        METRICS.inc("serial_parse_errors_total", port=port)
+        return None, True
+
+    if status is not None:
+        return status, True
+
+    if supported is None:
+        # the board answered with something else (e.g. an error), so it doesn't know 'get_all'
+        return None, False
+
+    return None, supported
+
+
+def _command_label(encodedString: bytes):
+    """
+    :param encodedString: The encoded command: bytes
+
+    :return: The label of the command for the metrics, the argument lines (e.g. texts) share one label: str
+    """
+
+    label = _COMMAND_LABELS.get(encodedString)
+    if label is None:
+        # a command with its arguments on the same line, e.g. 'begin_text 509'
+        label = _COMMAND_LABELS.get(encodedString.split(b" ", 1)[0].rstrip(b"\n") + b"\n", "argument")
+
+    return label
+
+
+def _chunk_checksum(data: bytes):
+    """
+    :param data: The encoded characters of a chunk: bytes
+
+    :return: The checksum of a chunk (the sum of the bytes modulo 256 as two hex digits): str
+    """
+
+    return f"{sum(data) & 0xFF:02X}"
+
+
+def _text_checksum(text: str):
+    """
+    :param text: The whole text of the display: str
+
+    :return: The CRC-32 of the encoded text as eight hex digits: str
+    """
+
+    return f"{zlib.crc32(text.encode('cp1252')):08X}"
+
+
+def _text_delta(old: str, new: str):
+    """
+    Finds the span which differs between two texts (everything between their common prefix and suffix).
+
+    :param old: The current text: str
+    :param new: The new text: str
+
+    :return: The start and end of the span in the old text and its replacement: Tuple[int, int, str]
+    """
+
+    limit = min(len(old), len(new))
+
+    start = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+
+    suffix = 0
+    while suffix < limit - start and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+
+    return start, len(old) - suffix, new[start:len(new) - suffix]
+
+
+def _pop_frame(buffer: bytearray):
+    """
+    Removes the first complete NUL- or newline-terminated frame from the receive buffer and returns it.
+    Empty frames (e.g. the NUL padding after a reply) are skipped.
+
+    :param buffer: The receive buffer: bytearray
+
+    :return: The frame without its terminator or None if no complete frame is buffered: Optional[bytes]
+    """
+
+    start = 0
+    while start < len(buffer) and buffer[start] in _FRAME_TERMINATORS:
+        start += 1
+    if start:
+        del buffer[:start]
+
+    for i, byte in enumerate(buffer):
+        if byte in _FRAME_TERMINATORS:
+            frame = bytes(buffer[:i])
+            del buffer[:i + 1]
+            return frame
+
+    return None
+
+
+class BinaryFrame(NamedTuple):
+    """
+    Represents a frame of the binary protocol.
+    """
+
+    seq: int
+    opcode: int
+    payload: bytes
+
+
+def _crc16(data: bytes):
+    """
+    :param data: The bytes: bytes
+
+    :return: The CRC-16/CCITT-FALSE of the bytes: int
+    """
+
+    crc = 0xFFFF
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ _CRC16_TABLE[(crc >> 8) ^ byte]
+
+    return crc
+
+
+def _crc16_table():
+    table = []
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021 if crc & 0x8000 else crc << 1) & 0xFFFF
+        table.append(crc)
+
+    return table
+
+
+_CRC16_TABLE = _crc16_table()
+
+
+def _encode_binary(seq: int, opcode: int, payload: bytes = b""):
+    """
+    Encodes a frame of the binary protocol:
+    ``<0xA5> <seq> <opcode> <length: uint16 LE> <payload> <CRC-16 of seq to payload: uint16 LE>``.
+
+    :return: The frame: bytes
+    """
+
+    header = _BINARY_HEADER.pack(_BINARY_SOF, seq & 0xFF, opcode, len(payload))
+    return header + payload + _BINARY_CRC.pack(_crc16(header[1:] + payload))
+
+
+def _pop_binary_frame(buffer: bytearray, complete: bool = False):
+    """
+    Removes the first complete frame of the binary protocol from the receive buffer and returns it.
+    Bytes in front of it and frames with a wrong CRC are discarded (the search restarts behind their start byte).
+
+    :param buffer: The receive buffer: bytearray
+    :param complete: Whether no more bytes are expected (e.g. the read timed out), then an incomplete frame is
+                     discarded too (its start byte was garbage), default to False: bool
+
+    :return: The frame or None if no complete frame is buffered: Optional[BinaryFrame]
+    """
+
+    while True:
+        start = buffer.find(_BINARY_SOF)
+        if start < 0:
+            buffer.clear()
+            return None
+
+        if start:
+            del buffer[:start]
+
+        if len(buffer) < _BINARY_HEADER.size:
+            if not complete:
+                return None
+
+            del buffer[:1]
+            continue
+
+        _, seq, opcode, length = _BINARY_HEADER.unpack_from(buffer)
+        end = _BINARY_HEADER.size + length
+
+        if length > _BINARY_MAX_PAYLOAD:
+            del buffer[:1]
+            continue
+
+        if len(buffer) < end + _BINARY_CRC.size:
+            if not complete:
+                return None
+
+            del buffer[:1]
+            continue
+
+        crc, = _BINARY_CRC.unpack_from(buffer, end)
+        if crc != _crc16(bytes(buffer[1:end])):
+            # not a frame (e.g. garbage which contains the start byte)
+            del buffer[:1]
+            continue
+
+        frame = BinaryFrame(seq, opcode, bytes(buffer[_BINARY_HEADER.size:end]))
+        del buffer[:end + _BINARY_CRC.size]
+        return frame
+
+
+def _binary_opcode(line: bytes, argument: bool = False):
+    """
+    Splits a line of the text protocol (without newline) into the opcode and the payload of its binary frame.
+    The command becomes the opcode and its arguments the payload, an argument line (e.g. the text of
+    ``update_text``) is always sent as ``_OP_ARGUMENT``, whatever it starts with.
+
+    :param line: The line: bytes
+    :param argument: Whether the line is the argument line of the command before, default to False: bool
+
+    :return: The opcode and the payload: Tuple[int, bytes]
+    """
+
+    if argument:
+        return _OP_ARGUMENT, line
+
+    cmd, _, args = line.partition(b" ")
+    opcode = _OPCODES.get(cmd.decode("cp1252"))
+
+    if opcode is None:
+        raise ValueError(f"'{cmd.decode('cp1252')}' is no command of the binary protocol")
+
+    return opcode, args
+
+
+def _line_to_binary(seq: int, line: bytes, argument: bool = False):
+    """
+    Encodes a line of the text protocol (without newline) as binary frame (see ``_binary_opcode``).
+    ``_binary_to_line`` restores the line.
+
+    :return: The frame: bytes
+    """
+
+    return _encode_binary(seq, *_binary_opcode(line, argument))
+
+
+def _binary_to_line(frame: BinaryFrame):
+    """
+    :param frame: A frame which was encoded with ``_line_to_binary``: BinaryFrame
+
+    :return: The line of the text protocol (without newline) or None if the opcode is unknown: Optional[bytes]
+    """
+
+    if frame.opcode == _OP_ARGUMENT:
+        return frame.payload
+
+    cmd = _OPCODE_COMMANDS.get(frame.opcode)
+    if cmd is None:
+        return None
+
+    return cmd + b" " + frame.payload if frame.payload else cmd
+
+
+def _strip_padding(frame: bytes):
+    """
+    Removes the 10 spaces which the board appends to every reply.
+
+    :param frame: The frame: bytes
+
+    :return: The frame without padding: bytes
+    """
+
+    # check if last 10 characters are spaces
+    if frame[-10:] == _FRAME_PADDING:
+        # if yes remove those
+        frame = frame[:-10]
+
+    return frame
+
+
+class _Comms:
+    """
+    Represents the standard communication queries.
+
+    The newer commands (``get_all``, ``begin_text``, ``patch_text``, ``binary``) are probed on their first use and
+    cost a timeout on a firmware which ignores them. With ``legacy`` they are never sent.
+    """
+
+    def __init__(self, baudrate: int = _STD_BAUDRATE, port: str = _STD_PORT, timeout: int = _STD_TIMEOUT,
+                 persistent: bool = True, uploadWindow: int = _UPLOAD_WINDOW, chunkSize: int = _UPLOAD_CHUNK_SIZE,
+                 binary: bool = False, pipelined: bool = False, legacy: bool = False):
+        self.__ser = _Serial(baudrate, port, timeout, persistent, binary and not legacy, pipelined and not legacy)
+        # unknown until the first status query, the first long text and the first text with a known predecessor
+        self.__batch_supported = False if legacy else None
+        self.__chunked_supported = False if legacy else None
+        self.__patch_supported = False if legacy else None
+
+        if uploadWindow < 1 or chunkSize < 1:
+            raise ValueError("'uploadWindow' and 'chunkSize' have to be at least 1")
+
+        self.uploadWindow = uploadWindow
+        self.chunkSize = chunkSize
+
+    @property
+    def binary(self):
+        """
+        Whether the binary protocol is used (negotiated when the port is opened).
+        """
+
+        return self.__ser.binary
+
+    @property
+    def pipelined(self):
+        """
+        Whether the commands are pipelined (the binary protocol is negotiated, see ``_Serial.request``).
+        """
+
+        return self.__ser.pipelining
+
+    @property
+    def transport(self):
+        """
+        The pyserial port (e.g. to inspect a simulated or replayed port).
+        """
+
+        return self.__ser.ser
+
+    def open(self):
+        """
+        Opens the connection to the board and negotiates the protocol (otherwise done by the first query).
+        """
+
+        self.__ser.open()
+
+    def close(self):
+        """
+        Closes the connection to the board.
+        """
+
+        self.__ser.stopReader()
+        self.__ser.close()
+
+    def subscribe(self, on_event: Callable):
+        """
+        Subscribes to the state changes of the board.
+
+        The board acknowledges ``subscribe`` with ``SUBSCRIBED`` and then pushes every change as an unsolicited frame
+        ``<_EVENT_PREFIX><field>|<value>``. These frames are read by a background reader thread and dispatched to
+        ``on_event(field, value)`` (called in the reader thread).
+
+        :param on_event: The function which gets called with the field and the validated value: Callable
+
+        :return: Whether the firmware supports the subscription: bool
+        """
+
+        def on_frame(frame: bytes):
+            event = _parse_event(frame, self.__ser.port)
+            if event is not None:
+                on_event(*event)
+
+        if not self.__ser.persistent:
+            return False
+
+        self.__ser.startReader(on_frame)
+
+        try:
+            reply = self.__ser.serialWrite("subscribe\n")
+        except serial.SerialTimeoutException:
+            reply = None
+
+        if reply != b"SUBSCRIBED":
+            # old firmware, stay with polling
+            self.__ser.stopReader()
+            return False
+
+        return True
+
+    def get_display_state(self):
+        result = self.__ser.serialWrite("get_display_state\n")
+        return result
+
+    def get_text(self):
+        result = self.__ser.serialWrite("get_text\n")
+        return result
+
+    def get_runninglight_state(self):
+        result = self.__ser.serialWrite("get_runninglight_state\n")
+        return result
+
+    def get_runninglight_speed(self):
+        result = self.__ser.serialWrite("get_runninglight_speed\n")
+        return result
+
+    def get_dutycycle(self):
+        result = self.__ser.serialWrite("get_dutycycle\n")
+        return result
+
+    def get_board_state_ser(self):
+        result = self.__ser.serialWrite("get_board_state\n")
+        return result
+
+    def get_field(self, field: str):
+        """
+        Queries a single field of the board's state.
+
+        :param field: The name of the field (see ``BoardStatus``): str
+
+        :return: The validated value of the field: Union[str, int]
+        """
+
+        for _ in range(_PARSE_RETRIES + 1):
+            value = _parse_reply(field, self.__ser.serialWrite(_FIELD_QUERIES[field]), self.__ser.port)
+            if value is not None:
+                return value
+
+        raise serial.SerialTimeoutException(f"The board didn't answer '{field}' with a valid value.")
+
+    def get_fields(self, fields: Iterable[str]):
+        """
+        Queries several fields of the board's state.
+        If the commands are pipelined, all queries are written at once and the replies are collected afterwards,
+        so the fields cost a single turnaround instead of one per field.
+
+        :param fields: The names of the fields (see ``BoardStatus``): Iterable[str]
+
+        :return: The validated values: Dict[str, Union[str, int]]
+        """
+
+        if not self.__ser.pipelining:
+            return {field: self.get_field(field) for field in fields}
+
+        requests = {field: self.__ser.request(_FIELD_QUERIES[field]) for field in fields}
+        values = {
+            field: _parse_reply(field, request.result(), self.__ser.port)
+            for field, request in requests.items()
+        }
+
+        for field, value in values.items():
+            if value is None:
+                # the reply was garbled, ask again
+                values[field] = self.get_field(field)
+
+        return values
+
+    @property
+    def batch_supported(self):
+        """
+        Whether the firmware supports the batched ``get_all`` query (None if unknown yet).
+        """
+
+        return self.__batch_supported
+
+    def get_status(self):
+        """
+        Queries the whole state of the board.
+
+        Sends the batched ``get_all`` query which is answered with a single frame
+        ``<display_state>|<runninglight_state>|<runninglight_speed>|<dutycycle>|<board_state>|<text>``.
+        If the firmware doesn't understand ``get_all``, it falls back to the six single queries (and remembers that).
+
+        :return: The state of the board: BoardStatus
+        """
+
+        if self.__batch_supported is not False:
+            try:
+                reply = self.__ser.serialWrite("get_all\n")
+            except serial.SerialTimeoutException:
+                if self.__batch_supported:
+                    raise
+                reply = None
+
+            status, self.__batch_supported = _batch_status(reply, self.__batch_supported, self.__ser.port)
+            if status is not None:
+                return status
+
+        status = BoardStatus(**self.get_fields(BoardStatus._fields))
+
+        if self.__batch_supported is None:
+            # 'get_all' timed out but the single queries are answered
+            self.__batch_supported = False
+
+        return status
+
+    @property
+    def chunked_supported(self):
+        """
+        Whether the firmware supports the chunked upload of texts (None if unknown yet).
+        """
+
+        return self.__chunked_supported
+
+    @property
+    def patch_supported(self):
+        """
+        Whether the firmware supports ``patch_text`` (None if unknown yet).
+        """
+
+        return self.__patch_supported
+
+    def patch_text(self, current: str, text: str):
+        """
+        Sends only the changed span of the text: ``patch_text <start> <end> <checksum> <replacement>`` replaces the
+        characters from start to end of the board's text. The board only applies the patch if the CRC-32 of the
+        patched text matches (``OK``), otherwise it answers ``MISMATCH`` (e.g. the known text was outdated).
+
+        :param current: The text which is on the display: str
+        :param text: The new text: str
+
+        :return: The feedback of the board or None if the text has to be sent completely: Optional[bytes]
+        """
+
+        start, end, replacement = _text_delta(current, text)
+
+        if len(replacement) > self.chunkSize or len(replacement) >= len(text):
+            # the patch doesn't save anything or wouldn't fit into a chunk
+            return None
+
+        try:
+            reply = self.__ser.serialWrite(f"patch_text {start} {end} {_text_checksum(text)} {replacement}\n")
+        except serial.SerialTimeoutException:
+            if self.__patch_supported:
+                raise
+            reply = None
+
+        if reply == b"OK":
+            self.__patch_supported = True
+            return reply
+
+        if reply == b"MISMATCH":
+            self.__patch_supported = True
+            METRICS.inc("serial_patch_mismatches_total", port=self.__ser.port)
+
+        elif self.__patch_supported is None:
+            # old firmware
+            self.__patch_supported = False
+
+        return None
+
+    def upload_text(self, text: str, on_progress: Callable = None):
+        """
+        Uploads a text in chunks, so a long text doesn't overrun the receive buffer of the board.
+
+        After ``begin_text <length>`` (answered with ``READY``) the chunks ``chunk <seq> <checksum> <data>`` are sent
+        without waiting, but at most ``uploadWindow`` of them are unacknowledged at once. The board answers every chunk
+        with ``ACK <seq>`` or ``NAK <seq>`` (wrong checksum), only a chunk which is refused or not acknowledged in time
+        is sent again. ``end_text`` applies the text.
+
+        :param text: The text: str
+        :param on_progress: The function which gets called with the acknowledged and the total number of characters,
+                            default to None: Callable
+
+        :return: The feedback of the board or None if the firmware doesn't support the chunked upload: Optional[bytes]
+        """
+
+        if not self.__ser.persistent:
+            # the port is closed between the queries, the chunks can't be streamed
+            return None
+
+        try:
+            reply = self.__ser.serialWrite(f"begin_text {len(text)}\n")
+        except serial.SerialTimeoutException:
+            if self.__chunked_supported:
+                raise
+            reply = None
+
+        if reply != b"READY":
+            if self.__chunked_supported:
+                raise serial.SerialException(f"The board refused the upload: {reply!r}")
+
+            # old firmware, send the text at once
+            self.__chunked_supported = False
+            return None
+
+        self.__chunked_supported = True
+
+        chunks = [text[i:i + self.chunkSize] for i in range(0, len(text), self.chunkSize)]
+        lines = [
+            f"chunk {seq} {_chunk_checksum(chunk.encode('cp1252'))} {chunk}\n".encode("cp1252")
+            for seq, chunk in enumerate(chunks)
+        ]
+
+        unsent = list(range(len(chunks)))           # the chunks which have to be sent (again), in order
+        inFlight = {}                               # seq: time of sending, in the order of sending
+        attempts = [0] * len(chunks)
+        acknowledged = 0
+
+        while unsent or inFlight:
+            while unsent and len(inFlight) < self.uploadWindow:
+                seq = unsent.pop(0)
+
+                if attempts[seq] > _UPLOAD_RETRIES:
+                    raise serial.SerialTimeoutException(f"Chunk {seq} of the text wasn't acknowledged.")
+
+                if attempts[seq]:
+                    METRICS.inc("serial_chunk_retries_total", port=self.__ser.port)
+
+                attempts[seq] += 1
+                inFlight[seq] = time.perf_counter()
+                self.__ser.send(lines[seq])
+
+            reply = self.__ser.receive()
+
+            if reply == b"":
+                # timed out, the chunks in flight or their acknowledgements got lost
+                unsent = sorted(inFlight) + unsent
+                inFlight.clear()
+                continue
+
+            match = _UPLOAD_REPLY.search(reply)
+            if match is None or int(match.group(2)) not in inFlight:
+                # garbage or the late acknowledgement of a chunk which is sent again anyway
+                continue
+
+            kind, seq = match.group(1), int(match.group(2))
+
+            # the board answers in order, so the chunks which were sent before got lost
+            lost = []
+            for sentSeq in inFlight:
+                if sentSeq == seq:
+                    break
+                lost.append(sentSeq)
+
+            for lostSeq in lost:
+                del inFlight[lostSeq]
+
+            sentAt = inFlight.pop(seq)
+
+            if kind == b"ACK":
+                METRICS.observe("serial_command_seconds", time.perf_counter() - sentAt,
+                                port=self.__ser.port, command="chunk")
+                acknowledged += len(chunks[seq])
+
+                if on_progress is not None:
+                    on_progress(acknowledged, len(text))
+            else:
+                lost.append(seq)
+
+            unsent = sorted(lost) + unsent
+
+        feedback = self.__ser.serialWrite("end_text\n")
+
+        if feedback != b"OK":
+            raise serial.SerialException(f"The board refused the text: {feedback!r}")
+
+        return feedback
+
+    def exec_task_ser(self, task: str, arg: Optional[str], on_progress: Callable = None, current: str = None):
+        """
+        Executes the task from the GUI.
+
+        If the current text is known, only the changed span of a new text is sent (see ``patch_text``).
+        Otherwise a text which is longer than a chunk is uploaded in chunks if the firmware supports it
+        (see ``upload_text``).
+
+        :param on_progress: The function which gets called with the uploaded and the total number of characters
+                            of a chunked upload, default to None: Callable
+        :param current: The text which is on the display, default to None (unknown): str
+        """
+
+        if task in _TASKS_WITHOUT_ARG:
+            feedback = self.__ser.serialWrite(task)
+
+        elif task in _TASKS_WITH_ARG:
+            if arg is not None:
+                feedback = None
+                if task == "update_text\n" and current is not None and self.__patch_supported is not False:
+                    feedback = self.patch_text(current, arg)
+
+                if (feedback is None and task == "update_text\n" and len(arg) > self.chunkSize
+                        and self.__chunked_supported is not False):
+                    feedback = self.upload_text(arg, on_progress)
+
+                if feedback is None and self.__ser.pipelining:
+                    # the argument line doesn't wait for the acknowledgement of the command line
+                    requests = [self.__ser.request(task), self.__ser.request(f"{arg}\n", argument=True)]
+                    feedback = [request.result() for request in requests][-1]
+
+                elif feedback is None:
+                    feedback = self.__ser.serialWrite(task)
+                    feedback = self.__ser.serialWrite(f"{arg}\n", argument=True)
+            else:
+                raise ValueError(f"text not provided")
+
+        else:
+            raise ValueError(f"'{task}' is not a valid task")
+
+        return feedback
+
+
+class Signal:
+    """
+    Represents a minimal stand-in for a ``pyqtSignal``, e.g. to run ``Tasks.loop`` without Qt.
+    The connected functions are called in the emitting thread.
+    """
+
+    def __init__(self):
+        self.__slots = []
+
+    def connect(self, fn: Callable):
+        self.__slots.append(fn)
+
+    def emit(self, *args):
+        for fn in self.__slots:
+            fn(*args)
+
+
+class _PollScheduler:
+    """
+    Decides which fields of the board's state have to be polled.
+
+    Every field has its own interval which doubles (up to its slowest interval) every time the polled value didn't change
+    and snaps back to the fastest interval when the value changed or a command was executed.
+    """
+
+    def __init__(self, intervals: dict = None):
+        self.__limits = intervals if intervals is not None else _POLL_INTERVALS
+        self.__intervals = {}
+        self.__next = {}
+        self.reset()
+
+    def reset(self):
+        """
+        Polls all fields immediately and with their fastest interval (e.g. after a command was executed).
+        """
+
+        now = time.monotonic()
+        for field, (fastest, slowest) in self.__limits.items():
+            self.__intervals[field] = fastest
+            self.__next[field] = now
+
+    def due(self):
+        """
+        :return: The fields which have to be polled now: List[str]
+        """
+
+        now = time.monotonic()
+        return [field for field, next_ in self.__next.items() if next_ <= now]
+
+    def next_due(self):
+        """
+        :return: The time (``time.monotonic``) at which the next field has to be polled: float
+        """
+
+        return min(self.__next.values())
+
+    def overdue(self, fields: Iterable[str]):
+        """
+        :param fields: The fields which are polled now: Iterable[str]
+
+        :return: The seconds since the first of the fields is due: float
+        """
+
+        now = time.monotonic()
+        return max((now - self.__next[field] for field in fields), default=0.0)
+
+    def polled(self, field: str, changed: bool):
+        """
+        Schedules the next poll of a field.
+
+        :param field: The polled field: str
+        :param changed: Whether the value of the field has changed: bool
+        """
+
+        fastest, slowest = self.__limits[field]
+
+        if changed:
+            interval = fastest
+        else:
+            interval = min(self.__intervals[field] * 2, slowest)
+
+        self.__intervals[field] = interval
+        self.__next[field] = time.monotonic() + interval
+
+
+class _StatusPoller:
+    """
+    Represents the polling of the board's state which is shared by the engines (``Tasks`` and ``AsyncTasks``).
+
+    ``queries`` decides which of the due fields are polled and how, ``apply`` applies the polled values
+    to the last status and schedules the next polls. The engines only execute the queries.
+    A value which was polled before a pushed change of its field arrived (``pushed``) is outdated and dropped.
+    """
+
+    def __init__(self, port: str):
+        self.port = port
+        self.__scheduler = _PollScheduler()
+        self.__pushed = {}          # field: when its last change was pushed (time.perf_counter)
+
+    def subscribed(self, subscribed: Optional[bool]):
+        """
+        Polls at the intervals of a subscribed board or, if the subscription failed or was lost, at the normal ones.
+
+        :param subscribed: Whether the board pushes its changes: Optional[bool]
+        """
+
+        self.__scheduler = _PollScheduler(_SUBSCRIBED_POLL_INTERVALS if subscribed else None)
+
+    def reset(self):
+        """
+        Polls all fields immediately (e.g. after a command was executed).
+        """
+
+        self.__scheduler.reset()
+
+    def next_due(self):
+        """
+        :return: The time (``time.monotonic``) at which the next field has to be polled: float
+        """
+
+        return self.__scheduler.next_due()
+
+    def queries(self, status: Optional[BoardStatus], batchSupported: Optional[bool], pipelined: bool,
+                preempted: Callable[[], bool]):
+        """
+        Yields the queries of the due fields, one per turnaround: None for the whole state (``get_status``)
+        or the fields (``get_fields``).
+        Several due fields are queried at once with ``get_all`` if the firmware supports it (or pipelined).
+        Otherwise a queued command interrupts the single queries, the remaining fields are polled afterwards.
+
+        :param status: The last status, None if unknown: Optional[BoardStatus]
+        :param batchSupported: Whether the firmware supports ``get_all`` (None if unknown yet): Optional[bool]
+        :param pipelined: Whether the queries are pipelined: bool
+        :param preempted: The function which tells whether a command is queued: Callable[[], bool]
+
+        :return: The queries: Iterator[Optional[List[str]]]
+        """
+
+        due = self.__scheduler.due()
+
+        if status is None or (len(due) > 1 and batchSupported is not False):
+            self.__observe_wait(due)
+            yield None
+
+        elif pipelined and due:
+            self.__observe_wait(due)
+            yield due
+
+        else:
+            for field in due:
+                if preempted():
+                    # a queued command goes first, the remaining fields stay due
+                    return
+
+                self.__observe_wait([field])
+                yield [field]
+
+    def pushed(self, field: str):
+        """
+        Records a pushed change of a field, the polls which are in flight don't overwrite it.
+
+        :param field: The changed field: str
+        """
+
+        self.__pushed[field] = time.perf_counter()
+
+    def apply(self, status: Optional[BoardStatus], values: dict, start: float):
+        """
+        Applies only the polled fields, a pushed change of another field may have arrived meanwhile.
+        A polled field which was pushed after the poll started keeps the pushed value.
+
+        :param status: The last status, None if unknown: Optional[BoardStatus]
+        :param values: The polled fields and their values: Dict[str, Union[str, int]]
+        :param start: When the poll started (``time.perf_counter``): float
+
+        :return: The new status: BoardStatus
+        """
+
+        METRICS.observe("tasks_sweep_seconds", time.perf_counter() - start, port=self.port)
+
+        outdated = [field for field in values if self.__pushed.get(field, start) > start]
+        for field in outdated:
+            # the pushed value is newer than the reply
+            del values[field]
+            self.__scheduler.polled(field, True)
+
+        if status is None:
+            polled = BoardStatus(**values)
+        else:
+            polled = status._replace(**values)
+
+        for field in values:
+            changed = status is None or getattr(polled, field) != getattr(status, field)
+            self.__scheduler.polled(field, changed)
+
+        return polled
+
+    def __observe_wait(self, fields: list):
+        METRICS.observe("tasks_wait_seconds", self.__scheduler.overdue(fields), port=self.port, priority="poll")
+
+
+class _TaskCommands:
+    """
+    Represents the commands which can be sent to the board.
+    Validates the arguments and passes the command to ``_set_task`` of the engine.
+    """
+
+    def _set_task(self, cmd: str, arg: str = None):
+        raise NotImplementedError
+
+    def set_display_state(self, state: str):
+        if state == "ON":
+            feedback = self._set_task("display_on\n")
+        elif state == "OFF":
+            feedback = self._set_task("display_off\n")
+        else:
+            raise ValueError("'state' is neither 'ON' nor 'OFF'.")
+
+        return feedback
+
+    def set_text(self, text: str):
+        feedback = self._set_task("update_text\n", text)
+        return feedback
+
+    def set_runninglight_state(self, state: str):
+        if state == "ON":
+            feedback = self._set_task("runninglight_on\n")
+
+        elif state == "OFF":
+            feedback = self._set_task("runninglight_off\n")
+
+        else:
+            raise ValueError("'state' is neither 'ON' nor 'OFF'")
+
+        return feedback
+
+    def set_runninglight_speed(self, speed: str):
+        if speed.isdigit():
+
+            if int(speed) in range(1, 100 + 1):
+                feedback = self._set_task("update_runninglight_speed\n", speed)
+
+            else:
+                raise ValueError("'speed' is not between 1 and 100")
+
+        else:
+            raise ValueError("'speed' is not a valid number")
+
+        return feedback
+
+    def set_brightness(self, duty_cycle: str):
+        if duty_cycle.isdigit():
+
+            if int(duty_cycle) in range(1, 100 + 1):
+                feedback = self._set_task("update_dutycycle\n", duty_cycle)
+
+            else:
+                raise ValueError("'duty_cycle' is not between 1 and 100")
+
+        else:
+            raise ValueError("'duty_cycle' is not a valid number")
+
+        return feedback
+
+
+class Tasks(_TaskCommands):
+    """
+    Represents the task which has to be done.
+
+    The queued commands have priority over the polls: a command is sent at the next frame boundary (a poll of
+    several single fields is interrupted, the remaining fields stay due) and the polls wait until all queued commands
+    are executed.
+    """
+
+    def __init__(self, port: str = _STD_PORT, baudrate: int = _STD_BAUDRATE, timeout: int = _STD_TIMEOUT,
+                 subscribe: bool = True, uploadWindow: int = _UPLOAD_WINDOW, binary: bool = False,
+                 pipelined: bool = False, legacy: bool = False):
+        super().__init__()
+
+        self.port = port
+        self.__comms = _Comms(baudrate, port, timeout, uploadWindow=uploadWindow, binary=binary, pipelined=pipelined,
+                              legacy=legacy)
+
+        self.__commands = queue.Queue()
+        self.__poller = _StatusPoller(port)
+        self.__subscribe = subscribe and not legacy
+        self.__subscribed = None            # unknown until the board responds
+        self.__status_lock = threading.Lock()
+        self.__status_callback = None
+        self.__upload_callback = None
+        self.global_error = False
+
+        self.__board_state_timeout = False
+        self.__close_no_response_error = False
+        self.__reconnect_backoff = _RECONNECT_BACKOFF[0]
+
+        self.status = None            # the last status snapshot, None if the board doesn't respond
+        self.running = True
+
+    def loop(self, progress_callback, status_callback, upload_callback=None):
+        """
+        Task loop.
+
+        Executes the queries and the GUI-task, the GUI-task first.
+        Every changed status of the board is emitted with ``status_callback`` (``None`` if the board doesn't respond),
+        the worker thread never touches the widgets itself.
+
+        :param progress_callback: Emits whether the no-response error is closed: Union[pyqtSignal, Signal]
+        :param status_callback: Emits the status snapshot: Union[pyqtSignal, Signal]
+        :param upload_callback: Emits the uploaded and the total number of characters while a text is uploaded
+                                in chunks, default to None: Union[pyqtSignal, Signal]
+        """
+
+        caller_stack = inspect.stack()
+        caller_func = caller_stack[1][3]
+
+        raise_error = False
+        if not caller_func == "<module>":
+            if "self" in list(caller_stack[1][0].f_locals):
+                caller_class = caller_stack[1][0].f_locals["self"].__class__.__name__
+                caller_method = caller_stack[1][0].f_code.co_name
+                caller = f"{caller_class}.{caller_method}"
+
+                if not caller == "Thread.run":
+                    raise_error = True
+            else:
+                raise_error = True
+
+        else:
+            raise_error = True
+
+        if raise_error:
+            raise Exception("Loop was not called in thread.")
+
+
+        try:
+            self.__loop(progress_callback, status_callback, upload_callback)
+        except BaseException:
+            self.global_error = True
+            raise
+        finally:
+            self.__cancel_commands()
+            self.__comms.close()
+
+    def __loop(self, progress_callback, status_callback, upload_callback):
+        self.__status_callback = status_callback
+        self.__upload_callback = upload_callback
+
+        while True:
+            if not self.running:
+                break
+
+            if self.__board_state_timeout:
+                if not self.__close_no_response_error:
+                    with self.__status_lock:
+                        self.status = None
+                        status_callback.emit(None)
+
+                    progress_callback.emit(self.__close_no_response_error)
+
+                    if self.__subscribed:
+                        # the board may have lost the subscription, subscribe again when it responds
+                        self.__subscribed = None
+                        self.__poller.subscribed(False)
+
+                self.__close_no_response_error = True
+
+                try:
+                    board_state = self.__comms.get_board_state_ser()
+                except serial.SerialTimeoutException:
+                    pass
+                except serial.SerialException:
+                    # the port can't be reopened (e.g. the cable is unplugged), try again later
+                    self.__sleep(self.__reconnect_backoff)
+                    self.__reconnect_backoff = min(self.__reconnect_backoff * 2, _RECONNECT_BACKOFF[1])
+                else:
+                    self.__board_state_timeout = False
+                    self.__reconnect_backoff = _RECONNECT_BACKOFF[0]
+
+                continue
+
+            else:
+                if self.__close_no_response_error:
+                    progress_callback.emit(self.__close_no_response_error)
+                    self.__close_no_response_error = False
+                    self.__poller.reset()           # to immediately update GUI
+
+            # |-------- get real board status --------|
+            try:
+                if self.__subscribe and self.__subscribed is None:
+                    self.__subscribed = self.__comms.subscribe(self.__on_event)
+                    self.__poller.subscribed(self.__subscribed)
+
+                self.__poll(status_callback)
+
+            except (serial.SerialException, serial.SerialTimeoutException):
+                self.__board_state_timeout = True
+                continue
+
+            if not self.running:
+                break
+
+            # wait for the next command until the next field is due, so that a command is executed immediately
+            timeout = min(max(self.__poller.next_due() - time.monotonic(), 0), _MAX_IDLE)
+            try:
+                command = self.__commands.get(timeout=timeout)
+            except queue.Empty:
+                continue
+
+            if self.__exec_command(*command):
+                self.__exec_commands()
+            self.__poller.reset()              # to immediately update GUI
+
+    def __sleep(self, seconds: float):
+        """
+        Waits, but returns as soon as ``running`` is cleared.
+        """
+
+        deadline = time.monotonic() + seconds
+        while self.running and time.monotonic() < deadline:
+            time.sleep(min(deadline - time.monotonic(), _MAX_IDLE))
+
+    def __poll(self, status_callback):
+        """
+        Polls the fields which are due (see ``_StatusPoller.queries``) and emits the status if it has changed.
+        """
+
+        start = time.perf_counter()
+        values = {}
+
+        queries = self.__poller.queries(self.status, self.__comms.batch_supported, self.__comms.pipelined,
+                                        lambda: not self.__commands.empty())
+        for fields in queries:
+            if fields is None:
+                values.update(self.__comms.get_status()._asdict())
+            else:
+                values.update(self.__comms.get_fields(fields))
+
+        if not values:
+            return
+
+        with self.__status_lock:
+            status = self.__poller.apply(self.status, values, start)
+
+            if status != self.status:
+                self.status = status
+                status_callback.emit(status)
+
+    def __on_event(self, field: str, value):
+        """
+        Called in the reader thread when a subscribed board pushes a state change.
+        """
+
+        with self.__status_lock:
+            if self.status is None:
+                return
+
+            self.__poller.pushed(field)
+            status = self.status._replace(**{field: value})
+            if status != self.status:
+                self.status = status
+                self.__status_callback.emit(status)
 
+    def __exec_command(self, cmd: str, arg: Optional[str], future: Future, queued: float):
+        """
+        Executes a queued command and resolves its future.
+        A failed command only fails its future, the loop goes on. If the port can't be reopened, the next poll
+        hands the connection to the reconnect of the loop.
 
-_STD_BAUDRATE = 115200
-_STD_PORT = "COM6"
-_STD_TIMEOUT = 0.5     # seconds
+        :return: Whether the board is still reachable: bool
+        """
 
+        if not future.set_running_or_notify_cancel():
+            return True
 
-class _Comms:
-    """
-    Represents the standard communication queries.
-    """
+        METRICS.observe("tasks_wait_seconds", time.perf_counter() - queued, port=self.port, priority="command")
 
-    def __init__(self, baudrate: int = _STD_BAUDRATE, port: str = _STD_PORT, timeout: int = _STD_TIMEOUT):
-        self.__ser = _Serial(baudrate, port, timeout)
+        on_progress = self.__upload_callback.emit if self.__upload_callback is not None else None
 
-    def get_display_state(self):
-        result = self.__ser.serialWrite("get_display_state\n")
-        return result
+        with self.__status_lock:
+            # the text on the display, so a new text only needs the changed part
+            current = self.status.text if self.status is not None else None
 
-    def get_text(self):
-        result = self.__ser.serialWrite("get_text\n")
-        return result
+        try:
+            feedback = self.__comms.exec_task_ser(cmd, arg, on_progress, current)
+        except serial.SerialTimeoutException as e:
+            future.set_exception(e)
+        except serial.SerialException as e:
+            # the connection broke and reconnecting failed, the queued commands wait for the board
+            future.set_exception(e)
+            return False
+        except Exception as e:
+            future.set_exception(e)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(feedback)
 
-    def get_runninglight_state(self):
-        result = self.__ser.serialWrite("get_runninglight_state\n")
-        return result
+        return True
 
-    def get_runninglight_speed(self):
-        result = self.__ser.serialWrite("get_runninglight_speed\n")
-        return result
+    def __exec_commands(self):
+        """
+        Executes all queued commands, stops if the board isn't reachable any more.
+        """
 
-    def get_dutycycle(self):
-        result = self.__ser.serialWrite("get_dutycycle\n")
-        return result
+        while True:
+            try:
+                command = self.__commands.get_nowait()
+            except queue.Empty:
+                return
 
-    def get_board_state_ser(self):
-        result = self.__ser.serialWrite("get_board_state\n")
-        return result
+            if not self.__exec_command(*command):
+                return
 
-    def exec_task_ser(self, task: str, arg: Optional[str]):
+    def __cancel_commands(self):
         """
-        Executes the task from the GUI.
+        Cancels all queued commands (e.g. when the loop stops).
         """
 
-        if task in ["display_on\n", "display_off\n", "runninglight_on\n", "runninglight_off\n"]:
-            feedback = self.__ser.serialWrite(task)
+        while True:
+            try:
+                cmd, arg, future, queued = self.__commands.get_nowait()
+            except queue.Empty:
+                return
 
-        elif task in ["update_text\n", "update_runninglight_speed\n", "update_dutycycle\n"]:
-            if arg is not None:
-                feedback = self.__ser.serialWrite(task)
-                feedback = self.__ser.serialWrite(f"{arg}\n")
-            else:
-                raise ValueError(f"text not provided")
+            future.cancel()
 
-        else:
-            raise ValueError(f"'{task}' is not a valid task")
+    def _set_task(self, cmd: str, arg: str = None):
+        """
+        Queues the command for the worker thread.
 
-        return feedback
+        :return: The future which resolves to the board's feedback: concurrent.futures.Future
+        """
+
+        future = Future()
 
+        if self.global_error or not self.running:
+            future.cancel()
+        else:
+            self.__commands.put((cmd, arg, future, time.perf_counter()))
+
+        return future
 
-class Tasks:
+class _Request(Future):
     """
-    Represents the task which has to be done.
+    Represents a pipelined command which waits for its reply (see ``_Serial.request``).
+    Resolved by the reader thread with the feedback of the board, or with a ``serial.SerialTimeoutException``
+    if the reply doesn't arrive within the timeout of the port after sending.
     """
 
-    def __init__(self, main_window: MainWindow):
+    def __init__(self, command: bytes, timeout: float, expire: Callable, label: str = None):
         super().__init__()
+        self.command = command
+        self.label = label if label is not None else _command_label(command)
+        self.seq = None
+        self.sent = time.perf_counter()
+        self.deadline = self.sent + timeout
+        self.__expire = expire
+
+    def result(self, timeout: float = None):
+        """
+        :param timeout: The seconds to wait, default to None (until the timeout of the request): float
 
-        self.__main_window = main_window
-        self.__comms = _Comms()
+        :return: The feedback: bytes
+        """
 
-        self.__task = None
-        self.__arg = None
-        self.__feedback = None
-        self.__task_done = False
-        self.global_error = False
+        if timeout is None:
+            timeout = max(self.deadline - time.perf_counter(), 0)
 
-        self.__board_state_timeout = False
-        self.__close_no_response_error = False
+        try:
+            return super().result(timeout)
+        except FutureTimeoutError:
+            # resolves the request unless the reply arrived meanwhile
+            self.__expire(self)
+            return super().result()
 
-        self.__current_speed_slider_value = None
-        self.__old_speed_slider_value = None
 
-        self.__current_dutycycle_slider_value = None
-        self.__old_dutycycle_slider_value = None
-        self.__current_dutycycle = None
-        self.__old_dutycycle = None
+class _Serial:
+    """
+    Represents the serial port to the Nucleo-Board.
+
+    By default the port is kept open across queries (persistent mode) and gets reopened automatically
+    when a ``serial.SerialException`` occurs. With ``persistent=False`` the port is opened and closed around every query.
+    The port can be any URL which is supported by ``serial.serial_for_url`` (e.g. ``COM6``, ``/dev/ttyACM0``, ``loop://``).
+
+    With ``binary=True`` the binary protocol is negotiated (``binary <version>``, answered with
+    ``BINARY <version>``) every time the port is opened, firmware which doesn't support it stays with the text protocol
+    and isn't asked again. Otherwise ``binary 0`` switches a board back to the text protocol if a previous session
+    of this process left it in binary mode, other boards never see the negotiation.
+    The binary protocol is transparent: the lines are sent as frames (see ``_line_to_binary``) and the payloads
+    of the replies are returned like text frames. A reply is only accepted if its sequence number belongs to a sent
+    frame which wasn't answered yet.
+
+    With ``pipelined=True`` (which negotiates the binary protocol) the commands are written without waiting for the
+    previous reply (see ``request``), the reader thread resolves every command by the sequence number of its reply.
+    Commands of several threads share the port without waiting for each other. Firmware without the binary protocol
+    stays lock-step.
+    """
 
-        self.running = True
+    def __init__(self, baudrate: int, port: str, timeout: int = None, persistent: bool = True, binary: bool = False,
+                 pipelined: bool = False):
+        self.baudrate = baudrate
+        self.port = port
+        self.timeout = timeout
+        self.persistent = persistent
+        self.pipelined = pipelined and persistent
+        self.useBinary = (binary or pipelined) and persistent    # the negotiation would be repeated for every query
+        self.binary = False                             # whether the binary protocol is negotiated
+        self.binarySupported = None                     # whether the firmware supports it (None if unknown yet)
+        self.reconnects = 0
+        self.__rx_buffer = bytearray()
+        self.__seq = 0
+        self.__unanswered = set()                       # the sequence numbers of the sent binary frames
+        self.__pending = {}                             # seq: the pipelined request which waits for its reply
+        self.__pending_lock = threading.Lock()
+        self.__write_lock = threading.Lock()
+        self.__slots = threading.BoundedSemaphore(_PIPELINE_DEPTH)
+
+        self.__reader = None
+        self.__reader_running = False
+        self.__reader_error = None
+        self.__on_event = None
+        self.__replies = queue.Queue()
+
+        self.ser = serial.serial_for_url(self.port, do_not_open=True)
+        self.ser.baudrate = self.baudrate
+        self.ser.timeout = self.timeout
+        self.ser.write_timeout = self.timeout
 
-    def loop(self, progress_callback):
+    def open(self):
         """
-        Task loop.
-
-        Executes the queries and the GUI-task.
+        Opens the port if it isn't already open.
         """
 
-        caller_stack = inspect.stack()
-        caller_func = caller_stack[1][3]
+        if self.ser.is_open:
+            return
 
-        raise_error = False
-        if not caller_func == "<module>":
-            if "self" in list(caller_stack[1][0].f_locals):
-                caller_class = caller_stack[1][0].f_locals["self"].__class__.__name__
-                caller_method = caller_stack[1][0].f_code.co_name
-                caller = f"{caller_class}.{caller_method}"
+        try:
+            self.ser.open()
+        except Exception as e:
+            METRICS.inc("serial_open_errors_total", port=self.port)
+            self.ser.close()
+
+            if "PermissionError" in str(e):
+                raise serial.SerialException(f"{e}. Make sure this COM Port exists and isn't already in use.")
 
-                if not caller == "Thread.run":
-                    raise_error = True
             else:
-                raise_error = True
+                raise serial.SerialException(e)
+
+        self.binary = False
+        self.__rx_buffer.clear()
+        self.__negotiate()
 
+    def __negotiate(self):
+        """
+        Switches to the binary protocol if it is used and the firmware supports it. Otherwise a board which this process
+        switched to the binary protocol before (e.g. another ``_Serial`` of the port) is switched back (``binary 0``).
+        Firmware which doesn't answer the negotiation isn't asked again, so only the first open pays the timeout.
+        """
+
+        if self.useBinary and self.binarySupported is not False:
+            version = _BINARY_VERSION
+        elif not self.useBinary and self.port in _BINARY_PORTS:
+            version = 0
         else:
-            raise_error = True
+            return
 
-        if raise_error:
-            raise Exception("Loop was not called in thread.")
+        try:
+            reply = self.__exchange(f"binary {version}\n".encode("cp1252"))
+        except serial.SerialTimeoutException:
+            reply = b""
+
+        answer = _BINARY_NEGOTIATED.search(reply)
+        while answer is None and _BINARY_SOF in reply:
+            # late binary frames of the session before the port was reopened (e.g. pipelined commands),
+            # the board answers in order, so the answer to the negotiation comes last
+            reply = self.receive() or b""
+            answer = _BINARY_NEGOTIATED.search(reply)
+
+        if not reply:
+            # old firmware which ignores unknown commands (or no board), a board which negotiated before was only slow
+            if version and self.binarySupported is None:
+                self.binarySupported = False
+            return
+
+        negotiated = int(answer.group(1)) if answer is not None else None
+
+        if not version:
+            if negotiated == 0:
+                _BINARY_PORTS.discard(self.port)
+
+        elif negotiated == _BINARY_VERSION:
+            self.binary = self.binarySupported = True
+            self.__rx_buffer.clear()
+            _BINARY_PORTS.add(self.port)
+
+        else:
+            # old firmware which refuses unknown commands
+            self.binarySupported = False
 
+    @property
+    def pipelining(self):
+        """
+        Whether the commands are pipelined (the port is open and the binary protocol is negotiated).
+        """
 
-        wait_pv = 0
-        wait_cyc = 0
+        return self.pipelined and self.binary and self.ser.is_open
 
-        while True:
-            if not self.running:
-                break
+    def close(self):
+        """
+        Closes the port. Does nothing if the port is already closed.
+        """
 
-            if self.__board_state_timeout:
-                self.__main_window.displayBtn_ONOFF.setDisabled(True)
-                self.__main_window.displayBtn_ONOFF.setStyleSheet("color: #000000")
-                self.__main_window.displayBtn_ONOFF.setText("...")
-                self.__main_window.displayBtn_UpdateText.setDisabled(True)
-                self.__main_window.currentText_ScrollLabel.setText("Loading...")
-                self.__main_window.runningLightBtn_ONOFF.setDisabled(True)
-                self.__main_window.runningLightBtn_ONOFF.setStyleSheet("color: #000000")
-                self.__main_window.runningLightBtn_ONOFF.setText("...")
-                self.__main_window.runningLightCurrentSpeed_Label.setText(f"Current Speed: ...")
-                self.__main_window.runningLightSpeed_Slider.setDisabled(True)
-                self.__main_window.currentBrightness_Label.setText(f"Current Brightness: ...")
-                self.__main_window.brightness_Slider.setDisabled(True)
-
-                print("board timeout")
+        if self.ser.is_open:
+            self.ser.close()
 
-                if not self.__close_no_response_error:
-                    progress_callback.emit(self.__close_no_response_error)
+    def reconnect(self):
+        """
+        Closes and reopens the port and discards any stale bytes in the input buffer.
+        A running reader thread is restarted.
+        """
 
-                self.__close_no_response_error = True
+        on_event = self.__on_event
+        self.stopReader()
 
-                try:
-                    board_state = self.__comms.get_board_state_ser()
-                except serial.SerialTimeoutException:
-                    pass
-                else:
-                    self.__board_state_timeout = False
+        self.close()
+        self.open()
+        self.discardInput()
+        self.reconnects += 1
+        METRICS.inc("serial_reconnects_total", port=self.port)
+
+        if on_event is not None:
+            self.startReader(on_event)
+
+    def startReader(self, on_event: Callable):
+        """
+        Starts the background reader thread which owns all reads from now on.
+        Unsolicited frames starting with ``_EVENT_PREFIX`` are passed to ``on_event`` (without prefix),
+        every other frame is the reply to the last command (or resolves the pipelined request with its sequence number).
+
+        :param on_event: The function which gets called with an unsolicited frame, None drops them: Callable
+        """
+
+        if self.__reader is not None:
+            self.__on_event = on_event
+            return
+
+        self.open()
+
+        self.__on_event = on_event
+        self.__reader_error = None
+        self.__reader_running = True
+        self.__reader = threading.Thread(target=self.__readLoop, name=f"serial-reader-{self.port}", daemon=True)
+        self.__reader.start()
+
+    def stopReader(self):
+        """
+        Stops the background reader thread. Does nothing if it isn't running.
+        """
 
+        if self.__reader is None:
+            return
+
+        self.__reader_running = False
+        if self.__reader is not threading.current_thread():
+            self.__reader.join()
+
+        self.__reader = None
+        self.__on_event = None
+        self.__failPending(serial.SerialException("The port was closed before the reply arrived."))
+
+    def __readLoop(self):
+        while self.__reader_running:
+            try:
+                frame = self.readFrame(returnPartial=False)
+            except (serial.SerialException, OSError) as e:
+                # the next command raises it and reconnects
+                self.__reader_error = e
+                self.__failPending(serial.SerialException(f"Read operation failed! Error: {e}"))
+                return
+
+            now = time.perf_counter()
+            with self.__pending_lock:
+                expired = [request for request in self.__pending.values() if request.deadline < now]
+
+            for request in expired:
+                self.__expire(request)
+
+            if frame is None:
                 continue
 
+            if frame.startswith(_EVENT_PREFIX):
+                if self.__on_event is not None:
+                    self.__on_event(frame[len(_EVENT_PREFIX):])
             else:
-                if self.__close_no_response_error:
-                    progress_callback.emit(self.__close_no_response_error)
-                    self.__close_no_response_error = False
-                    wait_pv = wait_cyc        # to immediately update GUI
+                self.__replies.put(frame)
 
-                    self.__main_window.runningLightSpeed_Slider.setEnabled(True)
-                    self.__main_window.brightness_Slider.setEnabled(True)
+    def request(self, string: str, argument: bool = False):
+        """
+        Writes a command without waiting for the replies of the commands before (pipelining, see ``pipelining``).
 
-            if wait_pv >= wait_cyc:
-                print("sec loop")
-                wait_pv = 0
+        :param string: The command: str
+        :param argument: Whether the line is the argument line of the command before, default to False: bool
 
-                if not self.running:
-                    break
+        :return: The request which resolves to the feedback: _Request
+        """
 
-                # |-------- get real display state --------|
-                try:
-                    button_state = self.__comms.get_display_state()
-                    button_state = button_state.decode("cp1252")
+        self.open()
 
-                except (serial.SerialException, serial.SerialTimeoutException):
-                    print("display_error")
-                    self.__board_state_timeout = True
-                    continue
+        if not self.pipelining:
+            raise serial.SerialException("Pipelining needs the binary protocol.")
 
-                else:
-                    if button_state == "ON":
-                        button_state = "OFF"
-                        color = Color.red
-                    elif button_state == "OFF":
-                        button_state = "ON"
-                        color = Color.green
-                    else:
-                        raise ValueError(f"'button_state' is neither 'ON' nor 'OFF': {button_state}.")
+        if self.__reader is None:
+            self.startReader(self.__on_event)
 
-                    self.__main_window.displayBtn_ONOFF.setStyleSheet("color: #{}".format(color))
-                    self.__main_window.displayBtn_ONOFF.setText(button_state)
-                    self.__main_window.displayBtn_ONOFF.setEnabled(True)
+        if self.__reader_error is not None:
+            raise serial.SerialException(f"Read operation failed! Error: {self.__reader_error}")
 
-                if not self.running:
-                    break
+        if not self.__slots.acquire(timeout=self.timeout):
+            METRICS.inc("serial_timeouts_total", port=self.port)
+            raise serial.SerialTimeoutException("Too many commands weren't answered.")
 
+        encodedString = bytes(string, "cp1252")
+        request = _Request(encodedString, self.timeout, self.__expire, "argument" if argument else None)
 
-                # |-------- get real text --------|
-                try:
-                    text = self.__comms.get_text()
-                    text = text.decode("cp1252")
+        try:
+            self.send(encodedString, request, argument)
+        except BaseException:
+            if not self.__resolve(request, None):
+                # it wasn't registered
+                self.__slots.release()
+            raise
 
-                except serial.SerialTimeoutException:
-                    print("text_error")
-                    self.__board_state_timeout = True
-                    continue
+        return request
 
-                else:
-                    self.__main_window.currentText_ScrollLabel.setText(text)
+    def __resolve(self, request: _Request, feedback: Optional[bytes], error: BaseException = None):
+        """
+        Removes a pipelined request and resolves it with the feedback or the error.
+        Does nothing if it was resolved already.
 
+        :return: Whether the request was resolved: bool
+        """
 
-                # |-------- get real running light state --------|
-                try:
-                    runninglight_state = self.__comms.get_runninglight_state()
-                    runninglight_state = runninglight_state.decode("cp1252")
+        with self.__pending_lock:
+            if self.__pending.get(request.seq) is not request:
+                return False
 
-                except (serial.SerialException, serial.SerialTimeoutException):
-                    print("runninglight_state_error")
-                    self.__board_state_timeout = True
-                    continue
+            del self.__pending[request.seq]
 
-                else:
-                    if runninglight_state == "ON":
-                        runninglight_state = "OFF"
-                        color = Color.red
-                    elif runninglight_state == "OFF":
-                        runninglight_state = "ON"
-                        color = Color.green
-                    else:
-                        raise ValueError("'runninglight_state' is neither 'ON' nor 'OFF'.")
+        self.__slots.release()
 
-                    self.__main_window.runningLightBtn_ONOFF.setStyleSheet("color: #{}".format(color))
-                    self.__main_window.runningLightBtn_ONOFF.setText(runninglight_state)
-                    self.__main_window.runningLightBtn_ONOFF.setEnabled(True)
+        if error is not None:
+            request.set_exception(error)
+        elif feedback is not None:
+            METRICS.observe("serial_command_seconds", time.perf_counter() - request.sent,
+                            port=self.port, command=request.label)
+            request.set_result(feedback)
 
+        return True
 
-                # |-------- get real running light speed --------|
-                try:
-                    runninglight_speed = self.__comms.get_runninglight_speed()
-                    runninglight_speed = runninglight_speed.decode("cp1252")
-                except (serial.SerialException, serial.SerialTimeoutException):
-                    print("runninglight_speed_error")
-                    self.__board_state_timeout = True
-                    continue
+    def __expire(self, request: _Request):
+        if self.__resolve(request, None, serial.SerialTimeoutException(
+                "Read operation timed out and didn't receive any feedback.")):
+            METRICS.inc("serial_timeouts_total", port=self.port)
 
-                else:
-                    if runninglight_speed.isdigit():
-                        self.__main_window.runningLightCurrentSpeed_Label.setText(f"Current Speed: {runninglight_speed}%")
-                        self.__main_window.runningLightSpeed_Slider.setEnabled(True)
+    def __failPending(self, error: BaseException):
+        with self.__pending_lock:
+            requests = list(self.__pending.values())
 
-                        self.__current_speed_slider_value = runninglight_speed
-                        if self.__current_speed_slider_value != self.__old_speed_slider_value:
-                            percent = [int(s) for s in runninglight_speed.split() if s.isdigit()]
-                            self.__main_window.runningLightSpeed_Slider.setValue(percent[0])
-                            self.__old_speed_slider_value = self.__current_speed_slider_value
+        for request in requests:
+            self.__resolve(request, None, error)
 
-                    else:
-                        raise ValueError("'runninglight_speed' is not a valid number")
+    def receive(self):
+        """
+        Returns the next frame, either read directly or from the reader thread.
 
+        :return: The frame, empty if nothing was received: bytes
+        """
 
-                    # |-------- get real duty cycle --------|
-                    try:
-                        duty_cycle = self.__comms.get_dutycycle()
-                        duty_cycle = duty_cycle.decode("cp1252")
-                    except (serial.SerialException, serial.SerialTimeoutException):
-                        print("dutycycle_error")
-                        self.__board_state_timeout = True
-                        continue
+        if self.__reader is None:
+            return self.readFrame()
 
-                    else:
-                        if duty_cycle.isdigit():
-                            duty_cycle_percent = round((100 / 16) * int(duty_cycle))
+        if self.__reader_error is not None:
+            raise serial.SerialException(f"Read operation failed! Error: {self.__reader_error}")
 
-                            self.__main_window.currentBrightness_Label.setText(f"Current Brightness: {duty_cycle_percent}%")
-                            self.__main_window.brightness_Slider.setEnabled(True)
+        try:
+            return self.__replies.get(timeout=self.timeout)
+        except queue.Empty:
+            return b""
 
-                            self.__current_dutycycle = duty_cycle_percent
-                            if self.__current_dutycycle != self.__old_dutycycle:
-                                self.__main_window.brightness_Slider.setValue(duty_cycle_percent)
+    def __exchange(self, encodedString: bytes, argument: bool = False):
+        """
+        Writes the encoded string to the (open) port and returns the feedback of the board.
 
-                                self.__old_dutycycle = self.__current_dutycycle
+        :param encodedString: The encoded command: bytes
+        :param argument: Whether the line is the argument line of the command before, default to False: bool
 
-                        else:
-                            raise ValueError("'duty_cycle' is not a valid number")
+        :return: The feedback: bytes
+        """
 
+        self.discardInput()
 
-                # |-------- get board state --------|
-                try:
-                    board_state = self.__comms.get_board_state_ser()
-                except serial.SerialTimeoutException:
-                    print("board_error")
-                    self.__board_state_timeout = True
-                    continue
+        start = time.perf_counter()
+        self.send(encodedString, argument=argument)
 
-                else:
-                    self.__main_window.displayBtn_UpdateText.setEnabled(True)
+        feedback = self.receive()
 
-                if not self.running:
-                    break
+        if feedback is None or feedback == b"":
+            METRICS.inc("serial_timeouts_total", port=self.port)
+            raise serial.SerialTimeoutException(f"Read operation timed out and didn't receive any feedback.")
 
-            else:
-                wait_pv += 1
+        METRICS.observe("serial_command_seconds", time.perf_counter() - start,
+                        port=self.port, command="argument" if argument else _command_label(encodedString))
 
-            if not self.running:
-                break
+        return feedback
 
-            if self.__task is not None:
-                feedback = self.__comms.exec_task_ser(self.__task, self.__arg)
-                self.__feedback = feedback
-                self.__task_done = True
-                self.__task = None
-                wait_pv = wait_cyc           # to immediately update GUI
+    def send(self, encodedString: bytes, request: _Request = None, argument: bool = False):
+        """
+        Writes the encoded string to the (open) port without waiting for the feedback.
 
-            time.sleep(0.01)
+        :param encodedString: The encoded command: bytes
+        :param request: The pipelined request which gets resolved by the reply, default to None: _Request
+        :param argument: Whether the line is the argument line of the command before (the binary protocol frames
+                         it as ``_OP_ARGUMENT``), default to False: bool
+        """
 
-    def __set_task(self, cmd: str, arg: str = None):
-        self.__task = cmd
-        self.__arg = arg
+        with self.__write_lock:
+            data = encodedString
+            if self.binary:
+                opcode, payload = _binary_opcode(encodedString[:-1] if encodedString.endswith(b"\n") else encodedString,
+                                                 argument)
+
+                with self.__pending_lock:
+                    # skip the sequence numbers which still wait for their reply
+                    self.__seq = (self.__seq + 1) & 0xFF
+                    while self.__seq in self.__pending:
+                        self.__seq = (self.__seq + 1) & 0xFF
+
+                    if request is not None:
+                        request.seq = self.__seq
+                        self.__pending[self.__seq] = request
+                    else:
+                        self.__unanswered.add(self.__seq)
 
-        while not self.__task_done and not self.global_error:
-            pass
+                data = _encode_binary(self.__seq, opcode, payload)
 
-        self.__task_done = False
-        return self.__feedback, self.global_error
+            try:
+                bytes_ = self.ser.write(data)
+            except serial.SerialTimeoutException:
+                raise
+            except Exception as e:
+                raise serial.SerialException(f"Write operation failed! Error: {e}")
 
-    def set_display_state(self, state: str):
-        if state == "ON":
-            feedback = self.__set_task("display_on\n")
-        elif state == "OFF":
-            feedback = self.__set_task("display_off\n")
-        else:
-            raise ValueError("'state' is neither 'ON' nor 'OFF'.")
+            if bytes_ != len(data):
+                raise serial.SerialException(f"Write operation failed!")
 
-        return feedback
+            METRICS.inc("serial_bytes_sent_total", bytes_, port=self.port)
+            TRACE.record(self.port, "tx", data)
 
-    def set_text(self, text: str):
-        feedback = self.__set_task("update_text\n", text)
-        return feedback
+    def readFrame(self, returnPartial: bool = True):
+        """
+        Reads until a NUL- or newline-terminated frame arrives and returns it without terminator and padding.
+        Returns as soon as the terminator is received instead of waiting for the timeout.
+        Bytes behind the terminator stay buffered for the next call.
 
-    def set_runninglight_state(self, state: str):
-        if state == "ON":
-            feedback = self.__set_task("runninglight_on\n")
+        If the timeout expires, the partially received frame is returned (e.g. firmware without terminator).
 
-        elif state == "OFF":
-            feedback = self.__set_task("runninglight_off\n")
+        :param returnPartial: Whether the partial frame is returned when the timeout expires, otherwise it stays
+                              buffered and None is returned (default to True): bool
 
-        else:
-            raise ValueError("'state' is neither 'ON' nor 'OFF'")
+        :return: The frame, empty if nothing was received: Optional[bytes]
+        """
 
-        return feedback
+        if self.binary:
+            return self.__readBinaryFrame(returnPartial)
 
-    def set_runninglight_speed(self, speed: str):
-        if speed.isdigit():
+        frame = _pop_frame(self.__rx_buffer)
+        while frame is None:
+            chunk = self.ser.read(max(1, self.ser.in_waiting))
 
-            if int(speed) in range(1, 100 + 1):
-                feedback = self.__set_task("update_runninglight_speed\n", speed)
+            if not chunk:
+                if not returnPartial:
+                    return None
 
-            else:
-                raise ValueError("'speed' is not between 1 and 100")
+                # timeout, return what we got so far
+                frame = bytes(self.__rx_buffer)
+                self.__rx_buffer.clear()
+                break
 
-        else:
-            raise ValueError("'speed' is not a valid number")
+            METRICS.inc("serial_bytes_received_total", len(chunk), port=self.port)
+            TRACE.record(self.port, "rx", chunk)
 
-        return feedback
+            self.__rx_buffer += chunk
+            frame = _pop_frame(self.__rx_buffer)
 
-    def set_brightness(self, duty_cycle: str):
-        if duty_cycle.isdigit():
+        return _strip_padding(frame)
 
-            if int(duty_cycle) in range(1, 100 + 1):
-                feedback = self.__set_task("update_dutycycle\n", duty_cycle)
+    def __readBinaryFrame(self, returnPartial: bool):
+        """
+        Reads until a reply to a sent frame or an event arrives (the binary counterpart of ``readFrame``).
+        The replies of pipelined requests resolve them on the way.
 
-            else:
-                raise ValueError("'duty_cycle' is not between 1 and 100")
+        :return: The payload of a reply, ``_EVENT_PREFIX`` and the payload of an event, empty or None (depending on
+                 ``returnPartial``) if nothing was received: Optional[bytes]
+        """
 
-        else:
-            raise ValueError("'duty_cycle' is not a valid number")
+        timedOut = False
+        while True:
+            # after the timeout, a frame may still hide behind garbage which looked like the beginning of a frame
+            frame = _pop_binary_frame(self.__rx_buffer, complete=timedOut)
 
-        return feedback
+            if frame is None:
+                if timedOut:
+                    return b"" if returnPartial else None
 
-class _Serial:
+                chunk = self.ser.read(max(1, self.ser.in_waiting))
 
-    def __init__(self, baudrate: int, port: str, timeout: int = None):
-        self.baudrate = baudrate
-        self.port = port
-        self.timeout = timeout
+                if not chunk:
+                    timedOut = True
+                    continue
 
-        self.ser = serial.Serial()
-        self.ser.baudrate = self.baudrate
-        self.ser.port = self.port
-        self.ser.timeout = self.timeout
-        self.ser.write_timeout = self.timeout
+                METRICS.inc("serial_bytes_received_total", len(chunk), port=self.port)
+                TRACE.record(self.port, "rx", chunk)
 
-    def serialWrite(self, string: str):
+                self.__rx_buffer += chunk
 
-        try:
-            self.ser.open()
-        except Exception as e:
-            print(f"ERROR OPENING: {e}")
-            self.ser.close()
+            elif frame.opcode == _OP_EVENT:
+                return _EVENT_PREFIX + frame.payload
 
-            if "PermissionError" in e.args[0]:
-                raise serial.SerialException(f"{e}. Make sure this COM Port exists and isn't already in use.")
+            elif frame.opcode == _OP_REPLY:
+                request = self.__pending.get(frame.seq)
 
-            else:
-                raise serial.SerialException(e)
-        else:
-            encodedString = bytes(string, "cp1252")
+                if request is not None:
+                    self.__resolve(request, frame.payload)
 
-            try:
-                bytes_ = self.ser.write(encodedString)
-            except Exception as e:
-                self.ser.close()
-                raise serial.SerialException(f"Write operation failed! Error: {e}")
+                elif frame.seq in self.__unanswered:
+                    self.__unanswered.discard(frame.seq)
+                    return frame.payload
 
-            if bytes_ != len(encodedString):
-                self.ser.close()
-                raise serial.SerialException(f"Write operation failed!")
+            # else a late reply of a query which timed out
 
-            feedback = self.ser.read(500)
+    def discardInput(self):
+        """
+        Discards buffered and pending input (e.g. padding or a late reply of a timed out query),
+        so that the next frame belongs to the next command.
+        """
 
-            feedback = feedback.split(b"\0")[0]
+        self.__unanswered.clear()
 
-            # check if last 10 characters are spaces
-            if feedback[-10:] == b"          ":
-                # if yes remove those
-                feedback = feedback[:-10]
+        if self.__reader is not None:
+            # the reader thread owns the port, only drop the replies nobody waited for
+            while not self.__replies.empty():
+                self.__replies.get_nowait()
+            return
 
-            print(f"{encodedString=}, {feedback=}")
-            if feedback is None or feedback == b"":
-                self.ser.close()
-                raise serial.SerialTimeoutException(f"Read operation timed out and didn't receive any feedback.")
-            self.ser.close()
+        self.__rx_buffer.clear()
+        if self.ser.in_waiting:
+            self.ser.reset_input_buffer()
 
-            return feedback
+    def serialWrite(self, string: str, argument: bool = False):
+        encodedString = bytes(string, "cp1252")
 
-    def serialRead(self, size: int = 1):
-        try:
-            self.ser.open()
-        except serial.SerialException as e:
-            self.ser.close()
+        if not self.persistent:
+            self.open()
+            try:
+                return self.__exchange(encodedString, argument)
+            finally:
+                self.close()
 
-            if "PermissionError" in e.args[0]:
-                raise serial.SerialException(f"{e}. Make sure this COM Port exists and isn't already in use.")
+        # a port which can't be opened isn't retried here, the caller backs off
+        self.open()
 
-            else:
-                raise serial.SerialException(e)
+        try:
+            if self.pipelining:
+                return self.request(string, argument).result()
+            return self.__exchange(encodedString, argument)
+        except serial.SerialTimeoutException:
+            raise
+        except (serial.SerialException, OSError):
+            # the connection broke (e.g. cable replugged), reconnect once and retry the query
+            self.reconnect()
+            if self.pipelining:
+                return self.request(string, argument).result()
+            return self.__exchange(encodedString, argument)
+
+    def serialRead(self, size: int = 1):
+        self.open()
 
         try:
             result = self.ser.read(size)
         except serial.SerialException as e:
-            self.ser.close()
+            self.close()
             raise serial.SerialException(f"Read operation failed! Error {e}")
 
-        self.ser.close()
+        if not self.persistent:
+            self.close()
 
         return result
@@ -0,0 +1,740 @@
+"""
+Simulator of the Nucleo-Board, speaks the serial protocol of the firmware without any hardware.
+
+The board can be reached in two ways:
+
+* as pyserial URL ``fake://<name>?latency=0.005&baudrate=115200&drop=0.01&garbage=0.01&seed=1``,
+  usable everywhere a port is expected (e.g. ``Tasks("fake://bench")``) once this module is imported,
+* as pseudo terminal (Linux only) for other processes::
+
+    python -m utils.simulator --latency 0.005 --baudrate 115200
+    python -m leuchtturm --port /dev/pts/3 status
+
+The latency is added before every reply, the baud rate throttles both directions (10 bits per byte),
+``drop`` is the probability that a command isn't answered and ``garbage`` the probability that random bytes
+are sent in front of a reply. ``reorder`` is the probability that a binary reply is held back and overtaken by the next
+one. ``silent`` simulates a firmware which ignores unknown commands (e.g. the probes of ``get_all`` or ``binary 1``
+on an old firmware) instead of answering ``ERROR``. ``rxbuffer`` limits the receive buffer of the board in bytes,
+the bytes which don't fit are lost (like an overrun UART). After ``binary 1`` the board speaks the binary protocol
+until the port is closed.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import time
+import queue
+import random
+import signal
+import argparse
+import threading
+from typing import Callable, Dict
+from urllib.parse import urlsplit, parse_qs
+
+import serial
+from serial.serialutil import SerialBase, PortNotOpenError
+
+from utils.serial_interface import (
+    _FRAME_PADDING, _STATUS_SEPARATOR, _EVENT_PREFIX, _FIELD_QUERIES, _BINARY_VERSION, _OP_REPLY, _OP_EVENT,
+    _OP_ARGUMENT, _chunk_checksum, _text_checksum, _encode_binary, _pop_binary_frame, _binary_to_line
+)
+
+
+_STD_STATE = {
+    "display_state": "ON",
+    "text": "Leuchtturm" + " " * 20,
+    "runninglight_state": "OFF",
+    "runninglight_speed": "50",
+    "dutycycle": "8",
+    "board_state": "OK",
+}
+_ERROR_REPLY = "ERROR"
+_NEGOTIATION = re.compile(rb"binary \d+\n")      # a text line which ends the binary protocol
+_ACK_REPLY = "OK"
+_ARG_COMMANDS = {           # command: the field which is set by the argument line
+    "update_text": "text",
+    "update_runninglight_speed": "runninglight_speed",
+    "update_dutycycle": "dutycycle",
+}
+_SWITCH_COMMANDS = {        # command: (field, value)
+    "display_on": ("display_state", "ON"),
+    "display_off": ("display_state", "OFF"),
+    "runninglight_on": ("runninglight_state", "ON"),
+    "runninglight_off": ("runninglight_state", "OFF"),
+}
+_BOARDS: Dict[str, FakeBoard] = {}
+_BOARDS_LOCK = threading.Lock()
+
+
+class FakeBoard:
+    """
+    Represents a simulated Nucleo-Board.
+
+    The host writes its bytes with ``feed``, the board answers every ``\\n``-terminated command on its own worker thread
+    (so latency and throttling don't block the writer) and passes the replies to the attached output.
+    Every reply is padded with 10 spaces and terminated by NUL, like the firmware does.
+    """
+
+    def __init__(self, name: str = None, latency: float = 0.0, baudrate: int = None, dropRate: float = 0.0,
+                 garbageRate: float = 0.0, batch: bool = True, subscribe: bool = True, chunked: bool = True,
+                 patch: bool = True, binary: bool = True, silent: bool = False, rxBuffer: int = None,
+                 seed: int = None, reorderRate: float = 0.0):
+        """
+        :param name: The name of the board, a named board is reachable as ``fake://<name>``, default to None: str
+        :param latency: The time from receiving a command until its reply is sent in seconds (it overlaps for
+                        pipelined commands), default to 0: float
+        :param baudrate: The baud rate which throttles the transmission, default to None (unthrottled): int
+        :param dropRate: The probability that a command isn't answered, default to 0: float
+        :param garbageRate: The probability that random bytes precede a reply, default to 0: float
+        :param batch: Whether the firmware supports ``get_all``, default to True: bool
+        :param subscribe: Whether the firmware supports ``subscribe``, default to True: bool
+        :param chunked: Whether the firmware supports the chunked upload of texts, default to True: bool
+        :param patch: Whether the firmware supports ``patch_text``, default to True: bool
+        :param binary: Whether the firmware supports the binary protocol, default to True: bool
+        :param silent: Whether the firmware ignores unknown commands instead of answering ``ERROR``,
+                       default to False: bool
+        :param rxBuffer: The size of the receive buffer in bytes, default to None (unlimited): int
+        :param seed: The seed of the random faults, default to None: int
+        :param reorderRate: The probability that the reply to a binary frame is sent after the reply to the next one,
+                            default to 0: float
+        """
+
+        self.name = name
+        self.latency = latency
+        self.baudrate = baudrate
+        self.dropRate = dropRate
+        self.garbageRate = garbageRate
+        self.reorderRate = reorderRate
+        self.batch = batch
+        self.subscribe = subscribe
+        self.chunked = chunked
+        self.patch = patch
+        self.binary = binary
+        self.silent = silent
+        self.rxBuffer = rxBuffer
+
+        self.state = dict(_STD_STATE)
+        self.subscribed = False
+        self.unplugged = False
+        self.commands = 0
+        self.dropped = 0
+        self.garbage = 0
+        self.ignored = 0
+        self.reordered = 0
+        self.overruns = 0
+
+        self.__random = random.Random(seed)
+        self.__rx_buffer = bytearray()
+        self.__pending_field = None         # the field of a two-line command which waits for its argument
+        self.__upload = None                # the length and the received chunks of a chunked upload
+        self.__binaryMode = False           # whether the binary protocol was negotiated
+        self.__buffered = 0                 # the bytes in the receive buffer which aren't processed yet
+        self.__buffered_lock = threading.Lock()
+        self.__rx_free = 0.0                # when the line from the host is free again (``time.perf_counter``)
+        self.__tx_free = 0.0                # when the line to the host is free again
+        self.__lines = queue.Queue()
+        self.__output = None
+        self.__output_lock = threading.RLock()          # a collected port may close while attach holds it
+        self.__worker = None
+
+        if name is not None:
+            with _BOARDS_LOCK:
+                _BOARDS[name] = self
+
+    @property
+    def url(self):
+        """
+        The pyserial URL of the board (only for named boards).
+        """
+
+        return f"fake://{self.name}"
+
+    def attach(self, output: Callable):
+        """
+        Connects the board to a transport and starts the worker thread.
+
+        :param output: The function which gets called with the bytes sent by the board: Callable
+        """
+
+        with self.__output_lock:
+            self.__output = output
+
+        if self.__worker is None:
+            self.__worker = threading.Thread(target=self.__run, name=f"fake-board-{self.name}", daemon=True)
+            self.__worker.start()
+
+    def detach(self, output: Callable = None):
+        """
+        Disconnects the board from its transport, like an unplugged cable (the state of the board is kept).
+
+        :param output: Only disconnects if the board is attached to this output (e.g. a port which is closed after
+                       another one was opened), default to None (any output): Callable
+        """
+
+        with self.__output_lock:
+            if output is not None and output != self.__output:
+                return
+
+            self.__output = None
+
+        self.__rx_buffer.clear()
+        self.__pending_field = None
+        self.__upload = None
+        self.__binaryMode = False
+        self.subscribed = False
+
+    def unplug(self):
+        """
+        Unplugs the cable: the port can't be opened until ``plug`` is called and an open port fails
+        like a vanished device.
+        """
+
+        self.unplugged = True
+        self.detach()
+
+    def plug(self):
+        """
+        Plugs the cable in again, the port can be reopened.
+        """
+
+        self.unplugged = False
+
+    def feed(self, data: bytes):
+        """
+        Receives bytes from the host.
+
+        :param data: The bytes: bytes
+        """
+
+        if self.rxBuffer is not None:
+            with self.__buffered_lock:
+                free = max(0, self.rxBuffer - self.__buffered)
+                if len(data) > free:
+                    # overrun, the bytes which don't fit are lost
+                    self.overruns += 1
+                    data = data[:free]
+
+                self.__buffered += len(data)
+
+        self.__rx_buffer += data
+
+        negotiation = _NEGOTIATION.search(self.__rx_buffer) if self.__binaryMode else None
+        if negotiation is not None:
+            # the host negotiates again (e.g. it missed the reply or wants the text protocol), start over with text
+            del self.__rx_buffer[:negotiation.start()]
+            self.__binaryMode = False
+
+        if self.__binaryMode:
+            while True:
+                frame = _pop_binary_frame(self.__rx_buffer)
+                if frame is None:
+                    break
+
+                line = _binary_to_line(frame)
+                size = len(_encode_binary(frame.seq, frame.opcode, frame.payload))
+                self.__lines.put((time.perf_counter(), frame.seq, line if line is not None else b"", size,
+                                  frame.opcode == _OP_ARGUMENT))
+
+            return
+
+        while b"\n" in self.__rx_buffer:
+            line, _, rest = bytes(self.__rx_buffer).partition(b"\n")
+            self.__rx_buffer[:] = rest
+            self.__lines.put((time.perf_counter(), None, line, len(line) + 1, None))
+
+    def set(self, field: str, value: str):
+        """
+        Changes the state like the buttons on the board do and pushes the change to a subscribed host.
+
+        :param field: The field (see ``BoardStatus``): str
+        :param value: The value as the firmware sends it: str
+        """
+
+        self.state[field] = value
+
+        if self.subscribed:
+            event = f"{field}{_STATUS_SEPARATOR}{value}".encode("cp1252")
+
+            if self.__binaryMode:
+                self.__send(_encode_binary(0, _OP_EVENT, event))
+            else:
+                self.__send(_EVENT_PREFIX + event + b"\0")
+
+    def __run(self):
+        held = None         # a reply which is overtaken by the next one
+
+        while True:
+            received, seq, line, size, argument = self.__lines.get()
+
+            reply, changed = self.__handle(line.decode("cp1252"), seq, argument)
+
+            if (reply is not None and seq is not None and held is None and self.reorderRate
+                    and self.__random.random() < self.reorderRate):
+                self.reordered += 1
+                held, reply = reply, None
+
+            # the command is transmitted, processed and the reply transmitted back, every line transmits
+            # one frame after another (pipelined commands queue up on the line)
+            arrived = self.__rx_free = max(received, self.__rx_free) + self.__transmission_time(size)
+            due = arrived + self.latency
+            if reply is not None:
+                due = self.__tx_free = max(due, self.__tx_free) + self.__transmission_time(len(reply))
+            time.sleep(max(0.0, due - time.perf_counter()))
+
+            with self.__buffered_lock:
+                self.__buffered = max(0, self.__buffered - size)
+
+            if reply is not None:
+                self.__send(reply)
+
+                if held is not None:
+                    self.__send(held)
+                    held = None
+
+            if changed is not None:
+                self.set(*changed)
+
+    def __transmission_time(self, size: int):
+        if not self.baudrate:
+            return 0.0
+
+        return 10 * size / self.baudrate
+
+    def __handle(self, cmd: str, seq: int = None, argument: bool = None):
+        """
+        Executes a command line, ``seq`` is the sequence number of a binary frame (None for a text line).
+        ``argument`` tells whether a binary frame is an argument line (``_OP_ARGUMENT``), a text line can only be
+        told apart by the command before (None).
+
+        :return: The encoded reply (None if dropped) and the changed field with its value (or None): tuple
+        """
+
+        self.commands += 1
+        changed = None
+
+        if argument is False:
+            # a command frame, the firmware gives up waiting for a missing argument
+            self.__pending_field = None
+
+        if self.__pending_field is not None:
+            # the argument line of a two-line command
+            changed = (self.__pending_field, cmd)
+            self.__pending_field = None
+            reply = cmd
+
+        elif argument:
+            # an argument frame without a command before
+            reply = _ERROR_REPLY
+
+        elif cmd == "get_all" and self.batch:
+            state = self.state
+            reply = _STATUS_SEPARATOR.join([
+                state["display_state"], state["runninglight_state"], state["runninglight_speed"],
+                state["dutycycle"], state["board_state"], state["text"]
+            ])
+
+        elif cmd == f"binary {_BINARY_VERSION}" and self.binary:
+            # the reply is still text, the next command is a binary frame
+            self.__binaryMode = True
+            reply = f"BINARY {_BINARY_VERSION}"
+
+        elif cmd == "binary 0" and self.binary:
+            # back to the text protocol (a host which doesn't use the binary protocol)
+            self.__binaryMode = False
+            reply = "BINARY 0"
+
+        elif cmd == "subscribe" and self.subscribe:
+            self.subscribed = True
+            reply = "SUBSCRIBED"
+
+        elif f"{cmd}\n" in _FIELD_QUERIES.values():
+            reply = self.state[cmd[len("get_"):]]
+
+        elif cmd in _SWITCH_COMMANDS:
+            changed = _SWITCH_COMMANDS[cmd]
+            reply = _ACK_REPLY
+
+        elif cmd in _ARG_COMMANDS:
+            self.__pending_field = _ARG_COMMANDS[cmd]
+            reply = _ACK_REPLY
+
+        elif self.chunked and cmd.split(" ", 1)[0] in ["begin_text", "chunk", "end_text"]:
+            reply, changed = self.__handle_upload(cmd)
+
+        elif self.patch and cmd.startswith("patch_text "):
+            reply, changed = self.__handle_patch(cmd[len("patch_text "):])
+
+        elif self.silent:
+            # an unknown command, the host waits in vain
+            self.ignored += 1
+            return None, None
+
+        else:
+            reply = _ERROR_REPLY
+
+        if changed is not None and self.state[changed[0]] == changed[1]:
+            changed = None
+
+        if self.dropRate and self.__random.random() < self.dropRate:
+            self.dropped += 1
+            # the command is executed anyway, only the reply gets lost
+            return None, changed
+
+        if seq is not None:
+            encoded = _encode_binary(seq, _OP_REPLY, reply.encode("cp1252"))
+        else:
+            encoded = reply.encode("cp1252") + _FRAME_PADDING + b"\0"
+
+        if self.garbageRate and self.__random.random() < self.garbageRate:
+            self.garbage += 1
+            noise = bytes(self.__random.randrange(0x20, 0x100) for _ in range(self.__random.randint(1, 8)))
+            encoded = noise + encoded
+
+        return encoded, changed
+
+    def __handle_upload(self, cmd: str):
+        """
+        Executes a command of the chunked upload: ``begin_text <length>``, ``chunk <seq> <checksum> <data>``
+        (acknowledged with ``ACK <seq>`` or ``NAK <seq>``) and ``end_text`` which applies the text.
+
+        :return: The reply and the changed field with its value (or None): tuple
+        """
+
+        name, _, args = cmd.partition(" ")
+
+        if name == "begin_text":
+            if not args.isdigit():
+                return _ERROR_REPLY, None
+
+            self.__upload = (int(args), {})
+            return "READY", None
+
+        if self.__upload is None:
+            return _ERROR_REPLY, None
+
+        length, chunks = self.__upload
+
+        if name == "chunk":
+            seq, _, rest = args.partition(" ")
+            checksum, _, data = rest.partition(" ")
+
+            if not seq.isdigit():
+                return _ERROR_REPLY, None
+
+            if _chunk_checksum(data.encode("cp1252")) != checksum:
+                return f"NAK {seq}", None
+
+            chunks[int(seq)] = data
+            return f"ACK {seq}", None
+
+        # end_text
+        self.__upload = None
+        text = "".join(chunks.get(seq, "") for seq in range(len(chunks)))
+
+        if len(text) != length or sorted(chunks) != list(range(len(chunks))):
+            return _ERROR_REPLY, None
+
+        return _ACK_REPLY, ("text", text)
+
+    def __handle_patch(self, args: str):
+        """
+        Executes ``patch_text <start> <end> <checksum> <replacement>`` which replaces the characters from start to end
+        of the text, if the checksum of the patched text matches (otherwise ``MISMATCH``).
+
+        :return: The reply and the changed field with its value (or None): tuple
+        """
+
+        start, _, args = args.partition(" ")
+        end, _, args = args.partition(" ")
+        checksum, _, replacement = args.partition(" ")
+
+        if not start.isdigit() or not end.isdigit() or int(start) > int(end):
+            return _ERROR_REPLY, None
+
+        text = self.state["text"]
+        patched = text[:int(start)] + replacement + text[int(end):]
+
+        if int(end) > len(text) or _text_checksum(patched) != checksum:
+            return "MISMATCH", None
+
+        return _ACK_REPLY, ("text", patched)
+
+    def __send(self, data: bytes):
+        with self.__output_lock:
+            if self.__output is not None:
+                self.__output(data)
+
+
+def getBoard(name: str):
+    """
+    :param name: The name of the board: str
+
+    :return: The board which is reachable as ``fake://<name>`` or None: Optional[FakeBoard]
+    """
+
+    with _BOARDS_LOCK:
+        return _BOARDS.get(name)
+
+
+class FakeSerial(SerialBase):
+    """
+    Represents the pyserial port ``fake://<name>?<options>`` to a simulated board.
+
+    An unknown name creates the board with the options of the URL (``latency``, ``baudrate``, ``drop``, ``garbage``,
+    ``reorder``, ``batch``, ``subscribe``, ``chunked``, ``patch``, ``binary``, ``silent``, ``rxbuffer``, ``seed``),
+    the options of an existing board are ignored.
+    Reopening the port reconnects to the same board, so its state survives a reconnect.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.board = None
+        self.__rx_buffer = bytearray()
+        self.__rx_condition = threading.Condition()
+        super().__init__(*args, **kwargs)
+
+    def open(self):
+        if self.is_open:
+            raise serial.SerialException("Port is already open.")
+
+        if self._port is None:
+            raise serial.SerialException("Port must be configured before it can be used.")
+
+        self.board = self.__board_from_url(self._port)
+        if self.board.unplugged:
+            raise serial.SerialException(f"could not open port {self._port!r}: the board is unplugged")
+
+        self.__rx_buffer.clear()
+        self.board.attach(self.__receive)
+        self.is_open = True
+
+    def close(self):
+        if self.is_open:
+            self.is_open = False
+            self.board.detach(self.__receive)
+
+            with self.__rx_condition:
+                self.__rx_condition.notify_all()
+
+        super().close()
+
+    @staticmethod
+    def __board_from_url(url: str):
+        parts = urlsplit(url)
+
+        if parts.scheme != "fake":
+            raise serial.SerialException(f"expected a string in the form 'fake://<name>[?<options>]': {url!r}")
+
+        name = parts.netloc or "board"
+        board = getBoard(name)
+        if board is not None:
+            return board
+
+        options = {key: values[0] for key, values in parse_qs(parts.query).items()}
+
+        try:
+            return FakeBoard(
+                name=name,
+                latency=float(options.pop("latency", 0.0)),
+                baudrate=int(options.pop("baudrate", 0)) or None,
+                dropRate=float(options.pop("drop", 0.0)),
+                garbageRate=float(options.pop("garbage", 0.0)),
+                batch=options.pop("batch", "true").lower() in ["1", "true", "yes"],
+                subscribe=options.pop("subscribe", "true").lower() in ["1", "true", "yes"],
+                chunked=options.pop("chunked", "true").lower() in ["1", "true", "yes"],
+                patch=options.pop("patch", "true").lower() in ["1", "true", "yes"],
+                binary=options.pop("binary", "true").lower() in ["1", "true", "yes"],
+                silent=options.pop("silent", "false").lower() in ["1", "true", "yes"],
+                rxBuffer=int(options.pop("rxbuffer", 0)) or None,
+                seed=int(options["seed"]) if "seed" in options else None,
+                reorderRate=float(options.pop("reorder", 0.0)),
+            )
+        except ValueError as e:
+            raise serial.SerialException(f"Invalid option of {url!r}: {e}")
+
+    def _reconfigure_port(self, *args):
+        # nothing to configure, the baud rate of the simulation is an option of the board
+        pass
+
+    def __receive(self, data: bytes):
+        with self.__rx_condition:
+            self.__rx_buffer += data
+            self.__rx_condition.notify_all()
+
+    @property
+    def in_waiting(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+
+        return len(self.__rx_buffer)
+
+    def read(self, size: int = 1):
+        if not self.is_open:
+            raise PortNotOpenError()
+
+        if self.board.unplugged:
+            raise serial.SerialException("read failed: the board is unplugged")
+
+        deadline = None if self._timeout is None else time.perf_counter() + self._timeout
+
+        with self.__rx_condition:
+            while len(self.__rx_buffer) < size and self.is_open:
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    break
+
+                self.__rx_condition.wait(remaining)
+
+            data = bytes(self.__rx_buffer[:size])
+            del self.__rx_buffer[:size]
+
+        return data
+
+    def write(self, data):
+        if not self.is_open:
+            raise PortNotOpenError()
+
+        if self.board.unplugged:
+            raise serial.SerialException("write failed: the board is unplugged")
+
+        data = bytes(data)
+        self.board.feed(data)
+        return len(data)
+
+    def reset_input_buffer(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+
+        with self.__rx_condition:
+            self.__rx_buffer.clear()
+
+    def reset_output_buffer(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+
+    @property
+    def out_waiting(self):
+        return 0
+
+    @property
+    def cts(self):
+        return True
+
+    @property
+    def dsr(self):
+        return True
+
+    @property
+    def ri(self):
+        return False
+
+    @property
+    def cd(self):
+        return True
+
+    def _update_rts_state(self):
+        pass
+
+    def _update_dtr_state(self):
+        pass
+
+    def _update_break_state(self):
+        pass
+
+
+class PtyBoard:
+    """
+    Represents a simulated board behind a pseudo terminal (Linux only), so it can be opened by another process
+    like a real serial port.
+    """
+
+    def __init__(self, board: FakeBoard):
+        import tty
+
+        self.board = board
+        self.__master, self.__slave = os.openpty()
+        tty.setraw(self.__slave)
+        self.port = os.ttyname(self.__slave)
+        self.__running = False
+        self.__thread = None
+
+    def start(self):
+        self.board.attach(lambda data: os.write(self.__master, data))
+        self.__running = True
+        self.__thread = threading.Thread(target=self.__run, name=f"pty-board-{self.port}", daemon=True)
+        self.__thread.start()
+
+    def __run(self):
+        while self.__running:
+            try:
+                data = os.read(self.__master, 1024)
+            except OSError:
+                return
+
+            self.board.feed(data)
+
+    def stop(self):
+        self.__running = False
+        self.board.detach()
+        os.close(self.__master)
+        os.close(self.__slave)
+
+
+def register():
+    """
+    Makes the ``fake://`` URLs known to ``serial.serial_for_url``.
+    """
+
+    # pyserial imports 'utils.protocol_fake' for 'fake://'
+    if "utils" not in serial.protocol_handler_packages:
+        serial.protocol_handler_packages.append("utils")
+
+
+register()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="utils.simulator", description="Simulates the Nucleo-Board on a pseudo terminal.")
+    parser.add_argument("--latency", type=float, default=0.0, help="the processing time of a command in seconds")
+    parser.add_argument("--baudrate", type=int, default=None, help="throttles the transmission (default unthrottled)")
+    parser.add_argument("--drop", type=float, default=0.0, help="the probability that a reply gets lost")
+    parser.add_argument("--garbage", type=float, default=0.0, help="the probability of garbage in front of a reply")
+    parser.add_argument("--reorder", type=float, default=0.0,
+                        help="the probability that a binary reply is overtaken by the next one")
+    parser.add_argument("--no-batch", action="store_true", help="simulate a firmware without 'get_all'")
+    parser.add_argument("--no-subscribe", action="store_true", help="simulate a firmware without 'subscribe'")
+    parser.add_argument("--no-chunked", action="store_true", help="simulate a firmware without the chunked upload")
+    parser.add_argument("--no-patch", action="store_true", help="simulate a firmware without 'patch_text'")
+    parser.add_argument("--no-binary", action="store_true", help="simulate a firmware without the binary protocol")
+    parser.add_argument("--silent", action="store_true", help="ignore unknown commands instead of answering 'ERROR'")
+    parser.add_argument("--rxbuffer", type=int, default=None, help="the receive buffer in bytes (default unlimited)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    board = FakeBoard(
+        latency=args.latency, baudrate=args.baudrate, dropRate=args.drop, garbageRate=args.garbage,
+        batch=not args.no_batch, subscribe=not args.no_subscribe, chunked=not args.no_chunked, patch=not args.no_patch,
+        binary=not args.no_binary, silent=args.silent,
+        rxBuffer=args.rxbuffer, seed=args.seed, reorderRate=args.reorder
+    )
+    ptyBoard = PtyBoard(board)
+    ptyBoard.start()
+    print(ptyBoard.port, flush=True)
+
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ptyBoard.stop()
+        print(f"{board.commands} commands, {board.dropped} dropped, {board.garbage} with garbage, "
+              f"{board.reordered} reordered, {board.ignored} ignored, {board.overruns} overruns", file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
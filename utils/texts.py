@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import os
+import json
+import sqlite3
+import threading
+from typing import Iterable
+
+from utils.common import Path
+
+
+_SCHEMA_VERSION = 1
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS texts (
+    id INTEGER PRIMARY KEY,
+    label TEXT NOT NULL UNIQUE,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    text_id INTEGER NOT NULL REFERENCES texts(id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (text_id, tag)
+);
+CREATE INDEX IF NOT EXISTS tags_tag ON tags(tag);
+"""
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS texts_fts USING fts5(label, text, content='texts', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS texts_ai AFTER INSERT ON texts BEGIN
+    INSERT INTO texts_fts(rowid, label, text) VALUES (new.id, new.label, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS texts_ad AFTER DELETE ON texts BEGIN
+    INSERT INTO texts_fts(texts_fts, rowid, label, text) VALUES ('delete', old.id, old.label, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS texts_au AFTER UPDATE ON texts BEGIN
+    INSERT INTO texts_fts(texts_fts, rowid, label, text) VALUES ('delete', old.id, old.label, old.text);
+    INSERT INTO texts_fts(rowid, label, text) VALUES (new.id, new.label, new.text);
+END;
+"""
+
+
+class TextLibrary:
+    """
+    Represents the library of the pre-created texts ``{label: text}`` in an SQLite database.
+
+    Labels are unique and indexed, every text can have tags, and the labels and texts are searchable
+    (full-text search with FTS5 if SQLite supports it, otherwise a substring search).
+    Every change is a single insert/delete, nothing is rewritten. On the first start the texts of
+    ``Path.json_Texts`` are migrated into the database (the json file is kept).
+    """
+
+    def __init__(self, path: str, jsonPath: str = None):
+        """
+        :param path: The path of the database (":memory:" for a temporary one): str
+        :param jsonPath: The path of the json file which gets migrated, default to None: str
+        """
+
+        self.path = path
+        self.jsonPath = jsonPath
+        self.__lock = threading.RLock()
+        self.__connection = None
+        self.__fts = False
+        self.__changes = 0
+
+    @property
+    def _connection(self):
+        """
+        The connection to the database, opened (and migrated) on the first access.
+        """
+
+        if self.__connection is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA foreign_keys = ON")
+            self.__migrate(connection)
+            self.__connection = connection
+
+        return self.__connection
+
+    def __migrate(self, connection: sqlite3.Connection):
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+
+        with connection:
+            connection.executescript(_SCHEMA)
+
+            try:
+                connection.executescript(_FTS_SCHEMA)
+                self.__fts = True
+            except sqlite3.OperationalError:
+                # SQLite without FTS5, the search falls back to LIKE
+                self.__fts = False
+
+            if version < 1 and self.jsonPath is not None and os.path.exists(self.jsonPath):
+                with open(self.jsonPath, "r") as fdata:
+                    texts = json.load(fdata)
+
+                connection.executemany(
+                    "INSERT OR IGNORE INTO texts (label, text) VALUES (?, ?)", sorted(texts.items())
+                )
+
+            connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    def close(self):
+        with self.__lock:
+            if self.__connection is not None:
+                self.__connection.close()
+                self.__connection = None
+
+    def version(self):
+        """
+        Changes whenever the texts or tags change, so views only have to refresh if the version differs from the one
+        they have shown. Changes of this library are counted, changes of other connections (e.g. the daemon) are
+        detected by SQLite's ``data_version``.
+
+        :return: The version: Tuple[int, int]
+        """
+
+        with self.__lock:
+            return self.__changes, self._connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def texts(self):
+        """
+        :return: The texts sorted by label: Dict[label: str, text: str]
+        """
+
+        with self.__lock:
+            return dict(self._connection.execute("SELECT label, text FROM texts ORDER BY label"))
+
+    def labels(self):
+        """
+        :return: The labels in sorted order: List[str]
+        """
+
+        with self.__lock:
+            return [row[0] for row in self._connection.execute("SELECT label FROM texts ORDER BY label")]
+
+    def get(self, label: str):
+        """
+        :param label: The label of the text: str
+
+        :return: The text or None if the label doesn't exist: Optional[str]
+        """
+
+        with self.__lock:
+            row = self._connection.execute("SELECT text FROM texts WHERE label = ?", (label,)).fetchone()
+
+        return None if row is None else row[0]
+
+    def __contains__(self, label: str):
+        return self.get(label) is not None
+
+    def __len__(self):
+        with self.__lock:
+            return self._connection.execute("SELECT COUNT(*) FROM texts").fetchone()[0]
+
+    def add(self, label: str, text: str, tags: Iterable[str] = ()):
+        """
+        Adds a text.
+
+        :param label: The unique label: str
+        :param text: The text: str
+        :param tags: The tags of the text, default to none: Iterable[str]
+        """
+
+        with self.__lock, self._connection as connection:
+            try:
+                cursor = connection.execute("INSERT INTO texts (label, text) VALUES (?, ?)", (label, text))
+            except sqlite3.IntegrityError:
+                raise ValueError(f"The label '{label}' already exists.")
+
+            connection.executemany(
+                "INSERT OR IGNORE INTO tags (text_id, tag) VALUES (?, ?)",
+                [(cursor.lastrowid, tag) for tag in _normalize_tags(tags)]
+            )
+            self.__changes += 1
+
+    def remove(self, label: str):
+        """
+        Removes a text (with its tags). Does nothing if the label doesn't exist.
+
+        :param label: The label of the text: str
+        """
+
+        with self.__lock, self._connection as connection:
+            if connection.execute("DELETE FROM texts WHERE label = ?", (label,)).rowcount:
+                self.__changes += 1
+
+    def clear(self):
+        """
+        Removes all texts.
+        """
+
+        with self.__lock, self._connection as connection:
+            if connection.execute("DELETE FROM texts").rowcount:
+                self.__changes += 1
+
+    def tags(self, label: str = None):
+        """
+        :param label: The label of a text, default to None (all tags): str
+
+        :return: The tags of the text or all tags in sorted order: List[str]
+        """
+
+        with self.__lock:
+            if label is None:
+                rows = self._connection.execute("SELECT DISTINCT tag FROM tags ORDER BY tag")
+            else:
+                rows = self._connection.execute(
+                    "SELECT tag FROM tags JOIN texts ON texts.id = tags.text_id WHERE label = ? ORDER BY tag", (label,)
+                )
+
+            return [row[0] for row in rows]
+
+    def set_tags(self, label: str, tags: Iterable[str]):
+        """
+        Replaces the tags of a text.
+
+        :param label: The label of the text: str
+        :param tags: The tags: Iterable[str]
+        """
+
+        with self.__lock, self._connection as connection:
+            row = connection.execute("SELECT id FROM texts WHERE label = ?", (label,)).fetchone()
+            if row is None:
+                raise ValueError(f"The label '{label}' doesn't exist.")
+
+            connection.execute("DELETE FROM tags WHERE text_id = ?", (row[0],))
+            connection.executemany(
+                "INSERT INTO tags (text_id, tag) VALUES (?, ?)", [(row[0], tag) for tag in _normalize_tags(tags)]
+            )
+            self.__changes += 1
+
+    def search(self, query: str = "", tag: str = None, limit: int = 100, offset: int = 0):
+        """
+        Searches the labels and texts. Every word of the query has to match the beginning of a word
+        in the label or the text (or a part of them without full-text search).
+
+        :param query: The words, an empty query matches every text: str
+        :param tag: Only texts with this tag, default to None: str
+        :param limit: The maximum number of results, default to 100: int
+        :param offset: The number of results which are skipped (to page through the results), default to 0: int
+
+        :return: The matching texts sorted by label: List[Tuple[label: str, text: str]]
+        """
+
+        words = query.split()
+        conditions, params = [], []
+
+        if words and self.__ftsEnabled():
+            conditions.append("texts.id IN (SELECT rowid FROM texts_fts WHERE texts_fts MATCH ?)")
+            params.append(" ".join('"' + word.replace('"', '""') + '"*' for word in words))
+        else:
+            for word in words:
+                pattern = "%" + word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                conditions.append("(label LIKE ? ESCAPE '\\' OR text LIKE ? ESCAPE '\\')")
+                params += [pattern, pattern]
+
+        if tag is not None:
+            conditions.append("texts.id IN (SELECT text_id FROM tags WHERE tag = ?)")
+            params.append(tag)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self.__lock:
+            return self._connection.execute(
+                f"SELECT label, text FROM texts {where} ORDER BY label LIMIT ? OFFSET ?", params + [limit, offset]
+            ).fetchall()
+
+    def __ftsEnabled(self):
+        self._connection         # the schema is created on the first access
+        return self.__fts
+
+
+def _normalize_tags(tags: Iterable[str]):
+    return sorted({tag.strip().lower() for tag in tags if tag.strip()})
+
+
+TEXTS = TextLibrary(Path.db_Texts, Path.json_Texts)
@@ -18,9 +18,42 @@ class ThreadSignals(QObject):
     Supported signals are:
     error
         Takes 3 objects which map the traceback.
+    progress
+        Takes whether the no-response error is closed.
+    status
+        Takes the status snapshot of the board (``BoardStatus`` or None).
+    upload
+        Takes the uploaded and the total number of characters of a text upload.
     """
     error = pyqtSignal(object, object, object)
     progress = pyqtSignal(bool)
+    status = pyqtSignal(object)
+    upload = pyqtSignal(int, int)
+
+
+class FutureWatcher(QObject):
+    """
+    Calls a function in the GUI thread when a ``concurrent.futures.Future`` is done.
+    Inherits from QObject, so the worker thread which resolves the future doesn't touch the GUI.
+    """
+
+    done = pyqtSignal(object, object)
+
+    def __init__(self):
+        super().__init__()
+        self.done.connect(self.__on_done)
+
+    def watch(self, future, fn):
+        """
+        :param future: The future to watch: concurrent.futures.Future
+        :param fn: The function which gets called with the future in the GUI thread: Callable
+        """
+
+        future.add_done_callback(lambda f: self.done.emit(f, fn))
+
+    @pyqtSlot(object, object)
+    def __on_done(self, future, fn):
+        fn(future)
 
 
 class Thread(QRunnable):
@@ -47,6 +80,8 @@ class Thread(QRunnable):
         self.signals = ThreadSignals()
 
         self.kwargs["progress_callback"] = self.signals.progress
+        self.kwargs["status_callback"] = self.signals.status
+        self.kwargs["upload_callback"] = self.signals.upload
 
     @pyqtSlot()
     def run(self):
@@ -58,8 +93,6 @@ class Thread(QRunnable):
         try:
             self.fn(*self.args, **self.kwargs)
         except:
-            self.main_window.tasks.global_error = True
-
             exc_error = sys.exc_info()[1]
             exc_type = type(exc_error)
             exc_tb = exc_error.__traceback__
@@ -0,0 +1,709 @@
+"""
+Recorder and replay of the wire-level traffic of the serial ports.
+
+The recorder writes every outbound command and every inbound chunk as one json line
+``{"t": <monotonic seconds since the start>, "p": <port>, "d": "tx"|"rx", "b": <bytes as latin-1>}``
+into a file which is rotated at a maximum size (``trace.jsonl``, ``trace.jsonl.1``, ...).
+
+A recorded trace can be played back with the pyserial URL ``replay://<path>?port=COM6&speed=10``:
+every write is matched with the next equal recorded command and the recorded replies are delivered with their
+original delay (divided by ``speed``, ``speed=0`` delivers them at once). So ``_Comms`` and ``Tasks`` run
+offline against a capture from the field::
+
+    python -m leuchtturm --trace trace.jsonl daemon
+    python -m utils.trace trace.jsonl --speed 10            # re-issues the recorded commands through _Comms
+    python -m utils.trace trace.jsonl --tasks --speed 10    # runs the task loop against the trace
+
+The ``_Comms`` replay is deterministic: it sends the recorded commands in the recorded order and timing
+(divided by ``speed``) and reports the errors, timeouts, unsupported commands and the time it took.
+A trace of the binary protocol is replayed with the binary protocol, its frames are matched by content
+and the sequence numbers of the recorded replies are rewritten to the ones of the replay.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import argparse
+import re
+import threading
+from typing import List, Tuple, Optional
+from urllib.parse import urlsplit, parse_qs
+
+import serial
+from serial.serialutil import SerialBase, PortNotOpenError
+
+
+_STD_MAX_BYTES = 5 * 1024 * 1024
+_STD_BACKUP_COUNT = 3
+_SEARCH_WINDOW = 100        # records, how far a write is searched ahead in the trace
+_CHUNK_REPLIES = re.compile(rb"(?:ACK|NAK) \d+")
+
+
+class TraceRecorder:
+    """
+    Represents the recorder of the serial traffic, thread-safe.
+    Nothing is recorded until ``start`` is called, then every ``record`` costs a json line.
+    """
+
+    def __init__(self):
+        self.recording = False
+        self.__lock = threading.Lock()
+        self.__file = None
+        self.__path = None
+        self.__start = 0.0
+        self.__maxBytes = _STD_MAX_BYTES
+        self.__backupCount = _STD_BACKUP_COUNT
+
+    def start(self, path: str, maxBytes: int = _STD_MAX_BYTES, backupCount: int = _STD_BACKUP_COUNT):
+        """
+        Starts recording.
+
+        :param path: The path of the trace file: str
+        :param maxBytes: The size at which the file gets rotated, default to 5 MiB: int
+        :param backupCount: The number of rotated files which are kept, default to 3: int
+        """
+
+        with self.__lock:
+            self.__path = path
+            self.__maxBytes = maxBytes
+            self.__backupCount = backupCount
+            self.__start = time.monotonic()
+            self.__file = open(path, "a", encoding="utf-8", buffering=1)
+            self.recording = True
+
+    def stop(self):
+        """
+        Stops recording and closes the file.
+        """
+
+        with self.__lock:
+            self.recording = False
+
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+    def record(self, port: str, direction: str, data: bytes):
+        """
+        Records the bytes which were sent or received.
+
+        :param port: The port: str
+        :param direction: "tx" for sent, "rx" for received bytes: str
+        :param data: The bytes: bytes
+        """
+
+        if not self.recording or not data:
+            return
+
+        line = json.dumps({
+            "t": round(time.monotonic() - self.__start, 6),
+            "p": port,
+            "d": direction,
+            "b": data.decode("latin-1")        # keeps every byte
+        }, separators=(",", ":")) + "\n"
+
+        with self.__lock:
+            if self.__file is None:
+                return
+
+            self.__file.write(line)
+
+            if self.__file.tell() >= self.__maxBytes:
+                self.__rotate()
+
+    def __rotate(self):
+        self.__file.close()
+
+        if self.__backupCount > 0:
+            for i in range(self.__backupCount - 1, 0, -1):
+                if os.path.exists(f"{self.__path}.{i}"):
+                    os.replace(f"{self.__path}.{i}", f"{self.__path}.{i + 1}")
+
+            os.replace(self.__path, f"{self.__path}.1")
+        else:
+            os.remove(self.__path)
+
+        self.__file = open(self.__path, "a", encoding="utf-8", buffering=1)
+
+
+TRACE = TraceRecorder()
+
+
+def load_trace(path: str, port: str = None):
+    """
+    Reads a trace including its rotated files (oldest first).
+
+    :param path: The path of the trace file: str
+    :param port: Only the records of this port, default to None (the port of the first record): str
+
+    :return: The records: List[Tuple[t: float, direction: str, data: bytes]]
+    """
+
+    paths = []
+    i = 1
+    while os.path.exists(f"{path}.{i}"):
+        paths.insert(0, f"{path}.{i}")
+        i += 1
+    paths.append(path)
+
+    records = []
+    for path_ in paths:
+        with open(path_, "r", encoding="utf-8") as fdata:
+            for line in fdata:
+                if not line.strip():
+                    continue
+
+                record = json.loads(line)
+                if port is None:
+                    port = record["p"]
+
+                if record["p"] == port:
+                    records.append((record["t"], record["d"], record["b"].encode("latin-1")))
+
+    return records
+
+
+def recorded_binary(records: List[Tuple[float, str, bytes]]):
+    """
+    :param records: The records of a trace: List[Tuple[t: float, direction: str, data: bytes]]
+
+    :return: Whether the binary protocol was negotiated in the trace: bool
+    """
+
+    from utils.serial_interface import _BINARY_VERSION
+
+    negotiation = f"binary {_BINARY_VERSION}\n".encode("cp1252")
+    return any(direction == "tx" and data == negotiation for _, direction, data in records)
+
+
+def _binary_frame(data: bytes):
+    """
+    :param data: The bytes of a single write: bytes
+
+    :return: The binary frame if the bytes are one: Optional[BinaryFrame]
+    """
+
+    from utils.serial_interface import _BINARY_SOF, _pop_binary_frame
+
+    if data[:1] != bytes([_BINARY_SOF]):
+        return None
+
+    buffer = bytearray(data)
+    frame = _pop_binary_frame(buffer, complete=True)
+
+    return frame if not buffer else None
+
+
+def _decode_tx(data: bytes):
+    """
+    Decodes a recorded write, a binary frame is decoded to its line of the text protocol.
+
+    :param data: The bytes of the write: bytes
+
+    :return: The line with newline and whether it is the argument line of the command before: Tuple[str, bool]
+    """
+
+    from utils.serial_interface import _OP_ARGUMENT, _binary_to_line
+
+    frame = _binary_frame(data)
+    if frame is not None:
+        line = _binary_to_line(frame)
+        if line is not None:
+            return line.decode("cp1252", "replace") + "\n", frame.opcode == _OP_ARGUMENT
+
+    # unlike latin-1, cp1252 has undefined bytes
+    return data.decode("cp1252", "replace"), False
+
+
+def _recorded_upload(records: List[Tuple[float, str, bytes]], position: int):
+    """
+    Reconstructs a chunked upload from the records after its ``begin_text``.
+    The window is the most chunks which were unanswered at once.
+
+    :param records: The records of a trace: List[Tuple[t: float, direction: str, data: bytes]]
+    :param position: The index of the ``begin_text`` record: int
+
+    :return: The text, the chunk size and the window of the upload or None if the trace doesn't contain its chunks
+             (e.g. the upload was refused): Optional[Tuple[str, int, int]]
+    """
+
+    chunks = {}
+    inFlight = window = 0
+
+    for _, direction, data in records[position + 1:]:
+        if direction == "rx":
+            inFlight -= len(_CHUNK_REPLIES.findall(data))
+            continue
+
+        line, argument = _decode_tx(data)
+        if line == "end_text\n":
+            break
+
+        parts = line.rstrip("\n").split(" ", 3)
+        if argument or len(parts) != 4 or parts[0] != "chunk" or not parts[1].isdigit():
+            return None
+
+        # a chunk which is sent again has the same data
+        chunks[int(parts[1])] = parts[3]
+        inFlight += 1
+        window = max(window, inFlight)
+    else:
+        return None
+
+    if not chunks or sorted(chunks) != list(range(len(chunks))):
+        return None
+
+    return "".join(chunks[seq] for seq in range(len(chunks))), len(chunks[0]), window
+
+
+def _recorded_patch(line: str, current: Optional[str]):
+    """
+    Applies a recorded ``patch_text <start> <end> <checksum> <replacement>`` to the known text.
+
+    :param line: The recorded line: str
+    :param current: The text on the display before the patch, None if unknown: Optional[str]
+
+    :return: The patched text or None if it doesn't match the checksum of the patch: Optional[str]
+    """
+
+    from utils.serial_interface import _text_checksum
+
+    parts = line.rstrip("\n").split(" ", 4)
+    if current is None or len(parts) != 5 or not parts[1].isdigit() or not parts[2].isdigit():
+        return None
+
+    text = current[:int(parts[1])] + parts[4] + current[int(parts[2]):]
+    return text if _text_checksum(text) == parts[3] else None
+
+
+class ReplaySerial(SerialBase):
+    """
+    Represents the pyserial port ``replay://<path>?port=<port>&speed=<factor>`` which plays back a recorded trace.
+
+    Every write is matched with the next equal ``tx`` record, then the following ``rx`` records are delivered with
+    their recorded delay. The records in between (e.g. commands of the GUI which aren't sent during the replay)
+    are skipped and counted in ``skipped``, a write without an equal record within the next records isn't answered
+    and counted in ``mismatches``. The received bytes before the first command (e.g. pushed events) are delivered
+    when the port is opened. After the end of the trace, every read times out like an unplugged board.
+
+    A written binary frame matches a recorded frame with the same opcode and payload, the replies to it are
+    delivered with the sequence number of the written frame.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.records: List[Tuple[float, str, bytes]] = []
+        self.speed = 1.0
+        self.mismatches = 0
+        self.skipped = 0
+        self.__cursor = 0
+        self.__rx_buffer = bytearray()
+        self.__binary = False               # whether the replies are binary frames
+        self.__seqs = {}                    # recorded sequence number: sequence number of the replay
+        self.__rx_frames = bytearray()      # the recorded binary bytes which don't make a whole frame yet
+        self.__rx_condition = threading.Condition()
+        self.__delivery = None
+        super().__init__(*args, **kwargs)
+
+    @property
+    def position(self):
+        """
+        The index of the next record which gets played back.
+        """
+
+        return self.__cursor
+
+    @property
+    def finished(self):
+        """
+        Whether every record was played back.
+        """
+
+        return self.__cursor >= len(self.records)
+
+    def open(self):
+        if self.is_open:
+            raise serial.SerialException("Port is already open.")
+
+        if self._port is None:
+            raise serial.SerialException("Port must be configured before it can be used.")
+
+        if not self.records:
+            self.__from_url(self._port)
+
+        self.__rx_buffer.clear()
+        self.__binary = False
+        self.__seqs.clear()
+        self.__rx_frames.clear()
+        self.is_open = True
+        self.__deliver_until_tx(time.monotonic(), self.records[self.__cursor][0] if not self.finished else 0.0)
+
+    def close(self):
+        if self.is_open:
+            self.is_open = False
+
+            with self.__rx_condition:
+                self.__rx_condition.notify_all()
+
+        super().close()
+
+    def __from_url(self, url: str):
+        parts = urlsplit(url)
+
+        if parts.scheme != "replay":
+            raise serial.SerialException(f"expected a string in the form 'replay://<path>[?port=..&speed=..]': {url!r}")
+
+        options = {key: values[0] for key, values in parse_qs(parts.query).items()}
+
+        try:
+            self.speed = float(options.get("speed", 1.0))
+            self.records = load_trace(parts.netloc + parts.path, options.get("port"))
+        except (OSError, ValueError) as e:
+            raise serial.SerialException(f"Can't load the trace of {url!r}: {e}")
+
+    def _reconfigure_port(self, *args):
+        pass
+
+    def skip(self):
+        """
+        Skips the next record.
+        """
+
+        if not self.finished:
+            self.__cursor += 1
+            self.skipped += 1
+
+    def __deliver_until_tx(self, startTime: float, startStamp: float):
+        """
+        Delivers the ``rx`` records up to the next ``tx`` record in a background thread, delayed like recorded.
+        """
+
+        chunks = []
+        while not self.finished and self.records[self.__cursor][1] == "rx":
+            stamp, _, data = self.records[self.__cursor]
+            chunks.append((stamp - startStamp, self.__renumber(data)))
+            self.__cursor += 1
+
+        if not chunks:
+            return
+
+        def deliver():
+            for delay, data in chunks:
+                if self.speed > 0:
+                    time.sleep(max(0.0, startTime + delay / self.speed - time.monotonic()))
+
+                with self.__rx_condition:
+                    if not self.is_open:
+                        return
+
+                    self.__rx_buffer += data
+                    self.__rx_condition.notify_all()
+
+        if self.__delivery is not None:
+            # keep the order of the chunks
+            self.__delivery.join()
+
+        self.__delivery = threading.Thread(target=deliver, name="trace-replay", daemon=True)
+        self.__delivery.start()
+
+    def __renumber(self, data: bytes):
+        """
+        Rewrites the sequence numbers of the recorded binary replies to the ones of the written frames.
+        A frame which is split across records is delivered with the record which completes it.
+        """
+
+        if not self.__binary:
+            return data
+
+        from utils.serial_interface import _pop_binary_frame, _encode_binary
+
+        self.__rx_frames += data
+        renumbered = bytearray()
+
+        while True:
+            frame = _pop_binary_frame(self.__rx_frames)
+            if frame is None:
+                return bytes(renumbered)
+
+            renumbered += _encode_binary(self.__seqs.get(frame.seq, frame.seq), frame.opcode, frame.payload)
+
+    @property
+    def in_waiting(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+
+        return len(self.__rx_buffer)
+
+    def read(self, size: int = 1):
+        if not self.is_open:
+            raise PortNotOpenError()
+
+        deadline = None if self._timeout is None else time.monotonic() + self._timeout
+
+        with self.__rx_condition:
+            while len(self.__rx_buffer) < size and self.is_open:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+
+                self.__rx_condition.wait(remaining)
+
+            data = bytes(self.__rx_buffer[:size])
+            del self.__rx_buffer[:size]
+
+        return data
+
+    def write(self, data):
+        if not self.is_open:
+            raise PortNotOpenError()
+
+        data = bytes(data)
+        writeTime = time.monotonic()
+        written = _binary_frame(data)
+
+        for index in range(self.__cursor, min(self.__cursor + _SEARCH_WINDOW, len(self.records))):
+            stamp, direction, recorded = self.records[index]
+
+            if direction != "tx":
+                continue
+
+            if written is not None:
+                frame = _binary_frame(recorded)
+                if frame is None or frame[1:] != written[1:]:
+                    continue
+
+                # the replies carry the sequence number of the written frame
+                self.__binary = True
+                self.__seqs[frame.seq] = written.seq
+
+            elif recorded != data:
+                continue
+
+            elif data.startswith(b"binary "):
+                # negotiated again, the reply is text
+                self.__binary = False
+                self.__seqs.clear()
+                self.__rx_frames.clear()
+
+            self.skipped += index - self.__cursor
+            self.__cursor = index + 1
+            self.__deliver_until_tx(writeTime, stamp)
+            break
+        else:
+            self.mismatches += 1
+
+        return len(data)
+
+    def reset_input_buffer(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+
+        with self.__rx_condition:
+            self.__rx_buffer.clear()
+
+    def reset_output_buffer(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+
+    @property
+    def out_waiting(self):
+        return 0
+
+    @property
+    def cts(self):
+        return True
+
+    @property
+    def dsr(self):
+        return True
+
+    @property
+    def ri(self):
+        return False
+
+    @property
+    def cd(self):
+        return True
+
+    def _update_rts_state(self):
+        pass
+
+    def _update_dtr_state(self):
+        pass
+
+    def _update_break_state(self):
+        pass
+
+
+# pyserial imports 'utils.protocol_replay' for 'replay://'
+if "utils" not in serial.protocol_handler_packages:
+    serial.protocol_handler_packages.append("utils")
+
+
+def replay_comms(url: str, speed: float, timeout: float, binary: bool = False):
+    """
+    Re-issues the recorded commands of a trace through ``_Comms`` in the recorded order and timing.
+
+    A chunked upload is re-issued with the text, chunk size and window of its recorded chunks, a ``patch_text``
+    with the text which the trace showed on the display before. A command which can't be re-issued
+    is counted as unsupported.
+
+    :param url: The ``replay://`` URL of the trace: str
+    :param speed: The acceleration, 0 without delays: float
+    :param timeout: The reply timeout in seconds: float
+    :param binary: Whether the trace negotiated the binary protocol (see ``recorded_binary``), default to False: bool
+
+    :return: The number of commands, errors, timeouts and unsupported commands and the port of the replay: tuple
+    """
+
+    from utils.serial_interface import _Comms, _FIELD_QUERIES, _TASKS_WITHOUT_ARG, _TASKS_WITH_ARG
+
+    fields = {query: field for field, query in _FIELD_QUERIES.items()}
+    comms = _Comms(port=url, timeout=timeout, binary=binary)
+    replay = comms.transport
+    comms.open()
+
+    commands = errors = timeouts = unsupported = 0
+    text = None         # the text on the display as far as the trace tells
+    start = time.monotonic()
+    firstStamp = replay.records[0][0] if replay.records else 0.0
+
+    try:
+        while not replay.finished:
+            position = replay.position
+            stamp, direction, data = replay.records[position]
+            line, argument = _decode_tx(data) if direction == "tx" else (None, False)
+
+            if direction == "rx" or argument or line.startswith("chunk ") or line == "end_text\n":
+                # replies, argument lines and the rest of an upload are played back with their command
+                pass
+
+            elif line.startswith("binary "):
+                # the recorded host reconnected and negotiated the protocol again
+                comms.close()
+                comms.open()
+
+            elif not (line in fields or line in _TASKS_WITHOUT_ARG or line in _TASKS_WITH_ARG
+                      or line in ["get_all\n", "subscribe\n"]
+                      or line.startswith("begin_text ") or line.startswith("patch_text ")):
+                unsupported += 1
+
+            else:
+                if speed > 0:
+                    time.sleep(max(0.0, start + (stamp - firstStamp) / speed - time.monotonic()))
+
+                commands += 1
+                try:
+                    if line == "get_all\n":
+                        text = comms.get_status().text
+                    elif line == "subscribe\n":
+                        comms.subscribe(lambda *event: None)
+                    elif line in fields:
+                        value = comms.get_field(fields[line])
+                        if fields[line] == "text":
+                            text = value
+                    elif line.startswith("begin_text "):
+                        upload = _recorded_upload(replay.records, position)
+                        if upload is None:
+                            # the upload was refused, so only the length matters
+                            comms.upload_text(" " * int(line.split(" ")[1]))
+                        else:
+                            comms.chunkSize, comms.uploadWindow = upload[1], max(upload[2], 1)
+                            if comms.upload_text(upload[0]) is not None:
+                                text = upload[0]
+                    elif line.startswith("patch_text "):
+                        patched = _recorded_patch(line, text)
+                        if patched is None:
+                            raise ValueError(f"The text before {line!r} isn't known.")
+
+                        # the recorded host sent the patch, so it fit into its chunks
+                        comms.chunkSize = max(comms.chunkSize, len(patched))
+                        if comms.patch_text(text, patched) is not None:
+                            text = patched
+                    elif line in _TASKS_WITH_ARG:
+                        arg = next((data_ for _, direction_, data_ in replay.records[position + 1:]
+                                    if direction_ == "tx"), b"\n")
+                        arg = _decode_tx(arg)[0].rstrip("\n")
+                        comms.exec_task_ser(line, arg)
+                        if line == "update_text\n":
+                            text = arg
+                    else:
+                        comms.exec_task_ser(line, None)
+
+                except serial.SerialTimeoutException:
+                    timeouts += 1
+                except (serial.SerialException, ValueError):
+                    errors += 1
+
+            if replay.position == position:
+                # the record wasn't played back (e.g. a reply without a command)
+                replay.skip()
+
+    finally:
+        comms.close()
+
+    return commands, errors, timeouts, unsupported, replay
+
+
+def main(argv=None):
+    from utils.serial_interface import Tasks, Signal
+
+    parser = argparse.ArgumentParser(prog="utils.trace", description="Plays back a recorded trace.")
+    parser.add_argument("path", help="the trace file")
+    parser.add_argument("--port", default=None, help="the recorded port (default the port of the first record)")
+    parser.add_argument("--speed", type=float, default=1.0, help="the acceleration, 0 plays back without delays")
+    parser.add_argument("--timeout", type=float, default=0.5, help="the reply timeout in seconds")
+    parser.add_argument("--tasks", action="store_true", help="run the task loop against the trace")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="how long the task loop runs in seconds (default the duration of the trace)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        parser.error(f"'{args.path}' doesn't exist")
+
+    url = f"replay://{os.path.abspath(args.path)}?speed={args.speed}"
+    if args.port is not None:
+        url += f"&port={args.port}"
+
+    records = load_trace(args.path, args.port)
+    binary = recorded_binary(records)
+
+    if not args.tasks:
+        start = time.perf_counter()
+        commands, errors, timeouts, unsupported, replay = replay_comms(url, args.speed, args.timeout, binary)
+
+        print(f"{commands} commands in {time.perf_counter() - start:.3f} s, {errors} errors, {timeouts} timeouts, "
+              f"{unsupported} unsupported commands, {replay.skipped} skipped and {replay.mismatches} unmatched records",
+              file=sys.stderr)
+        return 1 if errors or unsupported else 0
+
+    duration = args.duration
+    if duration is None:
+        duration = (records[-1][0] - records[0][0]) / args.speed if records and args.speed > 0 else 1.0
+
+    tasks = Tasks(url, timeout=args.timeout, binary=binary)
+    statuses = []
+
+    status_callback = Signal()
+    status_callback.connect(statuses.append)
+    status_callback.connect(lambda status: print(json.dumps(status._asdict() if status is not None else None)))
+
+    thread = threading.Thread(
+        target=tasks.loop,
+        kwargs={"progress_callback": Signal(), "status_callback": status_callback},
+        daemon=True
+    )
+    thread.start()
+    thread.join(duration)
+
+    tasks.running = False
+    thread.join()
+
+    print(f"{len(statuses)} status changes in {duration:.3f} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,9 +4,9 @@ import PyQt5.QtWidgets
 from PyQt5.Qt import *
 from typing import Tuple, Any, List, Union, Callable, Dict, Optional
 import functools
-import json
 
-from utils.common import Path
+from utils.common import checkValidStr
+from utils.texts import TEXTS
 from utils.threads import Thread
 
 
@@ -395,6 +395,84 @@ def createTable(rowCount: int, colCount: int, colsWidth: List[Tuple[int, int]] =
     return table
 
 
+def createTableView(model: QAbstractItemModel, colsWidth: List[Tuple[int, int]] = None,
+                    delegate: QAbstractItemDelegate = None, rowHeight: int = None, font: str = STD_FONT,
+                    fontSize: int = STD_FONTSIZE, rect: Tuple[int, int, int, int] = None, parent: QWidget = None):
+    """
+    Creates a read-only ``Qt.QTableView`` (rows are selected as a whole) which shows the model and returns it.
+    Unlike a ``Qt.QTableWidget`` only the visible rows are rendered.
+
+    :param model: The model which should be shown: QAbstractItemModel
+    :param colsWidth: The columns' width, default to None: List[Tuple[col: int, width: int]]
+    :param delegate: The delegate which paints the cells, default to None: QAbstractItemDelegate
+    :param rowHeight: The fixed height of the rows, default to None (the default height): int
+    :param font: The font of the cells, default to ``STD_FONT``: str
+    :param fontSize: The font size of the cells, default to ``STD_FONTSIZE``: int
+    :param rect: The geometry of the widget (default to None): Tuple[left: int, top: int, width: int, height: int]
+    :param parent: The parent widget on which the table should be placed on (default to None): QWidget
+
+    :return: The table: Qt.QTableView
+    """
+
+    table = QTableView()
+
+    if parent is not None:
+        table.setParent(parent)
+
+    table.setFont(QFont(font, fontSize))
+    table.setModel(model)
+
+    if delegate is not None:
+        delegate.setParent(table)
+        table.setItemDelegate(delegate)
+
+    if colsWidth is not None:
+        for col, w in colsWidth:
+            table.setColumnWidth(col, w)
+
+    table.setSelectionBehavior(QAbstractItemView.SelectRows)
+    table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+    table.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+    table.horizontalHeader().setSectionResizeMode(QHeaderView.Fixed)
+
+    # a fixed row height, so the view never has to measure rows which aren't visible
+    tableVHeader = table.verticalHeader()
+    tableVHeader.setSectionResizeMode(QHeaderView.Fixed)
+    if rowHeight is not None:
+        tableVHeader.setDefaultSectionSize(rowHeight)
+
+    if rect is not None:
+        table.setGeometry(QRect(rect[0], rect[1], rect[2], rect[3]))
+
+    return table
+
+
+def createProgressBar(rect: Tuple[int, int, int, int] = None, isVisible: bool = False, parent: QWidget = None):
+    """
+    Creates a ``Qt.QProgressBar`` without text and returns it.
+
+    :param rect: The geometry of the widget (default to None): Tuple[left: int, top: int, width: int, height: int]
+    :param isVisible: Whether the progress bar is visible or not (default to False): bool
+    :param parent: The parent widget on which the progress bar should be placed on (default to None): QWidget
+
+    :return: The progress bar: Qt.QProgressBar
+    """
+
+    progressBar = QProgressBar()
+
+    if parent is not None:
+        progressBar.setParent(parent)
+
+    progressBar.setTextVisible(False)
+
+    if rect is not None:
+        progressBar.setGeometry(QRect(rect[0], rect[1], rect[2], rect[3]))
+
+    progressBar.setVisible(isVisible)
+
+    return progressBar
+
+
 def createTab(tabs: List[Tuple[Any, Union[QIcon, None], str]], func: Callable = None,
               rect: Tuple[int, int, int, int] = None, parent: QWidget = None):
     """
@@ -419,7 +497,10 @@ def createTab(tabs: List[Tuple[Any, Union[QIcon, None], str]], func: Callable =
         icon = tab[1]
         label = tab[2]
 
-        tabWidget.addTab(widget, icon, label)
+        if icon is None:
+            tabWidget.addTab(widget, label)
+        else:
+            tabWidget.addTab(widget, icon, label)
 
     if rect is not None:
         tabWidget.setGeometry(QRect(rect[0], rect[1], rect[2], rect[3]))
@@ -720,102 +801,25 @@ def createGridLayout(*items: HINT_gridLayout, margins: Union[Tuple[int, int, int
     return layout
 
 
-def updateEditorTable(table: QTableWidget):
-    """
-    Updates the table (``Qt.QTabelWidget``) in the editor tab.
-
-    :param table: The editor table: QTableWidget
-    """
-
-    stdItemFont = QFont("Calibri", 12)
-    stdItemFont.setBold(True)
-
-    stdLabelItem = QTableWidgetItem()
-    stdLabelItem.setText("Label")
-    stdLabelItem.setFont(stdItemFont)
-    stdLabelItem.setTextAlignment(Qt.AlignCenter)
-
-    stdTextItem = QTableWidgetItem()
-    stdTextItem.setText("Text")
-    stdTextItem.setFont(stdItemFont)
-    stdTextItem.setTextAlignment(Qt.AlignCenter)
-
-    itemFont = QFont("Calibri", 11)
-
-    table.clear()
-    table.setItem(0, 0, stdLabelItem)
-    table.setItem(0, 1, stdTextItem)
-
-    with open(Path.json_Texts, "r") as fdata:
-        data = json.load(fdata)
-
-    col = 0
-    row = 1
-    for k, v in data.items():
-        labelItem = QTextEdit()
-        labelItem.setFont(itemFont)
-        labelItem.setText(k)
-        labelItem.setTextInteractionFlags(Qt.TextSelectableByMouse)
-        labelItem.setReadOnly(True)
-        labelItem.setTextInteractionFlags(Qt.TextSelectableByMouse)
-        labelItem.setFrameStyle(QFrame.NoFrame)
-        labelItem.setAlignment(Qt.AlignCenter)
-
-        textItem = QTextEdit()
-        textItem.setFont(itemFont)
-        textItem.setText(v)
-        textItem.setReadOnly(True)
-        textItem.setTextInteractionFlags(Qt.TextSelectableByMouse)
-        textItem.setFrameStyle(QFrame.NoFrame)
-        textItem.setAlignment(Qt.AlignCenter)
-        textItem.setFixedHeight(round(textItem.document().size().height()))
-
-        table.setCellWidget(row, col, labelItem)
-        table.setCellWidget(row, col + 1, textItem)
-        table.resizeRowsToContents()
-
-        row += 1
-
-
 def updateRunDropdown(comboBox: QComboBox):
     """
     Updates the dropdown (``Qt.QComboBox``) to select a pre-created text in the run tab.
+    Its ``utils.models.TextSearchModel`` only reloads if the texts changed since the last update.
 
-    :param comboBox: The dropdown to select a pre-created text: QTableWidget
+    :param comboBox: The dropdown to select a pre-created text: QComboBox
     """
 
-    with open(Path.json_Texts, "r") as fdataTexts:
-        dataTexts = json.load(fdataTexts)
+    model = comboBox.model()
+    model.refresh()
 
-    comboBox.clear()
-    comboBox.addItems(dataTexts.keys())
+    if model.rowCount() > 0:
+        placeholder = "Select text"
 
-    if len(list(dataTexts.keys())) == 0:
-        placeholder = "No texts available"
+    elif model.query.strip():
+        placeholder = "No matching texts"
 
     else:
-        placeholder = "Select text"
+        placeholder = "No texts available"
 
     comboBox.setPlaceholderText(placeholder)
     comboBox.setCurrentIndex(-1)
-
-
-def checkValidStr(string: str):
-    """
-    Checks if a specific string has invalid chars in it and returns the valid state and a list of all (not duplicated) invalid chars in the specific string.
-
-    :param string: The string which should be checked: str
-    :return: The valid state and a list of all (not duplicated) invalid chars in the specific string: bool, list
-    """
-
-    validChars = "ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÜËÀÉÈabcdefghijklmnopqrstuvwxyzäöüëàéè0123456789.,'\"?!@_*#$%&()+-/:;<=>[\]^`{|}~© "
-
-    invalidChars = []
-    valid = True
-    for char in string:
-        if char not in validChars:
-            valid = False
-            invalidChars.append(char)
-
-    return valid, list(set(invalidChars))
-